@@ -1,27 +1,165 @@
-from config import client, index_name
+# clear_data.py
+"""
+Delete documents from the index.
+
+    python clear_data.py                                     # everything: fresh empty index
+    python clear_data.py --court "High Court"                # filtered, sliced, throttled delete
+    python clear_data.py --category criminal --before 2015-01-01 --rps 500
+    python clear_data.py --document-type Ruling --dry-run
+    python clear_data.py --by-query                          # everything, but delete in place
+
+Filtered deletes run as a background delete_by_query task (slices=auto,
+throttled with requests_per_second) whose progress is polled from the tasks
+API, so no client connection is held open for the whole delete. Ctrl-C
+cancels the task. Clearing everything swaps in an empty index instead of
+deleting document by document.
+"""
+import argparse
+import sys
+
 from opensearchpy import exceptions
+from config import get_client, index_name
+from functions.facet_store import FACET_FIELDS
+from functions.index_state import mark_index_changed
+from index_admin.aliases import alias_targets, create_index, drop_indices, swap_alias
+from index_admin.tasks import wait_for_task
+
+# Created lazily - no connection round trip until the delete itself
+client = get_client()
+
+# Documents deleted per second across all slices; -1 disables throttling
+DEFAULT_REQUESTS_PER_SECOND = 1000
+DELETE_SCROLL_SIZE = 1000
+DATE_FIELD = "date"
+
+# Per-index settings that belong to one physical index and can't be copied
+INTERNAL_SETTINGS = {"uuid", "creation_date", "provided_name", "version", "routing", "resize", "verified_before_close"}
+
 
-if client is None:
-    print("❌ OpenSearch client not initialized")
-    exit(1)
+def build_delete_query(court=None, category=None, document_type=None, before=None, after=None, date_field=DATE_FIELD):
+    """Exact keyword filters (same fields as the facets) plus an optional date range"""
+    filters = []
+    if court:
+        filters.append({"term": {FACET_FIELDS["court_types"]: court}})
+    if category:
+        filters.append({"term": {FACET_FIELDS["categories"]: category}})
+    if document_type:
+        filters.append({"term": {FACET_FIELDS["document_types"]: document_type}})
+    if before or after:
+        bounds = {}
+        if after:
+            bounds["gte"] = after
+        if before:
+            bounds["lt"] = before
+        filters.append({"range": {date_field: bounds}})
+    return {"bool": {"filter": filters}} if filters else {"match_all": {}}
 
-try:
+
+def count_documents(query):
+    return client.count(index=index_name, body={"query": query})["count"]
+
+
+def delete_by_query(query, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+    """Start a sliced, throttled delete_by_query task and poll it to completion"""
     response = client.delete_by_query(
         index=index_name,
-        body={
-            "query": {
-                "match_all": {}
-            }
-        },
-        refresh=True,
-        conflicts="proceed"
+        body={"query": query},
+        params={
+            "wait_for_completion": "false",
+            "slices": "auto",
+            "conflicts": "proceed",
+            "requests_per_second": requests_per_second,
+            "scroll_size": DELETE_SCROLL_SIZE,
+            "refresh": "true"
+        }
     )
+    task_id = response["task"]
+    print(f"🗑️  Delete task {task_id} started ({requests_per_second:g} docs/sec)")
+
+    try:
+        result = wait_for_task(task_id, label="Delete")
+    except KeyboardInterrupt:
+        client.tasks.cancel(task_id=task_id)
+        print(f"⛔ Delete task {task_id} cancelled")
+        raise
+    finally:
+        mark_index_changed()
+
+    totals = result.get("response", {})
+    failures = totals.get("failures", [])
+    if result.get("error") or failures:
+        print(f"⚠️  Delete finished with errors: {result.get('error') or failures[:5]}")
+    return totals
+
+
+def index_definition(index):
+    """Settings and mappings of an existing index, minus what's tied to that physical index"""
+    info = next(iter(client.indices.get(index=index).values()))
+    settings = {k: v for k, v in info.get("settings", {}).get("index", {}).items() if k not in INTERNAL_SETTINGS}
+    return {"settings": {"index": settings}, "mappings": info.get("mappings", {})}
+
+
+def recreate_index():
+    """
+    Fast path for clearing everything. Behind an alias: swap in an empty copy
+    and drop the old index (no downtime). A concrete index is dropped and
+    recreated with the same settings and mappings.
+    """
+    targets = alias_targets()
+    if targets:
+        new_index = create_index(index_name, body=index_definition(targets[0]))
+        drop_indices(swap_alias(new_index))
+        return
+
+    definition = index_definition(index_name)
+    client.indices.delete(index=index_name)
+    client.indices.create(index=index_name, body=definition)
+    mark_index_changed()
+    print(f"🆕 Recreated index '{index_name}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Delete documents from '{index_name}'")
+    parser.add_argument("--court", help="court_type to delete (exact value)")
+    parser.add_argument("--category", help="case_category to delete (exact value)")
+    parser.add_argument("--document-type", help="document_type to delete (exact value)")
+    parser.add_argument("--before", help="only documents dated before this (e.g. 2015-01-01)")
+    parser.add_argument("--after", help="only documents dated on/after this")
+    parser.add_argument("--date-field", default=DATE_FIELD, help="date field for --before/--after (default %(default)s)")
+    parser.add_argument("--rps", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help="throttle in documents/sec, -1 for none (default %(default)s)")
+    parser.add_argument("--by-query", action="store_true", help="clear everything with delete_by_query instead of a fresh index")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be deleted")
+    args = parser.parse_args()
+
+    query = build_delete_query(args.court, args.category, args.document_type, args.before, args.after, args.date_field)
+    everything = "match_all" in query
+
+    try:
+        count = count_documents(query)
+        print(f"🔎 {count} documents match" + (" (entire index)" if everything else ""))
+        if args.dry_run or not count:
+            return
+
+        if everything and not args.by_query:
+            recreate_index()
+            deleted = count
+        else:
+            deleted = delete_by_query(query, args.rps).get("deleted", 0)
+
+        print("✅ All documents deleted successfully" if everything else "✅ Matching documents deleted successfully")
+        print(f"Deleted documents count: {deleted}")
+
+    except exceptions.NotFoundError:
+        print(f"⚠️ Index '{index_name}' does not exist")
+
+    except KeyboardInterrupt:
+        sys.exit(130)
 
-    print("✅ All documents deleted successfully")
-    print(f"Deleted documents count: {response.get('deleted', 0)}")
+    except Exception as e:
+        print(f"❌ Error deleting documents: {e}")
+        sys.exit(1)
 
-except exceptions.NotFoundError:
-    print(f"⚠️ Index '{index_name}' does not exist")
 
-except Exception as e:
-    print(f"❌ Error deleting documents: {e}")
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
 # config.py
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from opensearchpy import OpenSearch, exceptions
+from opensearchpy import OpenSearch, Transport, exceptions
 
 # Load environment variables from .env file
 load_dotenv()
 
-# ---------- OPENSEARCH CONNECTION ----------
-try:
-    client = OpenSearch(
+# ---------- OPENSEARCH SETTINGS ----------
+OPENSEARCH_TIMEOUT = int(os.getenv('OPENSEARCH_TIMEOUT', 30))
+OPENSEARCH_POOL_MAXSIZE = int(os.getenv('OPENSEARCH_POOL_MAXSIZE', 25))   # keep-alive connections per host
+OPENSEARCH_RETRIES = int(os.getenv('OPENSEARCH_RETRIES', 3))
+OPENSEARCH_BACKOFF = float(os.getenv('OPENSEARCH_BACKOFF', 0.5))          # seconds, doubled per retry
+HEALTH_CHECK_INTERVAL = float(os.getenv('OPENSEARCH_HEALTH_INTERVAL', 30))
+
+# Get index name from environment - normally an alias over a versioned index
+# (see index_admin/aliases.py), so rebuilds swap underneath the query modules
+index_name = os.getenv('OPENSEARCH_INDEX', 'may_sme_legal_cases')
+
+
+def _connection_kwargs():
+    """Settings shared by the sync and async clients (each sets its own pool size)"""
+    return dict(
         hosts=[{
             'host': os.getenv('OPENSEARCH_HOST', 'localhost'),
             'port': int(os.getenv('OPENSEARCH_PORT', 9200))
@@ -19,19 +33,140 @@ try:
         ),
         use_ssl=True,
         verify_certs=True,
-        timeout=30
+        timeout=OPENSEARCH_TIMEOUT,
+        http_compress=True
+    )
+
+
+# POST endpoints that only read - safe to resend after a timeout
+READ_ONLY_POST_ENDPOINTS = ("/_search", "/_msearch", "/_count", "/_mget", "/_search/scroll")
+
+
+def is_retry_safe(method, url):
+    """GET/HEAD and read-only POSTs; writes and task starts (_bulk, _reindex, _pit...) are not"""
+    if method in ("GET", "HEAD"):
+        return True
+    return method == "POST" and url.split("?", 1)[0].endswith(READ_ONLY_POST_ENDPOINTS)
+
+
+class BackoffTransport(Transport):
+    """
+    Transport that retries connection failures/timeouts with exponential backoff -
+    for reads only. A timed-out write may still have been applied (or started a
+    task), so non-idempotent requests fail fast.
+    """
+
+    def perform_request(self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None):
+        retry = is_retry_safe(method, url)
+
+        attempt = 0
+        while True:
+            try:
+                return super().perform_request(
+                    method, url, params=params, body=body, timeout=timeout, ignore=ignore, headers=headers
+                )
+            except exceptions.ConnectionError:  # includes ConnectionTimeout
+                if not retry or attempt >= OPENSEARCH_RETRIES:
+                    raise
+                time.sleep(OPENSEARCH_BACKOFF * (2 ** attempt))
+                attempt += 1
+
+
+# ---------- OPENSEARCH CONNECTION (created lazily, no network at import) ----------
+_client = None
+_client_lock = threading.Lock()
+
+_readiness = {"ready": False, "status": "unknown", "last_check": None, "error": None}
+_health_thread = None
+
+
+def get_client():
+    """
+    Shared, pooled OpenSearch client, created on first use.
+    Creating it does no network I/O; connectivity is checked in the background.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenSearch(
+                    transport_class=BackoffTransport,
+                    max_retries=0,  # BackoffTransport owns retries
+                    pool_maxsize=OPENSEARCH_POOL_MAXSIZE,  # urllib3
+                    **_connection_kwargs()
+                )
+        start_health_checks()
+    return _client
+
+
+def check_health():
+    """Ping OpenSearch once and record the result"""
+    previous = _readiness["status"]
+    try:
+        ready = bool(get_client().ping())
+        error = None if ready else "Cannot connect to OpenSearch"
+    except Exception as e:
+        ready, error = False, str(e)
+
+    _readiness.update(
+        ready=ready,
+        status="ready" if ready else "unavailable",
+        last_check=time.time(),
+        error=error
     )
 
-    # Test connection
-    if not client.ping():
-        raise Exception("Cannot connect to OpenSearch")
+    # Report state changes only
+    if ready and previous != "ready":
+        print(f"✅ Successfully connected to OpenSearch at {os.getenv('OPENSEARCH_HOST')}")
+    elif not ready and previous != "unavailable":
+        print(f"❌ ERROR: Could not connect to OpenSearch: {error}")
+        print("Please check your .env file configuration")
+    return ready
+
+
+def _health_check_loop():
+    while True:
+        check_health()
+        time.sleep(HEALTH_CHECK_INTERVAL)
+
+
+def start_health_checks():
+    """Start the background health checker (once per process)"""
+    global _health_thread
+    if _health_thread is None:
+        with _client_lock:
+            if _health_thread is None:
+                _health_thread = threading.Thread(target=_health_check_loop, name="opensearch-health", daemon=True)
+                _health_thread.start()
+
+
+def readiness():
+    """Latest health check result: {"ready", "status", "last_check", "error"}"""
+    return dict(_readiness)
+
+
+def __getattr__(name):
+    # Keeps `from config import client` working without connecting at import time
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
+
+
+# ---------- ASYNC OPENSEARCH CONNECTION (ASGI serving mode) ----------
+async_client = None
 
-    print(f"✅ Successfully connected to OpenSearch at {os.getenv('OPENSEARCH_HOST')}")
 
-except Exception as e:
-    print(f"❌ ERROR: Could not connect to OpenSearch: {e}")
-    print("Please check your .env file configuration")
-    client = None
+def get_async_client():
+    """Create the AsyncOpenSearch client on first use, inside the serving event loop"""
+    global async_client
+    if async_client is None:
+        from opensearchpy import AsyncOpenSearch
 
-# Get index name from environment
-index_name = os.getenv('OPENSEARCH_INDEX', 'may_sme_legal_cases')
\ No newline at end of file
+        # Serving mode only reads (search/msearch/get/mget), so retrying timeouts is safe
+        async_client = AsyncOpenSearch(
+            max_retries=OPENSEARCH_RETRIES,
+            retry_on_timeout=True,
+            maxsize=OPENSEARCH_POOL_MAXSIZE,  # AIOHttpConnection ignores pool_maxsize
+            **_connection_kwargs()
+        )
+    return async_client
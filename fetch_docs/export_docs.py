@@ -0,0 +1,284 @@
+# fetch_docs/export_docs.py
+"""
+Export the whole index as JSON Lines or Parquet.
+
+    python -m fetch_docs.export_docs cases.jsonl
+    python -m fetch_docs.export_docs cases.jsonl --fields title,people,source_url --slices 8
+    python -m fetch_docs.export_docs cases.parquet --fields title,court_type,full_text
+
+Walks a point-in-time snapshot with search_after, split into parallel slices.
+Clusters without PIT support fall back to sliced scroll. Memory stays bounded:
+at most a few batches are in flight between the slice readers and the writer.
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+
+from opensearchpy import exceptions, helpers
+from config import get_client, index_name
+
+# Created lazily - no connection round trip until the export starts
+client = get_client()
+
+BATCH_SIZE = 1000
+DEFAULT_SLICES = 4
+PIT_KEEP_ALIVE = "5m"
+PARQUET_ROW_GROUP = 10000
+# Row groups are decoded whole: with full_text a few thousand judgments already
+# make hundreds of MB, so a group is also cut at this many (uncompressed) bytes
+PARQUET_ROW_GROUP_BYTES = 64 * 1024 * 1024
+
+# PIT + search_after needs a total order; _shard_doc is the cheapest tiebreaker
+PIT_SORT = [{"_shard_doc": "asc"}]
+
+
+def _source_filter(fields):
+    return {"includes": fields} if fields else True
+
+
+# ---------- Readers ----------
+def open_pit(index=index_name):
+    """Create a PIT and check that it can be paged with PIT_SORT; None if unsupported"""
+    try:
+        pit_id = client.create_pit(index=index, params={"keep_alive": PIT_KEEP_ALIVE})["pit_id"]
+    except exceptions.TransportError as e:
+        print(f"⚠️  Point-in-time unavailable ({e}); falling back to scroll")
+        return None
+
+    try:
+        client.search(body={"size": 1, "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}, "sort": PIT_SORT, "_source": False})
+    except exceptions.TransportError as e:
+        print(f"⚠️  PIT paging unsupported ({e}); falling back to scroll")
+        close_pit(pit_id)
+        return None
+    return pit_id
+
+
+def close_pit(pit_id):
+    try:
+        client.delete_pit(body={"pit_id": [pit_id]})
+    except Exception as e:
+        print(f"⚠️  Could not delete PIT: {e}")
+
+
+def iter_pit_slice(pit_id, slice_id, slices, fields=None, batch_size=BATCH_SIZE):
+    """Batches of hits for one slice of a PIT, paged with search_after"""
+    search_after = None
+    while True:
+        body = {
+            "size": batch_size,
+            "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+            "sort": PIT_SORT,
+            "_source": _source_filter(fields),
+            "track_total_hits": False
+        }
+        if slices > 1:
+            body["slice"] = {"id": slice_id, "max": slices}
+        if search_after is not None:
+            body["search_after"] = search_after
+
+        hits = client.search(body=body)["hits"]["hits"]
+        if not hits:
+            return
+        yield hits
+        search_after = hits[-1]["sort"]
+
+
+def iter_scroll_slice(slice_id, slices, fields=None, batch_size=BATCH_SIZE, index=index_name):
+    """Batches of hits for one slice of a scroll (fallback without PIT)"""
+    query = {"query": {"match_all": {}}, "_source": _source_filter(fields)}
+    if slices > 1:
+        query["slice"] = {"id": slice_id, "max": slices}
+
+    batch = []
+    for hit in helpers.scan(client, index=index, query=query, size=batch_size, preserve_order=False):
+        batch.append(hit)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_documents(fields=None, slices=DEFAULT_SLICES, batch_size=BATCH_SIZE, use_pit=True, index=index_name):
+    """
+    Yield batches of hits covering the whole index.
+    One reader thread per slice feeds a bounded queue, so at most
+    ~2 batches per slice are held in memory whatever the corpus size.
+    """
+    slices = max(1, slices)
+    pit_id = open_pit(index) if use_pit else None
+
+    batches = queue.Queue(maxsize=slices * 2)
+    stop = threading.Event()
+    done = object()
+    errors = []
+
+    def read(slice_id):
+        try:
+            if pit_id:
+                reader = iter_pit_slice(pit_id, slice_id, slices, fields, batch_size)
+            else:
+                reader = iter_scroll_slice(slice_id, slices, fields, batch_size, index)
+            for batch in reader:
+                while not stop.is_set():
+                    try:
+                        batches.put(batch, timeout=1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            batches.put(done)
+
+    readers = [threading.Thread(target=read, args=(i,), name=f"export-slice-{i}", daemon=True) for i in range(slices)]
+    for reader in readers:
+        reader.start()
+
+    try:
+        finished = 0
+        while finished < slices:
+            batch = batches.get()
+            if batch is done:
+                finished += 1
+                continue
+            yield batch
+        if errors:
+            raise errors[0]
+    finally:
+        stop.set()
+        # Unblock readers waiting on a full queue, then release the PIT
+        while any(r.is_alive() for r in readers):
+            try:
+                batches.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        if pit_id:
+            close_pit(pit_id)
+
+
+# ---------- Writers ----------
+def document_row(hit):
+    return {"_id": hit["_id"], **hit.get("_source", {})}
+
+
+class JsonLinesWriter:
+    """One JSON object per line, written as batches arrive"""
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write_batch(self, hits):
+        self.file.write("".join(json.dumps(document_row(hit), ensure_ascii=False) + "\n" for hit in hits))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Parquet with one string column per field (lists/objects such as people are
+    JSON-encoded), flushed every PARQUET_ROW_GROUP rows or PARQUET_ROW_GROUP_BYTES
+    of cell text, whichever comes first.
+    Needs pyarrow: pip install pyarrow
+    """
+
+    def __init__(self, path, fields, row_group_size=PARQUET_ROW_GROUP, row_group_bytes=PARQUET_ROW_GROUP_BYTES):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Parquet export needs pyarrow: pip install pyarrow")
+
+        self.pa = pa
+        self.columns = ["_id"] + list(fields)
+        self.schema = pa.schema([(name, pa.string()) for name in self.columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        self.row_group_size = row_group_size
+        self.row_group_bytes = row_group_bytes
+        self.rows = []
+        self.row_bytes = 0
+
+    @staticmethod
+    def _cell(value):
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+
+    def write_batch(self, hits):
+        for hit in hits:
+            row = document_row(hit)
+            cells = {name: self._cell(row.get(name)) for name in self.columns}
+            self.rows.append(cells)
+            # Characters, not encoded bytes - close enough for a flush threshold
+            self.row_bytes += sum(len(cell) for cell in cells.values() if cell)
+            if len(self.rows) >= self.row_group_size or self.row_bytes >= self.row_group_bytes:
+                self._flush()
+
+    def _flush(self):
+        if self.rows:
+            # One write_table per row group (pyarrow would otherwise only split at its own row limit)
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema), row_group_size=len(self.rows))
+            self.rows = []
+            self.row_bytes = 0
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def export(path, output_format="jsonl", fields=None, slices=DEFAULT_SLICES, batch_size=BATCH_SIZE, use_pit=True):
+    """Export every document to path; returns {"documents", "seconds", "docs_per_sec"}"""
+    if output_format == "parquet":
+        if not fields:
+            raise SystemExit("❌ Parquet export needs --fields (one column per field)")
+        writer = ParquetWriter(path, fields)
+    else:
+        writer = JsonLinesWriter(path)
+
+    started = time.monotonic()
+    count = 0
+    try:
+        for batch in iter_documents(fields, slices, batch_size, use_pit):
+            writer.write_batch(batch)
+            count += len(batch)
+            if count % (batch_size * 10) < len(batch):
+                print(f"  … {count} documents")
+    finally:
+        writer.close()
+
+    seconds = time.monotonic() - started
+    return {"documents": count, "seconds": round(seconds, 2), "docs_per_sec": round(count / seconds, 1) if seconds else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Export the '{index_name}' index")
+    parser.add_argument("output", help="output file (.jsonl or .parquet)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], help="default: from the file extension")
+    parser.add_argument("--fields", help="comma-separated _source fields (default: all)")
+    parser.add_argument("--slices", type=int, default=DEFAULT_SLICES, help="parallel slices (default %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="hits per request (default %(default)s)")
+    parser.add_argument("--scroll", action="store_true", help="use scroll instead of point-in-time")
+    args = parser.parse_args()
+
+    output_format = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+
+    try:
+        report = export(args.output, output_format, fields, args.slices, args.batch_size, use_pit=not args.scroll)
+    except exceptions.NotFoundError:
+        print(f"⚠️ Index '{index_name}' does not exist")
+        sys.exit(1)
+
+    print(f"✅ Exported {report['documents']} documents to {args.output} "
+          f"in {report['seconds']}s ({report['docs_per_sec']} docs/sec)")
+
+
+if __name__ == "__main__":
+    main()
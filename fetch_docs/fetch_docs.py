@@ -1,30 +1,17 @@
 # fetch_documents.py
-from config import client, index_name
-
-if client is None:
-    print("OpenSearch client is not connected.")
-    exit()
+from fetch_docs.export_docs import iter_documents
 
 try:
-    # Query to get all documents
-    response = client.search(
-        index=index_name,
-        body={
-            "size": 1000,  # adjust if you have more documents
-            "query": {
-                "match_all": {}
-            }
-        }
-    )
-
-    documents = response['hits']['hits']
-    print(f"Found {len(documents)} documents.\n")
+    # Walk every document (point-in-time + search_after), fetching only source_url
+    count = 0
+    for batch in iter_documents(fields=["source_url"]):
+        for doc in batch:
+            count += 1
+            source_url = doc['_source'].get('source_url', None)
+            if source_url:
+                print(source_url)
 
-    # Print the source_url for each document
-    for doc in documents:
-        source_url = doc['_source'].get('source_url', None)
-        if source_url:
-            print(source_url)
+    print(f"\nFound {count} documents.")
 
 except Exception as e:
     print(f"Error fetching documents: {e}")
@@ -0,0 +1,107 @@
+# functions/document_cache.py
+import os
+import threading
+from collections import OrderedDict
+
+DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Larger renders are served but never cached (and never buffered while streaming)
+DOCUMENT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("DOCUMENT_CACHE_MAX_ENTRY_BYTES", 4 * 1024 * 1024))
+
+
+def document_stamp(document):
+    """
+    What identifies one revision of a document: the concrete index plus
+    (_seq_no, _primary_term), or _version when the response doesn't carry
+    sequence numbers. Sequence numbers restart in every index, so after an
+    alias swap the _index part is what tells two revisions apart.
+    """
+    if document.get("_seq_no") is not None:
+        return document.get("_index"), document["_seq_no"], document.get("_primary_term")
+    return document.get("_index"), document.get("_version")
+
+
+class DocumentCache:
+    """
+    LRU of rendered get_file: messages, bounded by total UTF-8 size.
+    Each entry remembers the document revision (stamp) it was rendered from
+    and the index version it was last confirmed under: while the index hasn't
+    changed an entry is served as-is, afterwards only its stamp is re-checked.
+    """
+
+    def __init__(self, max_bytes=DOCUMENT_CACHE_MAX_BYTES, max_entry_bytes=DOCUMENT_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._data = OrderedDict()  # key -> [stamp, rendered, size, index_version]
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, index_version):
+        """
+        Returns (rendered, stamp, fresh), or None on a miss.
+        fresh is False when the index changed since the entry was confirmed -
+        the caller should compare stamp with the live document, then confirm().
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            stamp, rendered, _, confirmed_version = entry
+            fresh = confirmed_version == index_version
+            if fresh:
+                self.hits += 1
+            return rendered, stamp, fresh
+
+    def confirm(self, key, index_version):
+        """The entry's stamp still matches the live document"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                entry[3] = index_version
+                self.revalidations += 1
+
+    def set(self, key, stamp, rendered, index_version):
+        size = len(rendered.encode("utf-8"))
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._data[key] = [stamp, rendered, size, index_version]
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._data:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted[2]
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+document_cache = DocumentCache()
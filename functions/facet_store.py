@@ -0,0 +1,155 @@
+# functions/facet_store.py
+import os
+import threading
+from config import client, index_name
+from functions.index_state import get_index_version
+from functions.query_cache import TTLCache, normalize_query_key
+
+FACET_TOPIC_CACHE_SIZE = int(os.getenv("FACET_TOPIC_CACHE_SIZE", 512))
+FACET_TOPIC_TTL = float(os.getenv("FACET_TOPIC_TTL", 3600))
+
+# Breakdown name -> keyword field (bucket lists keep the OpenSearch {"key", "doc_count"} shape)
+FACET_FIELDS = {
+    "document_types": "document_type.keyword",
+    "court_types": "court_type.keyword",
+    "categories": "case_category.keyword",
+}
+
+# Top-level buckets kept per field; big enough to look any document/court type up by value
+FACET_VALUE_SIZE = 100
+# Buckets shown in a breakdown
+FACET_DISPLAY_SIZE = 10
+
+
+def build_global_facets_query():
+    """
+    One size:0 request for every breakdown the search functions show:
+    global counts plus court/category counts per document type and
+    document type/category counts per court type.
+    """
+    def terms(name, size):
+        return {"terms": {"field": FACET_FIELDS[name], "size": size}}
+
+    return {
+        "size": 0,
+        "aggs": {
+            "document_types": {
+                **terms("document_types", FACET_VALUE_SIZE),
+                "aggs": {
+                    "court_types": terms("court_types", FACET_DISPLAY_SIZE),
+                    "categories": terms("categories", FACET_DISPLAY_SIZE)
+                }
+            },
+            "court_types": {
+                **terms("court_types", FACET_VALUE_SIZE),
+                "aggs": {
+                    "document_types": terms("document_types", FACET_DISPLAY_SIZE),
+                    "categories": terms("categories", FACET_DISPLAY_SIZE)
+                }
+            },
+            "categories": terms("categories", FACET_VALUE_SIZE)
+        }
+    }
+
+
+def facets_from_aggregations(aggregations):
+    """{"document_types": [...], ...} from a search response's aggregations"""
+    return {
+        name: [{"key": b["key"], "doc_count": b["doc_count"]} for b in agg.get("buckets", [])]
+        for name, agg in (aggregations or {}).items()
+        if "buckets" in agg
+    }
+
+
+class FacetStore:
+    """
+    Precomputed document_type / court_type / case_category counts.
+    Per-value breakdowns come from one global aggregation per index version;
+    per-topic breakdowns are harvested from the first search for a topic and
+    kept (LRU) so repeat and popular topics skip aggregating.
+    Everything is dropped when the index changes.
+    """
+
+    def __init__(self, topic_cache_size=FACET_TOPIC_CACHE_SIZE, topic_ttl=FACET_TOPIC_TTL):
+        self.topics = TTLCache(maxsize=topic_cache_size, ttl=topic_ttl)
+        self._loaded = False     # the global aggregation ran for this index version
+        self._by_value = {}      # ("document_types", "judgment") -> {"key", "doc_count", "court_types": [...], "categories": [...]}
+        self._version = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    # ---------- Index change tracking ----------
+    def refresh_if_changed(self):
+        """Drop every stored facet when the index has been written to"""
+        try:
+            version = get_index_version()
+        except Exception:
+            return
+
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self._loaded = False
+                    self._by_value = {}
+                    self.topics.clear()
+                self._version = version
+
+    # ---------- Per-value facets ----------
+    def _load_global(self):
+        response = client.search(index=index_name, body=build_global_facets_query())
+        aggregations = response.get("aggregations", {})
+
+        by_value = {}
+        for name in ("document_types", "court_types"):
+            for bucket in aggregations.get(name, {}).get("buckets", []):
+                by_value[(name, str(bucket["key"]).lower())] = {
+                    "key": bucket["key"],
+                    "doc_count": bucket["doc_count"],
+                    **facets_from_aggregations({k: v for k, v in bucket.items() if isinstance(v, dict)})
+                }
+
+        with self._lock:
+            self._loaded = True
+            self._by_value = by_value
+            self.refreshes += 1
+
+    def value_facets(self, name, value):
+        """
+        Breakdowns for one document type or court type, e.g.
+        value_facets("document_types", "judgment") -> {"key": "Judgment", "doc_count": 812,
+        "court_types": [...], "categories": [...]}, where "key" is the exact keyword to
+        filter on. None when the value isn't an exact keyword in the index.
+        """
+        if not self._loaded:
+            try:
+                self._load_global()
+            except Exception as e:
+                print(f"⚠️  Facet store unavailable: {e}")
+                return None
+        return self._by_value.get((name, " ".join(value.lower().split())))
+
+    # ---------- Per-topic facets ----------
+    def topic_facets(self, topic, full_text=False):
+        """Stored breakdowns for a topic search, or None if it hasn't been seen"""
+        found, facets = self.topics.get((normalize_query_key(topic), full_text))
+        return facets if found else None
+
+    def remember_topic(self, topic, full_text, response):
+        """Keep the breakdowns from a topic search response that carried aggregations"""
+        aggregations = response.get("aggregations")
+        if aggregations is None:
+            return {}
+        facets = facets_from_aggregations(aggregations)
+        self.topics.set((normalize_query_key(topic), full_text), facets)
+        return facets
+
+    def stats(self):
+        return {
+            "global_loaded": self._loaded,
+            "values": len(self._by_value),
+            "refreshes": self.refreshes,
+            "topics": self.topics.stats()
+        }
+
+
+facet_store = FacetStore()
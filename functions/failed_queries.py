@@ -0,0 +1,177 @@
+# functions/failed_queries.py
+import atexit
+import hmac
+import json
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+FAILED_LOG_JSONL = os.getenv("FAILED_LOG_JSONL", "failed_queries.jsonl")
+
+# Old read-modify-write log; still read so its history isn't lost
+LEGACY_FAILED_LOG_JSON = "failed_queries.json"
+
+FLUSH_INTERVAL = 1.0   # seconds a failure may wait before hitting disk
+FLUSH_BATCH = 200      # entries written per append
+
+# Failed queries contain users' own words (often personal names). The HTTP
+# report is off unless ADMIN_TOKEN is set; the CLI below always works.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+try:
+    import fcntl
+except ImportError:  # Windows - appends from one write() call are still whole lines
+    fcntl = None
+
+
+class FailedQueryLog:
+    """
+    Append-only JSON Lines log of queries nothing could answer.
+    Requests only enqueue; a background thread appends batches with a single
+    O_APPEND write (under flock where available), so gunicorn workers never
+    rewrite or clobber each other's entries.
+    """
+
+    def __init__(self, path=FAILED_LOG_JSONL, flush_interval=FLUSH_INTERVAL, batch_size=FLUSH_BATCH):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._writer = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def log(self, query: str):
+        """Record a failed query (non-blocking)"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put({"timestamp": timestamp, "query": query})
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._start_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="failed-query-log", daemon=True)
+                self._writer.start()
+
+    def _drain(self, first=None):
+        """Collect up to batch_size queued entries"""
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        if not batch:
+            return
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch).encode("utf-8")
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                os.write(fd, data)
+            finally:
+                os.close(fd)  # closing releases the lock
+        except OSError as e:
+            print(f"Error logging failed query: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain(first))
+
+    def flush(self):
+        """Write everything still queued"""
+        while not self._queue.empty():
+            self._write(self._drain())
+
+    def close(self):
+        """
+        Stop the writer and wait for the batch it may be holding to be written,
+        then flush what's left (called at exit).
+        """
+        self._stop.set()
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            writer.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+failed_query_log = FailedQueryLog()
+atexit.register(failed_query_log.close)
+
+
+def is_admin_request(authorization):
+    """True for an "Authorization: Bearer <ADMIN_TOKEN>" header; always False when no token is configured"""
+    if not ADMIN_TOKEN or not authorization:
+        return False
+    scheme, _, token = authorization.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.strip(), ADMIN_TOKEN)
+
+
+def read_failed_queries(path=FAILED_LOG_JSONL, legacy_path=LEGACY_FAILED_LOG_JSON):
+    """Yield every logged failure: the legacy JSON file first, then the JSON Lines log"""
+    try:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a torn line from a crash - skip it
+    except FileNotFoundError:
+        pass
+
+
+def top_failed_queries(limit=20, since=None):
+    """
+    Group failed queries (case/whitespace-insensitive) by frequency.
+    `since` is an optional "YYYY-MM-DD[ HH:MM:SS]" lower bound on the timestamp.
+    Returns [{"query", "count", "last_seen"}] most frequent first.
+    """
+    counts = Counter()
+    examples = {}
+    last_seen = {}
+
+    for entry in read_failed_queries():
+        query = entry.get("query") or ""
+        timestamp = entry.get("timestamp", "")
+        if since and timestamp < since:
+            continue
+        key = " ".join(query.lower().split())
+        if not key:
+            continue
+        counts[key] += 1
+        examples.setdefault(key, query)
+        if timestamp > last_seen.get(key, ""):
+            last_seen[key] = timestamp
+
+    return [
+        {"query": examples[key], "count": count, "last_seen": last_seen.get(key)}
+        for key, count in counts.most_common(limit)
+    ]
+
+
+if __name__ == "__main__":
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for row in top_failed_queries(limit):
+        print(f"{row['count']:>5}  {row['last_seen']}  {row['query']}")
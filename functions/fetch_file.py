@@ -1,28 +1,218 @@
 # functions/get_document.py
+import asyncio
+import json
+import math
+import os
+import re
 
-from config import client, index_name
+from config import client, index_name, get_async_client
+from functions.highlighter import legal_term_highlighter
+from functions.document_cache import document_cache, document_stamp
+from functions.index_state import get_index_version
+
+# Full text is formatted and streamed in pieces of roughly this many characters
+FULL_TEXT_CHUNK_SIZE = 16384
+WHITESPACE = re.compile(r"\s")
+
+# ---------- Paged mode: get_file:<id> page:N ----------
+DOCUMENT_PAGE_CHARS = int(os.getenv("DOCUMENT_PAGE_CHARS", 20000))
+PAGE_PATTERN = re.compile(r"(?:^|\s+)page:\s*(\d+)\s*$", re.IGNORECASE)
+
+# Cut the requested window out of full_text on the node, so only that window is sent back
+PAGE_SCRIPT = (
+    "def t = params._source.full_text;"
+    " if (t == null) { return ''; }"
+    " int s = (int) Math.min(params.start, t.length());"
+    " return t.substring(s, (int) Math.min(s + params.length, t.length()));"
+)
+LENGTH_SCRIPT = "def t = params._source.full_text; return t == null ? 0 : t.length();"
+
+# ---------- Batch mode: several documents in one _mget ----------
+MAX_BATCH_DOCUMENTS = int(os.getenv("MAX_BATCH_DOCUMENTS", 50))
+
+# Everything format_document_message renders - nothing else is fetched
+DOCUMENT_FIELDS = [
+    "title", "document_type", "court_type", "case_category", "case_status", "subject",
+    "result", "plaintiff_wins", "defendant_wins", "case_outcome", "outcome_reason",
+    "outcome_summary", "evidence_by_plaintiff", "evidence_by_defendant",
+    "people", "keywords", "points_simple", "source_url", "full_text"
+]
+
+
+def parse_get_file(text: str):
+    """'get_file: abc page:2' -> ("abc", 2); page is None without a page: suffix"""
+    document_id = text.split("get_file:", 1)[1].strip()
+    match = PAGE_PATTERN.search(document_id)
+    if not match:
+        return document_id, None
+    return document_id[:match.start()].strip(), int(match.group(1))
+
+
+def current_index_version():
+    """Index version for cache freshness; a never-matching token if it can't be read"""
+    try:
+        return get_index_version()
+    except Exception:
+        return object()
 
 
 def fetch_file(text: str) -> str:
     """
     Detects `get_file:` command and returns a full readable message.
     No JSON, formatted with stars for the title and all fields included.
+    `get_file:<id> page:N` returns only that window of the full text.
     """
 
     if "get_file:" not in text:
         return None
 
-    document_id = text.split("get_file:", 1)[1].strip()
+    document_id, page = parse_get_file(text)
 
     if not document_id:
         return "❌ get_file command detected, but no document ID was provided."
 
+    if page is not None:
+        return fetch_document_page(document_id, page)
+
+    index_version = current_index_version()
+    rendered = cached_render(document_id, document_id, index_version)
+    if rendered is not None:
+        return rendered
+
     document = get_document_by_id(document_id)
 
     if not document:
         return f"❌ No document found with ID: {document_id}"
 
-    return format_document_message(document)
+    rendered = format_document_message(document)
+    document_cache.set(document_id, document_stamp(document), rendered, index_version)
+    return rendered
+
+
+def iter_fetch_file(text: str):
+    """fetch_file as a generator (streaming mode): metadata first, then the full text in chunks"""
+
+    if "get_file:" not in text:
+        return
+
+    document_id, page = parse_get_file(text)
+
+    if not document_id:
+        yield "❌ get_file command detected, but no document ID was provided."
+        return
+
+    if page is not None:
+        yield fetch_document_page(document_id, page)
+        return
+
+    index_version = current_index_version()
+    rendered = cached_render(document_id, document_id, index_version)
+    if rendered is not None:
+        yield rendered
+        return
+
+    document = get_document_by_id(document_id)
+
+    if not document:
+        yield f"❌ No document found with ID: {document_id}"
+        return
+
+    yield from _cache_streamed(document_id, document, index_version)
+
+
+async def iter_fetch_file_async(text: str):
+    """iter_fetch_file for the async serving mode"""
+
+    if "get_file:" not in text:
+        return
+
+    document_id, page = parse_get_file(text)
+
+    if not document_id:
+        yield "❌ get_file command detected, but no document ID was provided."
+        return
+
+    if page is not None:
+        yield await fetch_document_page_async(document_id, page)
+        return
+
+    index_version = await asyncio.to_thread(current_index_version)
+    rendered = await cached_render_async(document_id, document_id, index_version)
+    if rendered is not None:
+        yield rendered
+        return
+
+    document = await get_document_by_id_async(document_id)
+
+    if not document:
+        yield f"❌ No document found with ID: {document_id}"
+        return
+
+    for chunk in _cache_streamed(document_id, document, index_version):
+        yield chunk
+
+
+async def fetch_file_async(text: str) -> str:
+    """fetch_file for the async serving mode (non-blocking OpenSearch call)"""
+
+    if "get_file:" not in text:
+        return None
+
+    return "".join([chunk async for chunk in iter_fetch_file_async(text)])
+
+
+def _cache_streamed(document_id, document, index_version):
+    """Stream a rendered document, caching it afterwards unless it outgrew a cache entry"""
+    parts, size = [], 0
+    for chunk in iter_document_message(document):
+        yield chunk
+        if parts is not None:
+            parts.append(chunk)
+            size += len(chunk)
+            if size > document_cache.max_entry_bytes:
+                parts = None  # too big to cache - stop buffering
+    if parts is not None:
+        document_cache.set(document_id, document_stamp(document), "".join(parts), index_version)
+
+
+# ---------- Rendered-document cache ----------
+def cached_render(document_id: str, key: str, index_version):
+    """
+    Cached message for key, or None. Served as-is while the index is unchanged;
+    otherwise the document's revision is checked with a source-less get first.
+    """
+    cached = document_cache.get(key, index_version)
+    if cached is None:
+        return None
+
+    rendered, stamp, fresh = cached
+    if fresh:
+        return rendered
+
+    if get_document_stamp(document_id) == stamp:
+        document_cache.confirm(key, index_version)
+        return rendered
+
+    document_cache.discard(key)
+    return None
+
+
+async def cached_render_async(document_id: str, key: str, index_version):
+    """cached_render using the AsyncOpenSearch client"""
+    cached = document_cache.get(key, index_version)
+    if cached is None:
+        return None
+
+    rendered, stamp, fresh = cached
+    if fresh:
+        return rendered
+
+    if await get_document_stamp_async(document_id) == stamp:
+        document_cache.confirm(key, index_version)
+        return rendered
+
+    document_cache.discard(key)
+    return None
 
 
 def get_document_by_id(document_id: str):
@@ -42,11 +232,329 @@ def get_document_by_id(document_id: str):
         return None
 
 
+async def get_document_by_id_async(document_id: str):
+    """
+    get_document_by_id using the AsyncOpenSearch client.
+    """
+
+    try:
+        response = await get_async_client().get(
+            index=index_name,
+            id=document_id
+        )
+        return response
+
+    except Exception as e:
+        print(f"[OpenSearch ERROR] {e}")
+        return None
+
+
+def get_document_stamp(document_id: str):
+    """Current revision of a document without fetching its source (None if missing)"""
+    try:
+        return document_stamp(client.get(index=index_name, id=document_id, _source=False))
+    except Exception:
+        return None
+
+
+async def get_document_stamp_async(document_id: str):
+    try:
+        return document_stamp(await get_async_client().get(index=index_name, id=document_id, _source=False))
+    except Exception:
+        return None
+
+
+# ---------- Batch retrieval ----------
+def _batch_key(document_id: str, full_text: bool) -> str:
+    return document_id if full_text else f"{document_id}#summary"
+
+
+def _plan_batch(document_ids, full_text, index_version):
+    """Split ids into cached renders and ids that need the _mget (stale cache entries kept for comparison)"""
+    rendered, stale, to_fetch = {}, {}, []
+    for document_id in dict.fromkeys(document_ids):
+        cached = document_cache.get(_batch_key(document_id, full_text), index_version)
+        if cached is not None and cached[2]:
+            rendered[document_id] = cached[0]
+            continue
+        if cached is not None:
+            stale[document_id] = cached
+        to_fetch.append(document_id)
+    return rendered, stale, to_fetch
+
+
+def _apply_mget(docs, full_text, index_version, rendered, stale, errors):
+    """Render (or confirm cached renders of) the documents an _mget returned"""
+    for doc in docs:
+        document_id = doc.get("_id")
+        key = _batch_key(document_id, full_text)
+
+        if not doc.get("found"):
+            reason = doc.get("error", {}).get("reason") if isinstance(doc.get("error"), dict) else None
+            errors[document_id] = reason or f"No document found with ID: {document_id}"
+            document_cache.discard(key)
+            continue
+
+        stamp = document_stamp(doc)
+        if document_id in stale and stale[document_id][1] == stamp:
+            document_cache.confirm(key, index_version)
+            rendered[document_id] = stale[document_id][0]
+            continue
+
+        message = format_document_message(doc)
+        document_cache.set(key, stamp, message, index_version)
+        rendered[document_id] = message
+
+
+def _batch_results(document_ids, rendered, errors):
+    """Results in request order, one entry per requested id"""
+    results = []
+    for document_id in document_ids:
+        if document_id in rendered:
+            results.append({"id": document_id, "found": True, "response": rendered[document_id]})
+        else:
+            results.append({
+                "id": document_id,
+                "found": False,
+                "error": errors.get(document_id, f"No document found with ID: {document_id}")
+            })
+    return results
+
+
+def _mget_fields(full_text: bool):
+    return DOCUMENT_FIELDS if full_text else [f for f in DOCUMENT_FIELDS if f != "full_text"]
+
+
+def fetch_files(document_ids, full_text=True):
+    """
+    Render several documents with a single _mget (cached renders are reused).
+    Returns one {"id", "found", "response" | "error"} per id, in request order.
+    full_text=False leaves the judgment text out (summary view).
+    """
+    index_version = current_index_version()
+    rendered, stale, to_fetch = _plan_batch(document_ids, full_text, index_version)
+    errors = {}
+
+    if to_fetch:
+        try:
+            response = client.mget(index=index_name, body={"ids": to_fetch}, _source_includes=_mget_fields(full_text))
+            _apply_mget(response.get("docs", []), full_text, index_version, rendered, stale, errors)
+        except Exception as e:
+            print(f"[OpenSearch ERROR] {e}")
+            errors.update({document_id: "Could not retrieve this document right now." for document_id in to_fetch})
+
+    return _batch_results(document_ids, rendered, errors)
+
+
+async def fetch_files_async(document_ids, full_text=True):
+    """fetch_files using the AsyncOpenSearch client"""
+    index_version = await asyncio.to_thread(current_index_version)
+    rendered, stale, to_fetch = _plan_batch(document_ids, full_text, index_version)
+    errors = {}
+
+    if to_fetch:
+        try:
+            response = await get_async_client().mget(
+                index=index_name, body={"ids": to_fetch}, _source_includes=_mget_fields(full_text)
+            )
+            _apply_mget(response.get("docs", []), full_text, index_version, rendered, stale, errors)
+        except Exception as e:
+            print(f"[OpenSearch ERROR] {e}")
+            errors.update({document_id: "Could not retrieve this document right now." for document_id in to_fetch})
+
+    return _batch_results(document_ids, rendered, errors)
+
+
+# ---------- Paged full text ----------
+def build_page_query(document_id: str, page: int, page_chars: int = DOCUMENT_PAGE_CHARS):
+    """Search body returning the title plus one page_chars window of full_text"""
+    return {
+        "query": {"ids": {"values": [document_id]}},
+        "size": 1,
+        "_source": {"includes": ["title"]},
+        "seq_no_primary_term": True,
+        "script_fields": {
+            "full_text_page": {
+                "script": {
+                    "lang": "painless",
+                    "source": PAGE_SCRIPT,
+                    "params": {"start": (page - 1) * page_chars, "length": page_chars}
+                }
+            },
+            "full_text_length": {
+                "script": {"lang": "painless", "source": LENGTH_SCRIPT}
+            }
+        }
+    }
+
+
+def page_window(hit: dict, page_chars: int = DOCUMENT_PAGE_CHARS):
+    """(page text, page count) from a build_page_query hit"""
+    fields = hit.get("fields", {})
+    length = (fields.get("full_text_length") or [0])[0]
+    return (fields.get("full_text_page") or [""])[0], max(1, math.ceil(length / page_chars))
+
+
+def page_result(hit: dict, page: int, page_chars: int = DOCUMENT_PAGE_CHARS):
+    """
+    {"type": "document_page", "id", "title", "page", "page_count", "text"} for one
+    page of a build_page_query hit, or an error result when the page is out of range.
+    """
+    text, page_count = page_window(hit, page_chars)
+
+    if page > page_count:
+        return {"type": "error", "message": f"❌ Page {page} is out of range - this document has {page_count} page{'s' if page_count != 1 else ''}."}
+
+    return {
+        "type": "document_page",
+        "id": hit.get("_id"),
+        "title": hit.get("_source", {}).get("title"),
+        "page": page,
+        "page_count": page_count,
+        "text": text
+    }
+
+
+def format_document_page(hit: dict, page: int, page_chars: int = DOCUMENT_PAGE_CHARS):
+    """Returns (message, cacheable) for one page of a document's full text"""
+    result = page_result(hit, page, page_chars)
+    if result["type"] == "error":
+        return result["message"], False
+
+    lines = [
+        f"\n***** {result['title'] or 'No Title'} *****\n",
+        f"*Document ID*: {result['id']}",
+        f"\n*Full Text* (page {page} of {result['page_count']}):\n" + format_full_text_with_stars(result["text"])
+    ]
+    if page < result["page_count"]:
+        lines.append(f"\n*Next page*: get_file:{result['id']} page:{page + 1}")
+    return "\n".join(lines), True
+
+
+def search_page(document_id: str, page: int):
+    """The build_page_query hits for one page ([] if missing or the search failed)"""
+    try:
+        return client.search(index=index_name, body=build_page_query(document_id, page))['hits']['hits']
+    except Exception as e:
+        print(f"[OpenSearch ERROR] {e}")
+        return []
+
+
+def fetch_document_page(document_id: str, page: int) -> str:
+    """get_file:<id> page:N - only that window of full_text leaves OpenSearch"""
+    if page < 1:
+        return "❌ Pages start at 1."
+
+    key = f"{document_id}#page:{page}"
+    index_version = current_index_version()
+    rendered = cached_render(document_id, key, index_version)
+    if rendered is not None:
+        return rendered
+
+    hits = search_page(document_id, page)
+
+    if not hits:
+        return f"❌ No document found with ID: {document_id}"
+
+    rendered, cacheable = format_document_page(hits[0], page)
+    if cacheable:
+        document_cache.set(key, document_stamp(hits[0]), rendered, index_version)
+    return rendered
+
+
+async def fetch_document_page_async(document_id: str, page: int) -> str:
+    """fetch_document_page using the AsyncOpenSearch client"""
+    if page < 1:
+        return "❌ Pages start at 1."
+
+    key = f"{document_id}#page:{page}"
+    index_version = await asyncio.to_thread(current_index_version)
+    rendered = await cached_render_async(document_id, key, index_version)
+    if rendered is not None:
+        return rendered
+
+    try:
+        response = await get_async_client().search(index=index_name, body=build_page_query(document_id, page))
+        hits = response['hits']['hits']
+    except Exception as e:
+        print(f"[OpenSearch ERROR] {e}")
+        hits = []
+
+    if not hits:
+        return f"❌ No document found with ID: {document_id}"
+
+    rendered, cacheable = format_document_page(hits[0], page)
+    if cacheable:
+        document_cache.set(key, document_stamp(hits[0]), rendered, index_version)
+    return rendered
+
+
+# ---------- Structured results (format: json) ----------
+def document_record(document: dict) -> dict:
+    """The fields format_document_message renders, as plain data"""
+    source = document.get("_source", {})
+    record = {"type": "document", "id": document.get("_id"), "index": document.get("_index")}
+    record.update({field: source.get(field) for field in DOCUMENT_FIELDS})
+    record["people"] = [
+        {"name": p.get("name"), "role": p.get("role"), "identity_type": p.get("identity_type")}
+        for p in source.get("people") or []
+    ]
+    record["keywords"] = source.get("keywords") or []
+    record["points_simple"] = source.get("points_simple") or []
+    return record
+
+
+def fetch_file_result(text: str):
+    """
+    fetch_file returning data instead of a message: a document_record, or for
+    `page:N` a page_result. Cached (as JSON) in document_cache like the messages.
+    """
+
+    if "get_file:" not in text:
+        return None
+
+    document_id, page = parse_get_file(text)
+
+    if not document_id:
+        return {"type": "error", "message": "❌ get_file command detected, but no document ID was provided."}
+
+    if page is not None and page < 1:
+        return {"type": "error", "message": "❌ Pages start at 1."}
+
+    key = f"{document_id}#json" if page is None else f"{document_id}#json:page:{page}"
+    index_version = current_index_version()
+    cached = cached_render(document_id, key, index_version)
+    if cached is not None:
+        return json.loads(cached)
+
+    if page is not None:
+        hits = search_page(document_id, page)
+        document = hits[0] if hits else None
+    else:
+        document = get_document_by_id(document_id)
+
+    if not document:
+        return {"type": "error", "message": f"❌ No document found with ID: {document_id}"}
+
+    result = page_result(document, page) if page is not None else document_record(document)
+    if result["type"] != "error":
+        document_cache.set(key, document_stamp(document), json.dumps(result, ensure_ascii=False), index_version)
+    return result
+
+
 def format_document_message(document: dict) -> str:
     """
     Formats the OpenSearch document as a readable message.
     All fields are included with star formatting for emphasis.
     """
+    return "".join(iter_document_message(document))
+
+
+def iter_document_message(document: dict):
+    """
+    format_document_message as a generator: the metadata block first,
+    then the formatted full text one chunk at a time.
+    """
 
     source = document.get("_source", {})
     lines = []
@@ -103,41 +611,34 @@ def format_document_message(document: dict) -> str:
     lines.append("\n*Files*:")
     lines.append(f" - *Source URL*: {source_url}")
 
+    yield "\n".join(lines)
+
     # Full text
     full_text = source.get("full_text", "")
     if full_text:
         # Format important parts of full text with stars
-        formatted_full_text = format_full_text_with_stars(full_text)
-        lines.append("\n*Full Text*:\n" + formatted_full_text)
+        yield "\n\n*Full Text*:\n"
+        yield from legal_term_highlighter.iter_highlight(iter_text_chunks(full_text))
+
 
-    return "\n".join(lines)
+def iter_text_chunks(text: str, size: int = FULL_TEXT_CHUNK_SIZE):
+    """
+    Split text into ~size character pieces, cutting only after whitespace
+    so no word is split across two chunks.
+    """
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            match = WHITESPACE.search(text, end)
+            end = match.end() if match else len(text)
+        yield text[start:end]
+        start = end
 
 
 def format_full_text_with_stars(text: str) -> str:
     """
     Adds star formatting to important parts of the full text.
+    One pass of a precompiled pattern; the term list lives in functions/highlighter.py.
     """
-    # This is a simple formatter - you can enhance it based on your needs
-    formatted = text
-
-    # Format common legal terms with stars
-    legal_terms = [
-        ("court", "*Court*:"),
-        ("judge", "*Judge*:"),
-        ("plaintiff", "*Plaintiff*:"),
-        ("defendant", "*Defendant*:"),
-        ("witness", "*Witness*:"),
-        ("evidence", "*Evidence*:"),
-        ("verdict", "*Verdict*:"),
-        ("sentence", "*Sentence*:"),
-        ("appeal", "*Appeal*:"),
-        ("statute", "*Statute*:"),
-        ("regulation", "*Regulation*:"),
-    ]
-
-    for term, replacement in legal_terms:
-        # Case insensitive replacement for whole words
-        import re
-        formatted = re.sub(rf'\b{term}\b', replacement, formatted, flags=re.IGNORECASE)
-
-    return formatted
\ No newline at end of file
+    return legal_term_highlighter.highlight(text)
@@ -0,0 +1,107 @@
+# functions/highlighter.py
+import os
+import re
+
+# Legal terms starred in document full text: term -> replacement
+DEFAULT_LEGAL_TERMS = [
+    "court",
+    "judge",
+    "plaintiff",
+    "defendant",
+    "witness",
+    "evidence",
+    "verdict",
+    "sentence",
+    "appeal",
+    "statute",
+    "regulation",
+]
+
+# Extra vocabulary without a code change: LEGAL_TERMS_EXTRA="tribunal,respondent,injunction"
+LEGAL_TERMS_EXTRA = [t.strip() for t in os.getenv("LEGAL_TERMS_EXTRA", "").split(",") if t.strip()]
+
+
+def default_replacement(term: str) -> str:
+    """'court' -> '*Court*:'"""
+    return f"*{term.capitalize()}*:"
+
+
+def trie_pattern(words) -> str:
+    """
+    Regex source for a set of words, factored as a prefix trie
+    ("appeal|applicant" -> "ap(?:peal|plicant)"), so matching cost
+    grows with word length rather than with the number of words.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if end else body
+
+    return build(trie)
+
+
+class TermHighlighter:
+    """
+    Stars whole-word, case-insensitive term matches in one regex pass.
+    The pattern is compiled once; each match is replaced via a dict lookup.
+    """
+
+    def __init__(self, terms):
+        self.set_terms(terms)
+
+    def set_terms(self, terms):
+        """terms: iterable of words, or a {term: replacement} dict"""
+        if not isinstance(terms, dict):
+            terms = {t: default_replacement(t) for t in terms}
+        self.replacements = {t.lower(): r for t, r in terms.items() if t}
+        self.pattern = re.compile(
+            rf"\b(?:{trie_pattern(sorted(self.replacements))})\b", re.IGNORECASE
+        ) if self.replacements else None
+
+    def add_terms(self, terms):
+        """Extend the vocabulary and recompile"""
+        current = dict(self.replacements)
+        if not isinstance(terms, dict):
+            terms = {t: default_replacement(t) for t in terms}
+        current.update({t.lower(): r for t, r in terms.items()})
+        self.set_terms(current)
+
+    def _replace(self, match):
+        text = match.group(0)
+        replacement = self.replacements.get(text.lower())
+        return replacement if replacement is not None else self._folded_replacement(text)
+
+    def _folded_replacement(self, text):
+        """
+        IGNORECASE also matches characters whose lower() isn't the stored key
+        ("WİTNESS" -> "wi̇tness", "ſtatute"); find the term the regex matched.
+        """
+        for term, replacement in self.replacements.items():
+            if re.fullmatch(re.escape(term), text, re.IGNORECASE):
+                return replacement
+        return default_replacement(text)
+
+    def highlight(self, text: str) -> str:
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+    def iter_highlight(self, chunks):
+        """Highlight an iterable of whitespace-aligned text chunks one at a time"""
+        for chunk in chunks:
+            yield self.highlight(chunk)
+
+
+legal_term_highlighter = TermHighlighter(DEFAULT_LEGAL_TERMS + LEGAL_TERMS_EXTRA)
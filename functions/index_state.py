@@ -0,0 +1,62 @@
+# functions/index_state.py
+import os
+import threading
+import time
+from opensearchpy import exceptions
+from config import client, index_name
+
+# How often (seconds) we ask OpenSearch whether the index has been written to
+INDEX_CHECK_INTERVAL = float(os.getenv("INDEX_CHECK_INTERVAL", 30))
+
+_lock = threading.Lock()
+_local_generation = 0
+_last_check = 0.0
+_last_remote_version = None
+
+
+def mark_index_changed():
+    """
+    Record that this process wrote to the index.
+    Forces the next get_index_version() call to report a new version.
+    """
+    global _local_generation, _last_check
+    with _lock:
+        _local_generation += 1
+        _last_check = 0.0
+
+
+def _fetch_remote_version():
+    """
+    Read write counters for the index from OpenSearch.
+    index_name may be an alias: the concrete index names are part of the
+    version, so an alias swap always reads as a change.
+    """
+    try:
+        stats = client.indices.stats(index=index_name, metric="indexing,docs")
+    except exceptions.NotFoundError:
+        return None
+
+    primaries = stats.get("_all", {}).get("primaries", {})
+    indexing = primaries.get("indexing", {})
+    docs = primaries.get("docs", {})
+    return (
+        tuple(sorted(stats.get("indices", {}))),
+        indexing.get("index_total", 0),
+        indexing.get("delete_total", 0),
+        docs.get("count", 0),
+    )
+
+
+def get_index_version(force=False):
+    """
+    Return a token that changes whenever the index is written to.
+    The remote check is throttled to once every INDEX_CHECK_INTERVAL seconds,
+    so callers can use it on every request.
+    """
+    global _last_check, _last_remote_version
+    with _lock:
+        now = time.monotonic()
+        if force or _last_check == 0.0 or now - _last_check >= INDEX_CHECK_INTERVAL:
+            _last_remote_version = _fetch_remote_version()
+            _last_check = now
+        return _local_generation, _last_remote_version
@@ -1,6 +1,8 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from functions.query_cache import ErrorMessage
+from text_cleaner.rewrite_cache import rewrite_cache, make_key
 
 # Load .env
 load_dotenv()
@@ -9,6 +11,18 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Initialize OpenAI client
 client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+async_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+
+MAY_MODEL = "gpt-4"
+
+MAY_SYSTEM_PROMPT = (
+    "You are MAY Legal Research. "
+    "You should sound polite, calm, friendly, and human — never robotic. "
+    "You may respond to greetings and small talk naturally (e.g. 'How are you?'). "
+    "If asked anything beyond your current scope, kindly explain that you are still being developed. "
+    "Clearly and gently state that, for now, you can only help with searching legal names and cases. but still under development."
+    "Your tone should feel welcoming, professional, and respectful."
+)
 
 
 def search_may(query: str) -> str:
@@ -21,23 +35,53 @@ def search_may(query: str) -> str:
         return "I didn’t quite catch that. Could you please repeat?"
 
     if not client:
-        return "MAY Legal Assistant is currently unavailable. Please check system configuration."
+        return ErrorMessage("MAY Legal Assistant is currently unavailable. Please check system configuration.")
+
+    # Reuse an earlier answer to the same question
+    cache_key = make_key(query, MAY_MODEL, MAY_SYSTEM_PROMPT)
+    cached = rewrite_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
         response = client.chat.completions.create(
-            model="gpt-4",
+            model=MAY_MODEL,
+            messages=[
+                {"role": "system", "content": MAY_SYSTEM_PROMPT},
+                {"role": "user", "content": query},
+            ],
+            temperature=1.0,  # more human
+            max_tokens=300,
+        )
+
+        ai_message = response.choices[0].message.content.strip()
+        rewrite_cache.set(cache_key, MAY_MODEL, ai_message)
+
+        return f"{ai_message}"
+
+    except Exception as e:
+        return ErrorMessage("Something went wrong while responding. Please try again.")
+
+
+async def search_may_async(query: str) -> str:
+    """search_may for the async serving mode (non-blocking OpenAI call)"""
+    if not query:
+        return "I didn’t quite catch that. Could you please repeat?"
+
+    if not async_client:
+        return ErrorMessage("MAY Legal Assistant is currently unavailable. Please check system configuration.")
+
+    # Reuse an earlier answer to the same question (SQLite stays off the loop)
+    cache_key = make_key(query, MAY_MODEL, MAY_SYSTEM_PROMPT)
+    cached = await rewrite_cache.get_async(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = await async_client.chat.completions.create(
+            model=MAY_MODEL,
             messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are MAY Legal Research. "
-                        "You should sound polite, calm, friendly, and human — never robotic. "
-                        "You may respond to greetings and small talk naturally (e.g. 'How are you?'). "
-                        "If asked anything beyond your current scope, kindly explain that you are still being developed. "
-                        "Clearly and gently state that, for now, you can only help with searching legal names and cases. but still under development."
-                        "Your tone should feel welcoming, professional, and respectful."
-                    ),
-                },
+                {"role": "system", "content": MAY_SYSTEM_PROMPT},
                 {"role": "user", "content": query},
             ],
             temperature=1.0,  # more human
@@ -45,8 +89,9 @@ def search_may(query: str) -> str:
         )
 
         ai_message = response.choices[0].message.content.strip()
+        await rewrite_cache.set_async(cache_key, MAY_MODEL, ai_message)
 
         return f"{ai_message}"
 
     except Exception as e:
-        return "Something went wrong while responding. Please try again."
+        return ErrorMessage("Something went wrong while responding. Please try again.")
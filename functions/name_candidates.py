@@ -0,0 +1,187 @@
+# functions/name_candidates.py
+import os
+from collections import Counter
+
+# Below this many distinct names we simply score every name
+FULL_SCAN_LIMIT = int(os.getenv("NAME_FULL_SCAN_LIMIT", 5000))
+
+# Maximum number of names handed to the fuzzy scorer
+MAX_FUZZY_CANDIDATES = int(os.getenv("NAME_MAX_FUZZY_CANDIDATES", 300))
+
+# Trigrams shared by more than this share of all names carry no signal for ranking
+STOP_GRAM_RATIO = 0.05
+
+# Always count at least this many of the query's rarest trigrams
+MIN_SCORED_GRAMS = 3
+
+
+def name_grams(text, n):
+    """All character n-grams of a normalized name (spaces included)"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def blocking_keys(normalized_name):
+    """
+    Blocking keys for a normalized name:
+    - surname (last word)
+    - first initial + surname
+    - all initials + surname
+
+    Examples:
+        "j m chimembe" -> {"s:chimembe", "f:j chimembe", "i:jm chimembe"}
+        "john mwila chimembe" -> {"s:chimembe", "f:j chimembe", "i:jm chimembe"}
+    """
+    parts = normalized_name.split()
+    if not parts:
+        return set()
+
+    surname = parts[-1]
+    keys = {f"s:{surname}"}
+    if len(parts) > 1:
+        initials = "".join(p[0] for p in parts[:-1])
+        keys.add(f"f:{initials[0]} {surname}")
+        keys.add(f"i:{initials} {surname}")
+    return keys
+
+
+class NameCandidateIndex:
+    """
+    Candidate generation over distinct normalized names.
+    Keeps bigram/trigram postings and blocking keys so only a small
+    set of names ever reaches the fuzzy scorer or a substring check.
+    """
+
+    def __init__(self):
+        self.grams = {}     # bigram/trigram -> set of names containing it
+        self.blocks = {}    # blocking key -> set of names
+        self.order = {}     # name -> first-seen sequence number
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self.order)
+
+    # ---------- Maintenance ----------
+    def add(self, name):
+        if not name or name in self.order:
+            return
+        self.order[name] = self._next_seq
+        self._next_seq += 1
+        for gram in name_grams(name, 2) | name_grams(name, 3):
+            self.grams.setdefault(gram, set()).add(name)
+        for key in blocking_keys(name):
+            self.blocks.setdefault(key, set()).add(name)
+
+    def remove(self, name):
+        if self.order.pop(name, None) is None:
+            return
+        for gram in name_grams(name, 2) | name_grams(name, 3):
+            bucket = self.grams.get(gram)
+            if bucket is not None:
+                bucket.discard(name)
+                if not bucket:
+                    del self.grams[gram]
+        for key in blocking_keys(name):
+            bucket = self.blocks.get(key)
+            if bucket is not None:
+                bucket.discard(name)
+                if not bucket:
+                    del self.blocks[key]
+
+    def in_order(self, names):
+        """Sort names by first-seen order (the order a full scan would produce)"""
+        return sorted(names, key=self.order.__getitem__)
+
+    # ---------- Substring lookups (exact) ----------
+    def containing(self, part):
+        """
+        Names containing `part` as a substring, or None when the part is
+        too short to be answered from the n-gram postings (single character).
+        """
+        if len(part) < 2:
+            return None
+        if len(part) <= 3:
+            return set(self.grams.get(part, ()))
+
+        buckets = [self.grams.get(g) for g in name_grams(part, 3)]
+        if any(b is None for b in buckets):
+            return set()
+        buckets.sort(key=len)
+        found = set(buckets[0])
+        for bucket in buckets[1:]:
+            found &= bucket
+            if not found:
+                break
+        return {n for n in found if part in n}
+
+    def _scan(self, predicate, limit):
+        """Linear fallback for single-character queries, stopping early"""
+        found = []
+        for name in self.order:
+            if predicate(name):
+                found.append(name)
+                if len(found) > limit:
+                    break
+        return found
+
+    def match_all_parts(self, parts, limit):
+        """
+        Names where ALL parts appear as substrings, in first-seen order.
+        Returns at most limit + 1 names so callers can tell "too many".
+        """
+        sets = [s for s in (self.containing(p) for p in parts) if s is not None]
+        if not sets:
+            return self._scan(lambda n: all(p in n for p in parts), limit)
+
+        sets.sort(key=len)
+        found = set(sets[0])
+        for s in sets[1:]:
+            found &= s
+        found = [n for n in found if all(p in n for p in parts)]
+        return self.in_order(found)[:limit + 1]
+
+    def match_any_part(self, parts, limit):
+        """
+        Names where ANY part appears as a substring, in first-seen order.
+        Returns at most limit + 1 names so callers can tell "too many".
+        """
+        found = set()
+        for part in parts:
+            s = self.containing(part)
+            if s is None:
+                return self._scan(lambda n: any(p in n for p in parts), limit)
+            found |= s
+            if len(found) > limit:
+                # Too many matches - the exact set no longer matters
+                return list(found)[:limit + 1]
+        return self.in_order(found)
+
+    # ---------- Fuzzy candidates ----------
+    def fuzzy_candidates(self, query):
+        """
+        Names worth scoring against `query`, in first-seen order.
+        Small tables are returned whole; larger ones are narrowed to the names
+        sharing the most trigrams with the query plus every name in the same block.
+        """
+        if len(self.order) <= FULL_SCAN_LIMIT:
+            return list(self.order)
+
+        stop_size = max(MAX_FUZZY_CANDIDATES, int(len(self.order) * STOP_GRAM_RATIO))
+        buckets = sorted(
+            (b for b in (self.grams.get(g) for g in name_grams(query, 3)) if b),
+            key=len
+        )
+
+        # Rarest trigrams first; very common ones only count when nothing rarer exists
+        overlap = Counter()
+        for i, bucket in enumerate(buckets):
+            if i >= MIN_SCORED_GRAMS and len(bucket) > stop_size:
+                break
+            overlap.update(bucket)
+
+        candidates = {n for n, _ in overlap.most_common(MAX_FUZZY_CANDIDATES)}
+        for key in blocking_keys(query):
+            block = self.blocks.get(key, set())
+            if len(block) <= MAX_FUZZY_CANDIDATES:  # common surnames are covered by trigrams
+                candidates |= block
+
+        return self.in_order(candidates)
@@ -1,7 +1,13 @@
+import base64
+import json
+import os
 import random
-from rapidfuzz import process
+import sys
+from rapidfuzz import process, fuzz
 from opensearchpy import exceptions
 from config import client, index_name  # <--- use config here
+from functions.index_state import get_index_version
+from functions.query_cache import ErrorMessage, PagedMessage
 
 
 # ---------- Updated search_person (focused on person info) ----------
@@ -20,23 +26,30 @@ def search_person(name, top_n=5):
         if not hits:
             return f"No cases found for '{name}'."
 
+        # Score every person in every hit against the name in one vectorized pass
+        candidates = [(hit['_source'], p) for hit in hits for p in hit['_source'].get("people", [])]
+        scores = process.cdist(
+            [name],
+            [p.get("name", "") for _, p in candidates],
+            scorer=fuzz.WRatio,
+            workers=-1
+        )[0] if candidates else []
+
         # Collect all person occurrences
         person_occurrences = []
-        for hit in hits:
-            src = hit['_source']
+        for (src, p), score in zip(candidates, scores):
             source_url = src.get("source_url", "unknown")  # Changed to source_url
-            for p in src.get("people", []):
-                # Use fuzzy matching to catch variations
-                if process.extractOne(name, [p.get("name", "")])[1] >= 80:  # 80% match threshold
-                    person_occurrences.append({
-                        "name": p["name"],
-                        "role": p["role"],
-                        "identity_type": p.get("identity_type", "Unknown"),
-                        "title": src.get("title"),
-                        "court_type": src.get("court_type"),
-                        "case_type": src.get("case_type"),
-                        "source_url": source_url  # Changed to source_url
-                    })
+            # Use fuzzy matching to catch variations
+            if score >= 80:  # 80% match threshold
+                person_occurrences.append({
+                    "name": p["name"],
+                    "role": p["role"],
+                    "identity_type": p.get("identity_type", "Unknown"),
+                    "title": src.get("title"),
+                    "court_type": src.get("court_type"),
+                    "case_type": src.get("case_type"),
+                    "source_url": source_url  # Changed to source_url
+                })
 
         if not person_occurrences:
             return f"No person named '{name}' found in any cases."
@@ -68,9 +81,277 @@ def search_person(name, top_n=5):
         return message
 
     except exceptions.ConnectionError:
-        return "ERROR: Connection lost during search."
+        return ErrorMessage("ERROR: Connection lost during search.")
+    except Exception as e:
+        return ErrorMessage(f"ERROR: {e}")
+
+
+# ---------- Server-side search_person (nested query, source-filtered, paginated) ----------
+# Only these case fields come back; people come from inner_hits, full_text never does
+CASE_SUMMARY_FIELDS = ["title", "court_type", "case_type", "source_url"]
+PERSON_FIELDS = ["people.name", "people.role", "people.identity_type"]
+
+# Paging past the first page walks a point-in-time snapshot: _shard_doc is a
+# free tiebreaker there, where sorting on _id would load fielddata
+PERSON_PIT_KEEP_ALIVE = "1m"
+PERSON_PIT_SORT = [{"_score": "desc"}, {"_shard_doc": "asc"}]
+
+# Largest page /api/people serves
+MAX_PERSON_PAGE_SIZE = int(os.getenv("MAX_PERSON_PAGE_SIZE", 100))
+
+# Matching people returned per case; cases with more say how many were left out
+PERSON_INNER_HITS = int(os.getenv("PERSON_INNER_HITS", "10"))
+
+# Only indices built with the managed mapping (index_admin/mapping.py) have
+# this subfield; older ones keep the match_phrase_prefix clause
+NAME_EDGE_FIELD = "people.name.edge"
+_edge_check = None  # (index version, mapped) for index_name
+
+
+def _edge_field_mapped(index):
+    """True/False once every index behind `index` was checked, None if the check failed"""
+    try:
+        response = client.indices.get_field_mapping(fields=NAME_EDGE_FIELD, index=index)
+    except Exception as e:
+        print(f"⚠️  Could not check the {NAME_EDGE_FIELD} mapping: {e}")
+        return None
+    return bool(response) and all(NAME_EDGE_FIELD in m.get("mappings", {}) for m in response.values())
+
+
+def name_edge_mapped(index=index_name):
+    """Whether the person query can use people.name.edge (re-checked when the index version changes)"""
+    global _edge_check
+    if index != index_name:
+        return bool(_edge_field_mapped(index))
+
+    version = get_index_version()
+    if _edge_check is None or _edge_check[0] != version:
+        mapped = _edge_field_mapped(index)
+        if mapped is None:
+            return False
+        _edge_check = (version, mapped)
+    return _edge_check[1]
+
+
+def name_prefix_clause(name, use_edge):
+    """Partial-name clause: an edge n-gram term match, or a phrase_prefix expansion on older indices"""
+    if use_edge:
+        return {"match": {NAME_EDGE_FIELD: {"query": name, "operator": "and"}}}
+    return {"match_phrase_prefix": {"people.name": {"query": name}}}
+
+
+def build_person_query(name, page_size=10, search_after=None, pit_id=None, use_edge=None,
+                       inner_hits=PERSON_INNER_HITS):
+    """
+    Nested people.name phrase/fuzzy/prefix query with up to `inner_hits`
+    matching people per case. Without a pit_id it's a single relevance-ordered
+    page; with one it's sorted for search_after paging. The total is only
+    counted on the first page. use_edge defaults to name_edge_mapped() for
+    the live index.
+    """
+    if use_edge is None:
+        use_edge = name_edge_mapped()
+    search_body = {
+        "query": {
+            "nested": {
+                "path": "people",
+                "score_mode": "max",
+                "query": {
+                    "bool": {
+                        "should": [
+                            {"match_phrase": {"people.name": {"query": name, "boost": 3}}},
+                            {"match": {"people.name": {"query": name, "fuzziness": "AUTO", "operator": "and", "boost": 2}}},
+                            name_prefix_clause(name, use_edge)
+                        ],
+                        "minimum_should_match": 1
+                    }
+                },
+                "inner_hits": {"size": inner_hits, "_source": {"includes": PERSON_FIELDS}}
+            }
+        },
+        "_source": {"includes": CASE_SUMMARY_FIELDS},
+        "track_total_hits": search_after is None,
+        "size": page_size
+    }
+    if pit_id:
+        search_body["pit"] = {"id": pit_id, "keep_alive": PERSON_PIT_KEEP_ALIVE}
+        search_body["sort"] = PERSON_PIT_SORT
+    if search_after:
+        search_body["search_after"] = search_after
+    return search_body
+
+
+def fetch_person_page(name, page_size=10, search_after=None, pit_id=None):
+    """
+    One page of server-side person matches.
+    Returns (person_occurrences, total_cases, next_search_after); total_cases
+    is None after the first page, next_search_after is None on the last page
+    (and always without a pit_id - further pages need the PIT).
+    """
+    body = build_person_query(name, page_size, search_after, pit_id)
+    # A PIT search names its index through the PIT
+    response = client.search(body=body) if pit_id else client.search(index=index_name, body=body)
+    hits = response['hits']['hits']
+    total = response['hits']['total']['value'] if search_after is None else None
+
+    person_occurrences = []
+    for hit in hits:
+        src = hit.get('_source', {})
+        inner_hits = hit.get('inner_hits', {}).get('people', {}).get('hits', {})
+        inner = inner_hits.get('hits', [])
+        # inner_hits stops at PERSON_INNER_HITS; the total says how many matched in the case
+        matches_in_case = inner_hits.get('total', {}).get('value', len(inner))
+        for inner_hit in inner:
+            p = inner_hit.get('_source', {})
+            person_occurrences.append({
+                "name": p.get("name", "Unknown"),
+                "role": p.get("role", "Unknown"),
+                "identity_type": p.get("identity_type", "Unknown"),
+                "title": src.get("title"),
+                "court_type": src.get("court_type"),
+                "case_type": src.get("case_type"),
+                "source_url": src.get("source_url", "unknown"),
+                "case_id": hit["_id"],
+                "matches_in_case": matches_in_case
+            })
+
+    next_search_after = hits[-1].get("sort") if len(hits) == page_size else None
+    return person_occurrences, total, next_search_after
+
+
+def open_person_pit():
+    return client.create_pit(index=index_name, params={"keep_alive": PERSON_PIT_KEEP_ALIVE})["pit_id"]
+
+
+def close_person_pit(pit_id):
+    try:
+        client.delete_pit(body={"pit_id": [pit_id]})
+    except Exception as e:
+        # An expired PIT is already gone
+        print(f"⚠️  Could not close person search PIT: {e}")
+
+
+def iter_person_matches(name, page_size=100):
+    """Walk every matching case in a PIT with search_after, yielding person occurrences (for bulk jobs)"""
+    pit_id = open_person_pit()
+    try:
+        search_after = None
+        while True:
+            person_occurrences, _, search_after = fetch_person_page(name, page_size, search_after, pit_id)
+            yield from person_occurrences
+            if search_after is None:
+                break
+    finally:
+        close_person_pit(pit_id)
+
+
+# The cursor handed to clients: the PIT and search_after values of the next page, as one opaque token
+def encode_person_cursor(pit_id, search_after):
+    payload = json.dumps({"pit_id": pit_id, "search_after": search_after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_person_cursor(cursor):
+    """(pit_id, search_after) from encode_person_cursor; ValueError if it isn't one"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return state["pit_id"], state["search_after"]
+    except Exception:
+        raise ValueError("Invalid person search cursor")
+
+
+def person_matches_page(name, page_size=10, cursor=None):
+    """
+    One page of server-side person matches with a cursor for the next one.
+    The first page opens a PIT (it expires after PERSON_PIT_KEEP_ALIVE
+    between pages); the last page closes it. Returns {"type": "people_page",
+    "name", "people", "total", "cursor"} - total only on the first page,
+    cursor None on the last page.
+    """
+    if cursor:
+        pit_id, search_after = decode_person_cursor(cursor)
+    else:
+        pit_id, search_after = open_person_pit(), None
+
+    try:
+        person_occurrences, total, next_search_after = fetch_person_page(name, page_size, search_after, pit_id)
+    except Exception:
+        close_person_pit(pit_id)
+        raise
+
+    if next_search_after is None:
+        close_person_pit(pit_id)
+    return {
+        "type": "people_page",
+        "name": name,
+        "people": person_occurrences,
+        "total": total,
+        "cursor": encode_person_cursor(pit_id, next_search_after) if next_search_after else None,
+    }
+
+
+def format_person_page(page):
+    """Chat message for a person_matches_page result"""
+    name, total = page["name"], page["total"]
+    if not page["people"]:
+        return f"No person named '{name}' found in any cases."
+
+    if total is None:
+        message = f"More people matching '{name}':\n\n"
+    else:
+        message = f"I found people matching '{name}' in {total} case{'s' if total != 1 else ''}.\n\n"
+
+    # Group by case to show organized information
+    cases_by_id = {}
+    for person in page["people"]:
+        cases_by_id.setdefault(person['case_id'], []).append(person)
+
+    for i, persons_in_case in enumerate(cases_by_id.values(), 1):
+        message += f"{i}. In the case '{persons_in_case[0]['title']}':\n"
+        for person in persons_in_case:
+            message += f"   • {person['name']} was {person['role']} ({person['identity_type']})\n"
+        hidden = persons_in_case[0]['matches_in_case'] - len(persons_in_case)
+        if hidden > 0:
+            message += f"   …and {hidden} more matching {'person' if hidden == 1 else 'people'} in this case\n"
+        message += f"   Court: {persons_in_case[0]['court_type']} | Case Type: {persons_in_case[0]['case_type']}\n"
+        message += f"   Source URL: {persons_in_case[0]['source_url']}\n\n"
+
+    if total is not None and total > len(cases_by_id):
+        message += f"Showing {len(cases_by_id)} of {total} cases."
+    if page["cursor"]:
+        # The cursor dies with the PIT - keep this reply out of the query caches
+        return PagedMessage(message + f"\nNext page cursor: {page['cursor']}")
+
+    return message
+
+
+def search_person_server(name, page_size=10, cursor=None):
+    """Person search done entirely in OpenSearch; only people and case summary fields are transferred"""
+    try:
+        return format_person_page(person_matches_page(name, page_size, cursor))
+
+    except ValueError as e:
+        return ErrorMessage(f"ERROR: {e}")
+    except exceptions.NotFoundError:
+        return ErrorMessage("ERROR: This search has expired. Please search again.")
+    except exceptions.ConnectionError:
+        return ErrorMessage("ERROR: Connection lost during search.")
     except Exception as e:
-        return f"ERROR: {e}"
+        return ErrorMessage(f"ERROR: {e}")
+
+
+def search_person_server_results(name, page_size=10, cursor=None):
+    """search_person_server for the structured mode and /api/people: the person_matches_page dict"""
+    try:
+        return person_matches_page(name, page_size, cursor)
+    except ValueError as e:
+        return {"type": "error", "message": str(e)}
+    except exceptions.NotFoundError:
+        return {"type": "error", "message": "This search has expired. Please search again."}
+    except exceptions.ConnectionError:
+        return {"type": "error", "message": "Connection lost during search."}
+    except Exception as e:
+        return {"type": "error", "message": str(e)}
 
 
 # ---------- AI-style search_person ----------
@@ -165,9 +446,9 @@ def search_person_ai(name, top_n=5):
         return message
 
     except exceptions.ConnectionError:
-        return "ERROR: Connection lost during search."
+        return ErrorMessage("ERROR: Connection lost during search.")
     except Exception as e:
-        return f"ERROR: {e}"
+        return ErrorMessage(f"ERROR: {e}")
 
 
 # ---------- search_case (for general case searches) ----------
@@ -210,6 +491,14 @@ def search_case(query_text, top_n=5):
             message += f"  Outcome: {src.get('outcome_summary')}\n\n"
         return message
     except exceptions.ConnectionError:
-        return "ERROR: Connection lost during search."
+        return ErrorMessage("ERROR: Connection lost during search.")
     except Exception as e:
-        return f"ERROR: {e}"
\ No newline at end of file
+        return ErrorMessage(f"ERROR: {e}")
+
+
+if __name__ == "__main__":
+    # Export every case a name appears in as JSON Lines: python -m functions.people "J.M. Chimembe" > matches.jsonl
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m functions.people NAME")
+    for occurrence in iter_person_matches(" ".join(sys.argv[1:])):
+        print(json.dumps(occurrence, ensure_ascii=False))
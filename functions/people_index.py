@@ -0,0 +1,315 @@
+# functions/people_index.py
+import sys
+import threading
+from opensearchpy import helpers
+from config import client, index_name
+from functions.index_state import get_index_version
+from functions.name_candidates import NameCandidateIndex
+
+# Only the fields the people index needs - never pull full_text
+CASE_FIELDS = ["title", "court_type", "case_type", "source_url", "people"]
+
+SCAN_BATCH_SIZE = 500
+MGET_BATCH_SIZE = 200
+
+
+def normalize_name(name):
+    """
+    Normalize a name for better matching:
+    - Convert to lowercase
+    - Remove all punctuation (periods, commas, hyphens)
+    - Replace multiple spaces with single space
+    - Strip leading/trailing spaces
+
+    Examples:
+        "J.M. Chimembe" -> "j m chimembe"
+        "Stuart Sikazwe" -> "stuart sikazwe"
+        "B. Mulunda" -> "b mulunda"
+    """
+    if not name:
+        return ""
+
+    # Convert to lowercase
+    normalized = name.lower()
+
+    # Remove common punctuation
+    for char in ['.', ',', '-', "'", '"']:
+        normalized = normalized.replace(char, ' ')
+
+    # Replace multiple spaces with single space and strip
+    normalized = ' '.join(normalized.split())
+
+    return normalized
+
+
+# ---------- Records ----------
+class CaseInfo:
+    """Case metadata shared by every person record from that case"""
+    __slots__ = ("case_id", "title", "court_type", "case_type", "source_url")
+
+    def __init__(self, case_id, title, court_type, case_type, source_url):
+        self.case_id = case_id
+        self.title = title
+        self.court_type = court_type
+        self.case_type = case_type
+        self.source_url = source_url
+
+
+class PersonRecord:
+    """
+    One person in one case. Case fields are read through the shared CaseInfo
+    instead of being copied into every record.
+    """
+    __slots__ = ("name", "normalized_name", "role", "identity_type", "case")
+
+    def __init__(self, name, normalized_name, role, identity_type, case):
+        self.name = name
+        self.normalized_name = normalized_name
+        self.role = role
+        self.identity_type = identity_type
+        self.case = case
+
+    @property
+    def case_id(self):
+        return self.case.case_id
+
+    @property
+    def title(self):
+        return self.case.title
+
+    @property
+    def court_type(self):
+        return self.case.court_type
+
+    @property
+    def case_type(self):
+        return self.case.case_type
+
+    @property
+    def source_url(self):
+        return self.case.source_url
+
+    def as_dict(self):
+        """Plain dict for JSON responses"""
+        return {
+            "name": self.name,
+            "normalized_name": self.normalized_name,
+            "role": self.role,
+            "identity_type": self.identity_type,
+            "title": self.title,
+            "court_type": self.court_type,
+            "case_type": self.case_type,
+            "source_url": self.source_url,
+            "case_id": self.case_id
+        }
+
+
+def _intern(value):
+    """Intern short, highly repetitive strings (roles, court/case types)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _case_stamp(hit):
+    """(_index, _seq_no, _primary_term) - the concrete index matters after an alias swap"""
+    return hit.get("_index"), hit.get("_seq_no"), hit.get("_primary_term")
+
+
+class PeopleIndex:
+    """
+    Resident index of every person in every case.
+    Keyed on normalized name; each posting is a PersonRecord pointing at its CaseInfo.
+    Built once with a scan of the whole index, then refreshed incrementally
+    by comparing each case's _seq_no/_primary_term against what we hold.
+    Scans run outside the lock lookups take; builds are swapped in whole.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()            # postings and candidates, held briefly
+        self._refresh_lock = threading.RLock()    # one build/refresh at a time
+        self.postings = {}      # normalized name -> [PersonRecord]
+        self.case_names = {}    # case id -> normalized names it contributed
+        self.case_seq = {}      # case id -> (_index, _seq_no, _primary_term)
+        self.candidates = NameCandidateIndex()
+        self.version = None
+        self.built = False
+
+    # ---------- Maintenance ----------
+    def _add_case(self, case_id, src, seq):
+        """Add (or replace) all people for one case"""
+        self._remove_case(case_id)
+
+        case = CaseInfo(
+            case_id,
+            src.get("title", "Unknown"),
+            _intern(src.get("court_type", "Unknown")),
+            _intern(src.get("case_type", "Unknown")),
+            src.get("source_url", "unknown")
+        )
+        names = []
+        for p in src.get("people", []) or []:
+            person_name = p.get("name", "")
+            if not person_name:  # Only add if name exists
+                continue
+            # Interned: every record, posting key and candidate entry share one string
+            normalized = sys.intern(normalize_name(person_name))
+            if normalized not in self.postings:
+                self.candidates.add(normalized)
+            self.postings.setdefault(normalized, []).append(PersonRecord(
+                person_name,
+                normalized,
+                _intern(p.get("role", "Unknown")),
+                _intern(p.get("identity_type", "Unknown")),
+                case
+            ))
+            names.append(normalized)
+
+        self.case_names[case_id] = names
+        self.case_seq[case_id] = seq
+
+    def _remove_case(self, case_id):
+        """Drop every posting that points at this case"""
+        names = self.case_names.pop(case_id, None)
+        self.case_seq.pop(case_id, None)
+        if not names:
+            return
+
+        for normalized in set(names):
+            remaining = [p for p in self.postings.get(normalized, []) if p.case.case_id != case_id]
+            if remaining:
+                self.postings[normalized] = remaining
+            else:
+                self.postings.pop(normalized, None)
+                self.candidates.remove(normalized)
+
+    def _scan_cases(self):
+        """A fresh PeopleIndex holding every case (built on the caller's thread, nobody else sees it yet)"""
+        fresh = PeopleIndex()
+        for hit in helpers.scan(
+            client,
+            index=index_name,
+            query={"query": {"match_all": {}}, "_source": CASE_FIELDS, "seq_no_primary_term": True},
+            size=SCAN_BATCH_SIZE,
+            preserve_order=False
+        ):
+            fresh._add_case(hit["_id"], hit.get("_source", {}), _case_stamp(hit))
+        return fresh
+
+    def build(self):
+        """Full build: scan every case once, keeping only people fields, then swap the result in"""
+        with self._refresh_lock:
+            version = get_index_version()
+            fresh = self._scan_cases()
+            with self._lock:
+                self.postings = fresh.postings
+                self.case_names = fresh.case_names
+                self.case_seq = fresh.case_seq
+                self.candidates = fresh.candidates
+                self.version = version
+                self.built = True
+
+    def refresh(self):
+        """
+        Incremental refresh: list (_id, _seq_no) for every case without sources,
+        fetch only new/changed cases and drop cases that disappeared.
+        The scan and the fetches run without the lookup lock; it is only held
+        while the fetched cases are applied.
+        """
+        with self._refresh_lock:
+            version = get_index_version()
+
+            current = {}
+            for hit in helpers.scan(
+                client,
+                index=index_name,
+                query={"query": {"match_all": {}}, "_source": False, "seq_no_primary_term": True},
+                size=SCAN_BATCH_SIZE * 4,
+                preserve_order=False
+            ):
+                current[hit["_id"]] = _case_stamp(hit)
+
+            # case_seq only changes under _refresh_lock, which we hold
+            removed = [c for c in self.case_seq if c not in current]
+            changed = [c for c, seq in current.items() if self.case_seq.get(c) != seq]
+
+            docs = []
+            for start in range(0, len(changed), MGET_BATCH_SIZE):
+                batch = changed[start:start + MGET_BATCH_SIZE]
+                response = client.mget(index=index_name, body={"ids": batch}, _source_includes=CASE_FIELDS)
+                docs.extend(response.get("docs", []))
+
+            with self._lock:
+                for case_id in removed:
+                    self._remove_case(case_id)
+                for doc in docs:
+                    if doc.get("found"):
+                        self._add_case(doc["_id"], doc.get("_source", {}), current[doc["_id"]])
+                    else:
+                        self._remove_case(doc["_id"])
+                self.version = version
+
+    def ensure_fresh(self):
+        """
+        Build on first use, refresh when the index version moved. Only the
+        first build waits; while another thread refreshes, lookups keep
+        answering from the current postings.
+        """
+        if not self._refresh_lock.acquire(blocking=not self.built):
+            return self
+        try:
+            if not self.built:
+                self.build()
+            elif get_index_version() != self.version:
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+        return self
+
+    # ---------- Lookups ----------
+    def lookup(self, normalized_name):
+        """All PersonRecords with exactly this normalized name (shared records, copied list)"""
+        with self._lock:
+            return list(self.postings.get(normalized_name, []))
+
+    def names(self):
+        """Distinct normalized names, in first-seen order"""
+        with self._lock:
+            return list(self.postings.keys())
+
+    def people(self):
+        """Flat list of every PersonRecord"""
+        with self._lock:
+            return [p for records in self.postings.values() for p in records]
+
+    def name_count(self):
+        """Number of distinct normalized names"""
+        with self._lock:
+            return len(self.postings)
+
+    def display_name(self, normalized_name):
+        """Original spelling of the first record with this normalized name"""
+        with self._lock:
+            records = self.postings.get(normalized_name)
+            return records[0].name if records else normalized_name
+
+    def fuzzy_candidates(self, normalized_query):
+        """Names worth fuzzy-scoring against the query (see NameCandidateIndex)"""
+        with self._lock:
+            return self.candidates.fuzzy_candidates(normalized_query)
+
+    def names_with_all_parts(self, parts, limit):
+        """Names containing every part as a substring (at most limit + 1)"""
+        with self._lock:
+            return self.candidates.match_all_parts(parts, limit)
+
+    def names_with_any_part(self, parts, limit):
+        """Names containing any part as a substring (at most limit + 1)"""
+        with self._lock:
+            return self.candidates.match_any_part(parts, limit)
+
+
+people_index = PeopleIndex()
+
+
+def get_people_index():
+    """Return the shared people index, built/refreshed as needed"""
+    return people_index.ensure_fresh()
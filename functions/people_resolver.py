@@ -0,0 +1,111 @@
+# functions/people_resolver.py
+from rapidfuzz import process, fuzz
+from opensearchpy import exceptions
+from functions.people_index import normalize_name, get_people_index
+from functions.query_cache import ErrorMessage
+
+# Same threshold the single-name who-is search uses
+FUZZY_THRESHOLD = 70
+
+
+def resolve_people(names, score_cutoff=FUZZY_THRESHOLD):
+    """
+    Resolve many query names against the people index in one go.
+    Exact matches are looked up directly; everything else is scored in a single
+    rapidfuzz cdist matrix (all cores) against the union of the candidate names.
+
+    Returns one result per query name, in input order:
+        {"query", "normalized_query", "match", "display_name", "score", "occurrences"}
+    `match` is None when nothing scored at least `score_cutoff`.
+    """
+    people_index = get_people_index()
+
+    results = []
+    pending = []  # (result, normalized query) still needing fuzzy scoring
+    for name in names:
+        normalized = normalize_name(name)
+        result = {
+            "query": name,
+            "normalized_query": normalized,
+            "match": None,
+            "display_name": None,
+            "score": 0,
+            "occurrences": []
+        }
+        results.append(result)
+
+        # STEP 1: exact match on the normalized name
+        occurrences = people_index.lookup(normalized) if normalized else []
+        if occurrences:
+            result.update(match=normalized, display_name=occurrences[0].name, score=100, occurrences=occurrences)
+        elif normalized:
+            pending.append((result, normalized))
+
+    if not pending:
+        return results
+
+    # STEP 2: one score matrix for every pending query against all their candidates
+    choices = {}
+    for _, normalized in pending:
+        for candidate in people_index.fuzzy_candidates(normalized):
+            choices.setdefault(candidate, None)
+    choices = list(choices)
+
+    if choices:
+        scores = process.cdist(
+            [normalized for _, normalized in pending],
+            choices,
+            scorer=fuzz.token_sort_ratio,
+            score_cutoff=score_cutoff,
+            workers=-1
+        )
+        best = scores.argmax(axis=1)
+        for row, (result, _) in enumerate(pending):
+            score = scores[row, best[row]]
+            if score >= score_cutoff:
+                match = choices[best[row]]
+                occurrences = people_index.lookup(match)
+                result.update(match=match, display_name=occurrences[0].name, score=float(score), occurrences=occurrences)
+
+    # STEP 3: a single unique name containing every query word still counts
+    for result, normalized in pending:
+        if result["match"] is None:
+            partial = people_index.names_with_all_parts(normalized.split(), limit=1)
+            if len(partial) == 1:
+                occurrences = people_index.lookup(partial[0])
+                result.update(match=partial[0], display_name=occurrences[0].name, score=65, occurrences=occurrences)
+
+    return results
+
+
+def search_people(names):
+    """Answer a multi-name 'who are' query with one short summary per person"""
+    names = [n for n in names if n and n.strip()]
+    if not names:
+        return "Please specify at least one person's name."
+
+    try:
+        results = resolve_people(names)
+    except exceptions.ConnectionError:
+        return ErrorMessage("I'm having trouble connecting to the database right now. Please try again in a moment.")
+    except Exception as e:
+        return ErrorMessage(f"Oops, something went wrong while searching: {str(e)}")
+
+    message = f"Here is what I found for {len(results)} name{'s' if len(results) != 1 else ''}:\n\n"
+    for i, result in enumerate(results, 1):
+        if result["match"] is None:
+            message += f"{i}. {result['query']}: no matching person in our database.\n\n"
+            continue
+
+        occurrences = result["occurrences"]
+        message += f"{i}. {result['display_name']}"
+        if result["score"] < 100:
+            message += f" (you searched for '{result['query']}')"
+        message += f": {len(occurrences)} record{'s' if len(occurrences) != 1 else ''}\n"
+        for person in occurrences[:3]:
+            message += f"   • {person.role} ({person.identity_type}) in '{person.title}' at {person.court_type}\n"
+        if len(occurrences) > 3:
+            message += f"   • ...and {len(occurrences) - 3} more\n"
+        message += "\n"
+
+    return message
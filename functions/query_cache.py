@@ -0,0 +1,142 @@
+# functions/query_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from functions.index_state import get_index_version
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 600))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+    Holds at most `maxsize` entries; counts hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, (False, None) otherwise"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return False, None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# raw user input -> (cleaned_input, response)
+raw_query_cache = TTLCache()
+# cleaned command ("who is chimembe", "search: mining, energy") -> response
+command_cache = TTLCache()
+
+_cached_index_version = None
+_version_lock = threading.Lock()
+
+
+class ErrorMessage(str):
+    """A failed search's user-facing message: shown like any reply, never cached"""
+
+
+class PagedMessage(str):
+    """A reply carrying a short-lived paging cursor: shown like any reply, never cached"""
+
+
+def normalize_query_key(text: str) -> str:
+    """Case- and whitespace-insensitive cache key"""
+    return " ".join(text.lower().split())
+
+
+def is_cacheable(message) -> bool:
+    """Only successful answers are worth caching - search functions flag failures as ErrorMessage"""
+    return bool(message) and not isinstance(message, (ErrorMessage, PagedMessage))
+
+
+def join_message(chunks):
+    """Join streamed chunks into one message, keeping the ErrorMessage/PagedMessage flag if any chunk had it"""
+    chunks = list(chunks)
+    message = "".join(chunks)
+    for flag in (ErrorMessage, PagedMessage):
+        if any(isinstance(chunk, flag) for chunk in chunks):
+            return flag(message)
+    return message
+
+
+def is_cacheable_result(result) -> bool:
+    """is_cacheable for structured results: no errors, no partially failed searches, no paging cursors"""
+    if result["type"] == "error" or result.get("partial") or result.get("cursor"):
+        return False
+    return result["type"] != "message" or is_cacheable(result["text"])
+
+
+def invalidate_query_caches():
+    """Drop every cached response (e.g. after writing to the index)"""
+    raw_query_cache.clear()
+    command_cache.clear()
+
+
+def invalidate_if_index_changed():
+    """Clear both caches when the OpenSearch index has been written to since they were filled"""
+    global _cached_index_version
+    try:
+        version = get_index_version()
+    except Exception:
+        # Can't tell - keep serving what we have until the TTL expires
+        return
+
+    with _version_lock:
+        if version != _cached_index_version:
+            if _cached_index_version is not None:
+                invalidate_query_caches()
+            _cached_index_version = version
+
+
+def query_cache_stats():
+    """Hit/miss counters for both caches"""
+    return {
+        "raw_input": raw_query_cache.stats(),
+        "command": command_cache.stats()
+    }
@@ -2,7 +2,9 @@
 import random
 from rapidfuzz import process
 from opensearchpy import exceptions
-from config import client, index_name
+from config import client, index_name, get_async_client
+from functions.facet_store import facet_store, facets_from_aggregations
+from functions.query_cache import ErrorMessage, join_message
 from collections import defaultdict
 
 # Random AI-style responses for different scenarios
@@ -43,26 +45,77 @@ def separate_comma_values(text):
 
 
 # ---------- Updated search_topics ----------
-def search_topics(topic, top_n=5):
-    """Search OpenSearch for a topic and return relevant information"""
-    search_body = {
-        "query": {
+# Short, curated fields are searched first (boosted); full_text is only a fallback tier
+TOPIC_FIELDS = [
+    "title^4",
+    "keywords^3",
+    "subject^3",
+    "points_simple^2",
+    "case_category^2",
+    "entities",
+    "document_type",
+    "court_type"
+]
+FULL_TEXT_FIELD = "full_text"
+
+# Only what format_case_block renders - never ship whole judgments back
+TOPIC_SOURCE_FIELDS = [
+    "title",
+    "document_type",
+    "court_type",
+    "case_category",
+    "people",
+    "points_simple",
+    "outcome_summary",
+    "case_outcome",
+    "result",
+    "case_status"
+]
+
+
+def build_topics_query(topic, top_n=5, include_full_text=False, with_aggs=True):
+    """
+    OpenSearch request body for a topic search.
+    Tier 1 (default) scores the short fields only; tier 2 also matches full_text
+    and returns highlighted passages from it instead of the text itself.
+    Breakdown aggregations are only requested when the facet store lacks them.
+    """
+    primary = {
+        "multi_match": {
+            "query": topic,
+            "fields": TOPIC_FIELDS,
+            "type": "best_fields"
+        }
+    }
+    highlight_fields = {
+        "points_simple": {"number_of_fragments": 0}
+    }
+
+    if include_full_text:
+        query = {
             "bool": {
                 "should": [
-                    {"match": {"title": topic}},
-                    {"match": {"keywords": topic}},
-                    {"match": {"entities": topic}},
-                    {"match": {"points_simple": topic}},
-                    {"match": {"full_text": topic}},
-                    {"match": {"document_type": topic}},
-                    {"match": {"court_type": topic}},
-                    {"match": {"case_category": topic}},
-                    {"match": {"subject": topic}}
+                    primary,
+                    {"match": {FULL_TEXT_FIELD: topic}}
                 ]
             }
-        },
+        }
+        highlight_fields[FULL_TEXT_FIELD] = {"fragment_size": 150, "number_of_fragments": 2}
+    else:
+        query = primary
+
+    body = {
+        "query": query,
         "size": top_n,
-        "aggs": {
+        "_source": {"includes": TOPIC_SOURCE_FIELDS},
+        "highlight": {
+            "pre_tags": ["**"],
+            "post_tags": ["**"],
+            "fields": highlight_fields
+        }
+    }
+    if with_aggs:
+        body["aggs"] = {
             "document_types": {
                 "terms": {
                     "field": "document_type.keyword",
@@ -76,146 +129,470 @@ def search_topics(topic, top_n=5):
                 }
             }
         }
-    }
+    return body
 
-    try:
-        response = client.search(index=index_name, body=search_body)
-        hits = response['hits']['hits']
-        total_hits = response['hits']['total']['value']
 
-        # Get aggregations
-        doc_type_counts = response.get('aggregations', {}).get('document_types', {}).get('buckets', [])
-        court_type_counts = response.get('aggregations', {}).get('court_types', {}).get('buckets', [])
+def needs_full_text(response, top_n=5):
+    """True when the short fields alone found fewer than top_n cases"""
+    return response['hits']['total']['value'] < top_n
 
-        if not hits:
-            return random.choice(AI_RESPONSES["no_results"])
 
-        if total_hits == 1:
-            intro = random.choice(AI_RESPONSES["single_result"])
-        elif total_hits > 1:
-            intro = random.choice(AI_RESPONSES["multiple_results"])
-        else:
-            intro = random.choice(AI_RESPONSES["found_topics"])
+def resolve_topic_facets(topic, full_text, response, facets):
+    """
+    Breakdowns for the tier that answered: the stored ones looked up before the
+    search (facets), else harvested from this response, which then carried aggs.
+    """
+    if facets is None:
+        facets = facet_store.remember_topic(topic, full_text, response)
+    return facets
 
-        message = f"{intro}\n\n"
-        message += f"**Total Results:** {total_hits} case{'s' if total_hits != 1 else ''} related to '{topic}'\n\n"
 
-        # Add document type statistics
-        if doc_type_counts:
-            message += "**Document Types Breakdown:**\n"
-            for bucket in doc_type_counts:
-                doc_type = bucket['key']
-                count = bucket['doc_count']
-                message += f"  • {doc_type}: {count} case{'s' if count != 1 else ''}\n"
-            message += "\n"
+# ---------- Case records (structured results) and their rendering ----------
+RESULT_LABELS = {
+    "partial_success": "Partial Success",
+    "failure": "Case Failed",
+    "success": "Case Succeeded"
+}
 
-        # Add court type statistics
-        if court_type_counts:
-            message += "**Court Types Breakdown:**\n"
-            for bucket in court_type_counts:
-                court_type = bucket['key']
-                count = bucket['doc_count']
-                message += f"  • {court_type}: {count} case{'s' if count != 1 else ''}\n"
-            message += "\n"
+STATUS_LABELS = {
+    "pending": "Pending",
+    "decided": "Decided",
+    "appealed": "Appealed",
+    "dismissed": "Dismissed"
+}
 
-        display_count = min(top_n, len(hits))
-        for i, hit in enumerate(hits[:display_count], 1):
-            src = hit['_source']
-            doc_id = hit.get('_id', hit.get('document_id', 'N/A'))
-            # Use actual case fields from the document format
-            document_type = src.get('document_type', 'Not specified')
-            court_type = src.get('court_type', 'Not specified')
-            case_category = src.get('case_category', 'Not specified')
-
-            message += f"**Case {i}. {src.get('title', 'Untitled Case')}**\n"
-            message += f"**Document Type:** {document_type}\n"
-            message += f"**Court:** {court_type}\n"
-            message += f"**Category:** {case_category}\n"
-
-            # Add people involved
-            if src.get("people"):
-                message += "**People Involved:**\n"
-                for p in src['people']:
-                    name = p.get('name', 'Unknown')
-                    role = p.get('role', 'Unknown role')
-                    message += f"  • {name} ({role})\n"
-
-            # Add relevant points from points_simple
-            if src.get("points_simple"):
-                message += f"\n**Relevant Case Points:**\n"
-                found_points = 0
-                for pt in src['points_simple']:
-                    # Check if topic appears in this point
-                    if topic.lower() in pt.lower():
-                        message += f"  • {pt}\n"
-                        found_points += 1
-
-                if found_points == 0:
-                    # Show first few points if none specifically mention the topic
-                    message += f"  • First point: {src['points_simple'][0][:150]}...\n"
-                    if len(src['points_simple']) > 1:
-                        message += f"  • Second point: {src['points_simple'][1][:150]}...\n"
-                else:
-                    message += f"\n  *{found_points} point{'s' if found_points != 1 else ''} specifically mention '{topic}'*\n"
-
-            # Add outcome information
-            if src.get("outcome_summary"):
-                message += f"\n**Outcome Summary:** {src['outcome_summary']}\n"
-
-            if src.get("case_outcome"):
-                message += f"**Case Outcome:** {src['case_outcome']}\n"
-
-            if src.get("result"):
-                result = src['result']
-                if result == "partial_success":
-                    message += f"**Result:** Partial Success\n"
-                elif result == "failure":
-                    message += f"**Result:** Case Failed\n"
-                elif result == "success":
-                    message += f"**Result:** Case Succeeded\n"
-                else:
-                    message += f"**Result:** {result}\n"
-
-            # Add case status if available
-            if src.get("case_status"):
-                status = src['case_status']
-                status_map = {
-                    "pending": "Pending",
-                    "decided": "Decided",
-                    "appealed": "Appealed",
-                    "dismissed": "Dismissed"
-                }
-                message += f"**Status:** {status_map.get(status, status)}\n\n\n"
-            message += f'<a href="#" class="see-more-link" data-docid="{doc_id}" style="color:#346969; text-decoration: none;">See all</a><br>'
-            message += "\n\n\n" + "=" * 60 + "\n\n"
 
-        return message
+def case_record(hit, topic):
+    """Plain data for one case hit - what structured responses return and format_case_block renders"""
+    src = hit['_source']
+    highlight = hit.get('highlight', {})
+    points = src.get("points_simple") or []
+
+    # Highlighted matches when available, otherwise points that mention the topic
+    if highlight.get("points_simple"):
+        matching_points = highlight['points_simple']
+    else:
+        matching_points = [pt for pt in points if topic.lower() in pt.lower()]
+
+    return {
+        "id": hit.get('_id', hit.get('document_id')),
+        "title": src.get('title'),
+        "document_type": src.get('document_type'),
+        "court_type": src.get('court_type'),
+        "case_category": src.get('case_category'),
+        "people": [{"name": p.get('name'), "role": p.get('role')} for p in src.get("people") or []],
+        "points": points,
+        "matching_points": matching_points,
+        "passages": [" ".join(fragment.split()) for fragment in highlight.get(FULL_TEXT_FIELD, [])],
+        "outcome_summary": src.get("outcome_summary"),
+        "case_outcome": src.get("case_outcome"),
+        "result": src.get("result"),
+        "case_status": src.get("case_status")
+    }
+
+
+def render_case_block(i, case, topic):
+    """One numbered case in a topic search answer, rendered from a case_record"""
+    parts = [
+        f"**Case {i}. {case['title'] or 'Untitled Case'}**\n",
+        f"**Document Type:** {case['document_type'] or 'Not specified'}\n",
+        f"**Court:** {case['court_type'] or 'Not specified'}\n",
+        f"**Category:** {case['case_category'] or 'Not specified'}\n"
+    ]
+
+    # Add people involved
+    if case["people"]:
+        parts.append("**People Involved:**\n")
+        for p in case["people"]:
+            parts.append(f"  • {p['name'] or 'Unknown'} ({p['role'] or 'Unknown role'})\n")
+
+    # Add relevant points
+    if case["matching_points"]:
+        parts.append("\n**Relevant Case Points:**\n")
+        for pt in case["matching_points"]:
+            parts.append(f"  • {pt}\n")
+        count = len(case["matching_points"])
+        parts.append(f"\n  *{count} point{'s' if count != 1 else ''} specifically mention '{topic}'*\n")
+    elif case["points"]:
+        # Show first few points if none specifically mention the topic
+        parts.append("\n**Relevant Case Points:**\n")
+        parts.append(f"  • First point: {case['points'][0][:150]}...\n")
+        if len(case["points"]) > 1:
+            parts.append(f"  • Second point: {case['points'][1][:150]}...\n")
+
+    # Passages from the judgment itself (full_text tier only)
+    if case["passages"]:
+        parts.append("\n**Matching Passages:**\n")
+        for passage in case["passages"]:
+            parts.append(f"  • ...{passage}...\n")
+
+    # Add outcome information
+    if case["outcome_summary"]:
+        parts.append(f"\n**Outcome Summary:** {case['outcome_summary']}\n")
+
+    if case["case_outcome"]:
+        parts.append(f"**Case Outcome:** {case['case_outcome']}\n")
+
+    if case["result"]:
+        parts.append(f"**Result:** {RESULT_LABELS.get(case['result'], case['result'])}\n")
+
+    # Add case status if available
+    if case["case_status"]:
+        parts.append(f"**Status:** {STATUS_LABELS.get(case['case_status'], case['case_status'])}\n\n\n")
+
+    parts.append(f'<a href="#" class="see-more-link" data-docid="{case["id"] or "N/A"}" style="color:#346969; text-decoration: none;">See all</a><br>')
+    parts.append("\n\n\n" + "=" * 60 + "\n\n")
+    return "".join(parts)
+
+
+def format_case_block(i, hit, topic):
+    """One numbered case in a topic search answer"""
+    return render_case_block(i, case_record(hit, topic), topic)
+
+
+def format_topics_header(topic, response, facets=None):
+    """Intro, total and document/court type breakdowns for a topic search response"""
+    total_hits = response['hits']['total']['value']
+
+    # Breakdowns from the facet store, else from the response's own aggregations
+    if facets is not None:
+        doc_type_counts = facets.get('document_types', [])
+        court_type_counts = facets.get('court_types', [])
+    else:
+        doc_type_counts = response.get('aggregations', {}).get('document_types', {}).get('buckets', [])
+        court_type_counts = response.get('aggregations', {}).get('court_types', {}).get('buckets', [])
 
-    except exceptions.ConnectionError:
-        return random.choice([
+    if total_hits == 1:
+        intro = random.choice(AI_RESPONSES["single_result"])
+    elif total_hits > 1:
+        intro = random.choice(AI_RESPONSES["multiple_results"])
+    else:
+        intro = random.choice(AI_RESPONSES["found_topics"])
+
+    message = f"{intro}\n\n"
+    message += f"**Total Results:** {total_hits} case{'s' if total_hits != 1 else ''} related to '{topic}'\n\n"
+
+    # Add document type statistics
+    if doc_type_counts:
+        message += "**Document Types Breakdown:**\n"
+        for bucket in doc_type_counts:
+            doc_type = bucket['key']
+            count = bucket['doc_count']
+            message += f"  • {doc_type}: {count} case{'s' if count != 1 else ''}\n"
+        message += "\n"
+
+    # Add court type statistics
+    if court_type_counts:
+        message += "**Court Types Breakdown:**\n"
+        for bucket in court_type_counts:
+            court_type = bucket['key']
+            count = bucket['doc_count']
+            message += f"  • {court_type}: {count} case{'s' if count != 1 else ''}\n"
+        message += "\n"
+
+    return message
+
+
+def iter_topics_response(topic, response, top_n=5, facets=None):
+    """Yield the chat message piece by piece: intro and breakdowns, then one case block at a time"""
+    hits = response['hits']['hits']
+
+    if not hits:
+        yield random.choice(AI_RESPONSES["no_results"])
+        return
+
+    yield format_topics_header(topic, response, facets)
+
+    display_count = min(top_n, len(hits))
+    for i, hit in enumerate(hits[:display_count], 1):
+        yield format_case_block(i, hit, topic)
+
+
+def format_topics_response(topic, response, top_n=5, facets=None):
+    """Turn a topic search response into the chat message"""
+    return "".join(iter_topics_response(topic, response, top_n, facets))
+
+
+# ---------- Multi-topic search (one _msearch round trip) ----------
+def build_multi_topics_msearch(topic, topics, top_n=5, include_full_text=False, with_aggs=True):
+    """
+    _msearch body: the combined query (with breakdown aggregations unless
+    the facet store has them) first, then one sub-query per topic (hits only).
+    """
+    body = [{"index": index_name}, build_topics_query(topic, top_n, include_full_text, with_aggs)]
+    for single_topic in topics:
+        sub_query = build_topics_query(single_topic, top_n, include_full_text)
+        sub_query.pop("aggs", None)
+        body += [{"index": index_name}, sub_query]
+    return body
+
+
+def iter_multi_topics_response(topic, topics, response, top_n=5, facets=None):
+    """
+    Merge the combined and per-topic results: one section per topic,
+    each case shown once (deduplicated by _id), then any remaining combined matches.
+    Yields the header, then each section/case block as it is rendered.
+    """
+    responses = response.get('responses', [])
+    combined = responses[0] if responses else {}
+
+    combined_hits = combined.get('hits', {}).get('hits', [])
+    if not combined_hits and not any(r.get('hits', {}).get('hits') for r in responses[1:]):
+        yield random.choice(AI_RESPONSES["no_results"])
+        return
+
+    yield format_topics_header(topic, combined, facets)
+
+    shown = set()
+    case_number = 0
+    for single_topic, topic_response in zip(topics, responses[1:]):
+        if "error" in topic_response:
+            # Flagged so the partial answer isn't cached
+            yield ErrorMessage(f"### {single_topic.title()}\n\n  *This topic could not be searched right now.*\n\n")
+            continue
+
+        topic_hits = topic_response.get('hits', {}).get('hits', [])
+        topic_total = topic_response.get('hits', {}).get('total', {}).get('value', 0)
+        yield f"### {single_topic.title()} — {topic_total} case{'s' if topic_total != 1 else ''}\n\n"
+
+        if not topic_hits:
+            yield f"  *No cases found for '{single_topic}'.*\n\n"
+            continue
+
+        for hit in topic_hits[:top_n]:
+            if hit['_id'] in shown:
+                yield f"  • Also relevant: {hit['_source'].get('title', 'Untitled Case')} (see above)\n\n"
+                continue
+            shown.add(hit['_id'])
+            case_number += 1
+            yield format_case_block(case_number, hit, single_topic)
+
+    remaining = [hit for hit in combined_hits[:top_n] if hit['_id'] not in shown]
+    if remaining:
+        yield "### Other Matches\n\n"
+        for hit in remaining:
+            shown.add(hit['_id'])
+            case_number += 1
+            yield format_case_block(case_number, hit, topic)
+
+
+def format_multi_topics_response(topic, topics, response, top_n=5, facets=None):
+    """Chat message for a multi-topic _msearch response"""
+    return "".join(iter_multi_topics_response(topic, topics, response, top_n, facets))
+
+
+def topics_error_message(e):
+    """User-facing message for a failed topic search"""
+    if isinstance(e, exceptions.ConnectionError):
+        return ErrorMessage(random.choice([
             "I'm having trouble connecting to the legal database at the moment.",
             "There seems to be a connection issue with the case records system.",
             "I can't access the legal database due to connectivity problems."
-        ])
+        ]))
+    return ErrorMessage(f"{random.choice([
+        'An unexpected error occurred while searching the legal database.',
+        'I encountered an issue while processing your legal research request.',
+        'There was a problem retrieving the case information you requested.'
+    ])} Error details: {str(e)}")
+
+
+def check_msearch_response(response):
+    """The combined query carries the totals and breakdowns - fail the search if it failed"""
+    combined = response['responses'][0]
+    if "error" in combined:
+        raise Exception(f"Combined topic search failed: {combined['error']}")
+    return combined
+
+
+def fetch_topics(topic, topics, top_n=5):
+    """
+    Run the topic search. Returns (response, facets); the response is an
+    _msearch response when there is more than one topic. full_text is only
+    searched when the short fields return fewer than top_n cases.
+    """
+    if len(topics) > 1:
+        full_text = False
+        facets = facet_store.topic_facets(topic)
+        response = client.msearch(body=build_multi_topics_msearch(
+            topic, topics, top_n, with_aggs=facets is None
+        ))
+        if needs_full_text(check_msearch_response(response), top_n):
+            full_text = True
+            facets = facet_store.topic_facets(topic, True)
+            response = client.msearch(body=build_multi_topics_msearch(
+                topic, topics, top_n, include_full_text=True, with_aggs=facets is None
+            ))
+        return response, resolve_topic_facets(topic, full_text, check_msearch_response(response), facets)
+
+    full_text = False
+    facets = facet_store.topic_facets(topic)
+    response = client.search(index=index_name, body=build_topics_query(
+        topic, top_n, with_aggs=facets is None
+    ))
+    if needs_full_text(response, top_n):
+        full_text = True
+        facets = facet_store.topic_facets(topic, True)
+        response = client.search(index=index_name, body=build_topics_query(
+            topic, top_n, include_full_text=True, with_aggs=facets is None
+        ))
+    return response, resolve_topic_facets(topic, full_text, response, facets)
+
+
+async def fetch_topics_async(topic, topics, top_n=5):
+    """fetch_topics using the AsyncOpenSearch client"""
+    async_client = get_async_client()
+    if len(topics) > 1:
+        full_text = False
+        facets = facet_store.topic_facets(topic)
+        response = await async_client.msearch(body=build_multi_topics_msearch(
+            topic, topics, top_n, with_aggs=facets is None
+        ))
+        if needs_full_text(check_msearch_response(response), top_n):
+            full_text = True
+            facets = facet_store.topic_facets(topic, True)
+            response = await async_client.msearch(body=build_multi_topics_msearch(
+                topic, topics, top_n, include_full_text=True, with_aggs=facets is None
+            ))
+        return response, resolve_topic_facets(topic, full_text, check_msearch_response(response), facets)
+
+    full_text = False
+    facets = facet_store.topic_facets(topic)
+    response = await async_client.search(index=index_name, body=build_topics_query(
+        topic, top_n, with_aggs=facets is None
+    ))
+    if needs_full_text(response, top_n):
+        full_text = True
+        facets = facet_store.topic_facets(topic, True)
+        response = await async_client.search(index=index_name, body=build_topics_query(
+            topic, top_n, include_full_text=True, with_aggs=facets is None
+        ))
+    return response, resolve_topic_facets(topic, full_text, response, facets)
+
+
+def iter_topics_message(topic, topics, response, top_n=5, facets=None):
+    """Single- or multi-topic message generator for a fetch_topics result"""
+    if len(topics) > 1:
+        return iter_multi_topics_response(topic, topics, response, top_n, facets)
+    return iter_topics_response(topic, response, top_n, facets)
+
+
+def iter_search_topics(topic, top_n=5):
+    """
+    search_topics as a generator (streaming mode): the search runs first,
+    then the intro/breakdowns and each case block are yielded as they render.
+    Comma-separated topics ("mining, energy") are searched separately and
+    together in a single _msearch request.
+    """
+    topics = separate_comma_values(topic)
+    try:
+        response, facets = fetch_topics(topic, topics, top_n)
+    except Exception as e:
+        yield topics_error_message(e)
+        return
+    yield from iter_topics_message(topic, topics, response, top_n, facets)
+
+
+async def iter_search_topics_async(topic, top_n=5):
+    """iter_search_topics for the async serving mode"""
+    topics = separate_comma_values(topic)
+    try:
+        response, facets = await fetch_topics_async(topic, topics, top_n)
+    except Exception as e:
+        yield topics_error_message(e)
+        return
+    for chunk in iter_topics_message(topic, topics, response, top_n, facets):
+        yield chunk
+
+
+# ---------- Structured results (format: json) ----------
+def topics_result(topic, topics, response, top_n=5, facets=None):
+    """
+    Typed result for a fetch_topics response:
+    {"type": "topics", "query", "total", "facets", "partial", "sections": [{"topic", "total", "case_ids"}], "cases": [...]}.
+    Each case appears once in "cases"; sections refer to them by id. "partial"
+    is set when a topic's search failed (its section carries an "error").
+    """
+    cases = {}
+
+    def collect(hits, for_topic):
+        ids = []
+        for hit in hits[:top_n]:
+            case = case_record(hit, for_topic)
+            cases.setdefault(case["id"], case)
+            ids.append(case["id"])
+        return ids
+
+    sections = []
+    if len(topics) > 1:
+        responses = response.get('responses', [])
+        combined = responses[0] if responses else {}
+        for single_topic, topic_response in zip(topics, responses[1:]):
+            if "error" in topic_response:
+                sections.append({"topic": single_topic, "total": None, "case_ids": [], "error": "This topic could not be searched right now."})
+                continue
+            sections.append({
+                "topic": single_topic,
+                "total": topic_response['hits']['total']['value'],
+                "case_ids": collect(topic_response['hits']['hits'], single_topic)
+            })
+        others = [hit for hit in combined.get('hits', {}).get('hits', [])[:top_n] if hit['_id'] not in cases]
+        if others:
+            sections.append({"topic": None, "total": None, "case_ids": collect(others, topic)})
+    else:
+        combined = response
+        sections.append({
+            "topic": topic,
+            "total": combined['hits']['total']['value'],
+            "case_ids": collect(combined['hits']['hits'], topic)
+        })
+
+    if facets is None:
+        facets = facets_from_aggregations(combined.get('aggregations'))
+
+    return {
+        "type": "topics",
+        "query": topic,
+        "total": combined.get('hits', {}).get('total', {}).get('value', 0),
+        "facets": facets,
+        "partial": any("error" in section for section in sections),
+        "sections": sections,
+        "cases": list(cases.values())
+    }
+
+
+def search_topics_results(topic, top_n=5):
+    """search_topics returning a topics_result dict instead of a message"""
+    topics = separate_comma_values(topic)
+    try:
+        response, facets = fetch_topics(topic, topics, top_n)
     except Exception as e:
-        return f"{random.choice([
-            'An unexpected error occurred while searching the legal database.',
-            'I encountered an issue while processing your legal research request.',
-            'There was a problem retrieving the case information you requested.'
-        ])} Error details: {str(e)}"
+        return {"type": "error", "message": topics_error_message(e)}
+    return topics_result(topic, topics, response, top_n, facets)
+
+
+def search_topics(topic, top_n=5):
+    """Search OpenSearch for a topic and return relevant information"""
+    return join_message(iter_search_topics(topic, top_n))
+
+
+async def search_topics_async(topic, top_n=5):
+    """search_topics for the async serving mode (non-blocking OpenSearch call)"""
+    return join_message([chunk async for chunk in iter_search_topics_async(topic, top_n)])
 
 
 # ---------- Specialized search functions ----------
 def search_by_document_type(doc_type, top_n=5):
-    """Search for cases by document type"""
+    """Search for cases by document type (exact-keyword filter and stored breakdowns when the facet store knows the type)"""
+    facets = facet_store.value_facets("document_types", doc_type)
+    # A known value filters on the exact keyword its breakdown counts; anything else is matched and aggregated here
+    query = {"term": {"document_type.keyword": facets["key"]}} if facets is not None else {"match": {"document_type": doc_type}}
     search_body = {
-        "query": {
-            "match": {
-                "document_type": doc_type
-            }
-        },
+        "query": query,
         "size": top_n,
-        "aggs": {
+        "_source": {"includes": ["title", "court_type", "case_category", "outcome_summary"]}
+    }
+    if facets is None:
+        search_body["aggs"] = {
             "court_types_for_doc": {
                 "terms": {
                     "field": "court_type.keyword",
@@ -229,14 +606,16 @@ def search_by_document_type(doc_type, top_n=5):
                 }
             }
         }
-    }
 
     try:
         response = client.search(index=index_name, body=search_body)
         hits = response['hits']['hits']
         total_hits = response['hits']['total']['value']
 
-        court_aggregations = response.get('aggregations', {}).get('court_types_for_doc', {}).get('buckets', [])
+        if facets is not None:
+            court_aggregations = facets.get('court_types', [])
+        else:
+            court_aggregations = response.get('aggregations', {}).get('court_types_for_doc', {}).get('buckets', [])
 
         if not hits:
             return f"No cases found with document type: '{doc_type}'"
@@ -272,19 +651,21 @@ def search_by_document_type(doc_type, top_n=5):
         return message
 
     except Exception as e:
-        return f"Error searching by document type: {str(e)}"
+        return ErrorMessage(f"Error searching by document type: {str(e)}")
 
 
 def search_by_court_type(court_type, top_n=5):
-    """Search for cases by court type"""
+    """Search for cases by court type (exact-keyword filter and stored breakdowns when the facet store knows the court)"""
+    facets = facet_store.value_facets("court_types", court_type)
+    # A known value filters on the exact keyword its breakdown counts; anything else is matched and aggregated here
+    query = {"term": {"court_type.keyword": facets["key"]}} if facets is not None else {"match": {"court_type": court_type}}
     search_body = {
-        "query": {
-            "match": {
-                "court_type": court_type
-            }
-        },
+        "query": query,
         "size": top_n,
-        "aggs": {
+        "_source": {"includes": ["title", "document_type", "case_category", "outcome_summary"]}
+    }
+    if facets is None:
+        search_body["aggs"] = {
             "doc_types_for_court": {
                 "terms": {
                     "field": "document_type.keyword",
@@ -298,14 +679,16 @@ def search_by_court_type(court_type, top_n=5):
                 }
             }
         }
-    }
 
     try:
         response = client.search(index=index_name, body=search_body)
         hits = response['hits']['hits']
         total_hits = response['hits']['total']['value']
 
-        doc_aggregations = response.get('aggregations', {}).get('doc_types_for_court', {}).get('buckets', [])
+        if facets is not None:
+            doc_aggregations = facets.get('document_types', [])
+        else:
+            doc_aggregations = response.get('aggregations', {}).get('doc_types_for_court', {}).get('buckets', [])
 
         if not hits:
             return f"No cases found in court: '{court_type}'"
@@ -341,7 +724,7 @@ def search_by_court_type(court_type, top_n=5):
         return message
 
     except Exception as e:
-        return f"Error searching by court type: {str(e)}"
+        return ErrorMessage(f"Error searching by court type: {str(e)}")
 
 
 # ---------- Enhanced handler ----------
@@ -0,0 +1,277 @@
+# index_admin/aliases.py
+"""
+Blue/green rebuilds behind the index_name alias.
+
+    python -m index_admin.aliases status
+    python -m index_admin.aliases rebuild data/             # new index from source files
+    python -m index_admin.aliases rebuild --reindex         # new index copied from the live one (e.g. new mapping)
+    python -m index_admin.aliases rebuild data/ --allow-yellow   # single-node cluster: replicas never allocate
+    python -m index_admin.aliases swap may_sme_legal_cases_v20261017120000
+    python -m index_admin.aliases cleanup --keep 1
+
+The query modules read through config.index_name. A rebuild loads a new
+versioned index while the current one keeps serving, warms it, then moves
+the alias in one atomic _aliases call, so searches never see a partial index.
+
+First migration, when index_name is still a concrete index: rebuild --reindex
+--replace-index copies it into a versioned index and replaces it with the alias.
+"""
+import argparse
+import sys
+import time
+
+from opensearchpy import exceptions
+from config import get_client, index_name
+from functions.facet_store import build_global_facets_query
+from functions.index_state import mark_index_changed
+from functions.people import build_person_query, name_edge_mapped
+from functions.topics_function import build_topics_query
+from index_admin.mapping import index_body
+from index_admin.tasks import wait_for_task
+from ingest_docs.ingest_docs import bulk_load_settings, ingest
+
+# Created lazily - no connection round trip until a command runs
+client = get_client()
+
+REINDEX_BATCH_SIZE = 1000
+HEALTH_TIMEOUT = "120s"
+# Client-side timeout for the health call - without one, the client consumes
+# the "timeout" param itself and never sends it to the cluster
+HEALTH_REQUEST_TIMEOUT = 130
+
+# Representative searches run against a new index before it takes traffic
+WARM_TOPICS = ["contract", "land dispute", "employment", "criminal appeal", "negligence"]
+WARM_NAMES = ["Banda", "Mwale"]
+
+
+def versioned_name(alias=index_name):
+    """may_sme_legal_cases -> may_sme_legal_cases_v20261017120000"""
+    return f"{alias}_v{time.strftime('%Y%m%d%H%M%S')}"
+
+
+# ---------- Inspection ----------
+def alias_targets(alias=index_name):
+    """Concrete indices the alias points at ([] when it isn't an alias)"""
+    try:
+        return sorted(client.indices.get_alias(name=alias))
+    except exceptions.NotFoundError:
+        return []
+
+
+def is_concrete_index(name=index_name):
+    return bool(client.indices.exists(index=name)) and not client.indices.exists_alias(name=name)
+
+
+def versioned_indices(alias=index_name):
+    """Every <alias>_v* index, oldest first"""
+    try:
+        return sorted(client.indices.get_settings(index=f"{alias}_v*", name="index.creation_date"))
+    except exceptions.NotFoundError:
+        return []
+
+
+def status(alias=index_name):
+    """{"alias", "targets", "concrete_index", "indices": [{"index", "docs.count", ...}]}"""
+    try:
+        rows = client.cat.indices(index=f"{alias}*", format="json", h="index,health,docs.count,store.size")
+    except exceptions.NotFoundError:
+        rows = []
+    return {
+        "alias": alias,
+        "targets": alias_targets(alias),
+        "concrete_index": is_concrete_index(alias),
+        "indices": sorted(rows, key=lambda r: r["index"])
+    }
+
+
+# ---------- Build / warm ----------
+def create_index(alias=index_name, body=None):
+    """Create a new, empty versioned index - with the managed mapping unless body is given"""
+    name = versioned_name(alias)
+    client.indices.create(index=name, body=body or index_body())
+    print(f"🆕 Created index '{name}'")
+    return name
+
+
+def reindex_into(new_index, source=index_name):
+    """Server-side copy of every document from source into new_index, with load settings"""
+    with bulk_load_settings(index=new_index):
+        response = client.reindex(
+            body={
+                "source": {"index": source, "size": REINDEX_BATCH_SIZE},
+                "dest": {"index": new_index}
+            },
+            params={"wait_for_completion": "false", "slices": "auto"}
+        )
+        result = wait_for_task(response["task"], label=f"Reindex {source} -> {new_index}")
+
+    totals = result.get("response", {})
+    failures = totals.get("failures", [])
+    if result.get("error") or failures:
+        raise RuntimeError(f"Reindex failed: {result.get('error') or failures[:5]}")
+    return totals
+
+
+def wait_for_status(index, status="green"):
+    """Block until the index reaches status; RuntimeError if it hasn't within HEALTH_TIMEOUT"""
+    health = client.cluster.health(index=index, params={
+        "wait_for_status": status,
+        "timeout": HEALTH_TIMEOUT,
+        "request_timeout": HEALTH_REQUEST_TIMEOUT,
+        "ignore": 408  # timed out - reported in the body
+    })
+    if health.get("timed_out"):
+        raise RuntimeError(f"'{index}' is still {health.get('status')} after {HEALTH_TIMEOUT}, not {status}")
+    return health
+
+
+def warm_index(index, status="green"):
+    """
+    Wait for the index to be fully allocated (replicas included - the load
+    settings are restored by now), then run the facet aggregation and a few
+    representative topic/person searches so caches and field data are loaded
+    before it takes traffic. Returns {"documents", "queries", "ms"}.
+    """
+    wait_for_status(index, status)
+    client.indices.refresh(index=index)
+
+    started = time.monotonic()
+    queries = [build_global_facets_query()]
+    queries += [build_topics_query(topic) for topic in WARM_TOPICS]
+    use_edge = name_edge_mapped(index)
+    queries += [build_person_query(name, use_edge=use_edge) for name in WARM_NAMES]
+    for body in queries:
+        client.search(index=index, body=body, params={"request_cache": "true"})
+
+    documents = client.count(index=index)["count"]
+    ms = round((time.monotonic() - started) * 1000)
+    print(f"🔥 Warmed '{index}': {documents} documents, {len(queries)} queries in {ms}ms")
+    return {"documents": documents, "queries": len(queries), "ms": ms}
+
+
+# ---------- Swap / cleanup ----------
+def swap_alias(new_index, alias=index_name, replace_index=False):
+    """
+    Point alias at new_index in one atomic _aliases call; returns the indices
+    it pointed at before. replace_index=True also deletes a concrete index
+    named like the alias (first migration) in the same call.
+    """
+    old = alias_targets(alias)
+    actions = [{"remove": {"index": index, "alias": alias}} for index in old if index != new_index]
+
+    if not old and client.indices.exists(index=alias):
+        if not replace_index:
+            raise RuntimeError(f"'{alias}' is a concrete index - pass replace_index=True to replace it with the alias")
+        actions.append({"remove_index": {"index": alias}})
+
+    actions.append({"add": {"index": new_index, "alias": alias}})
+    client.indices.update_aliases(body={"actions": actions})
+    mark_index_changed()
+    print(f"🔀 '{alias}' -> '{new_index}'" + (f" (was {', '.join(old)})" if old else ""))
+    return [index for index in old if index != new_index]
+
+
+def drop_indices(indices):
+    for index in indices:
+        client.indices.delete(index=index)
+        print(f"🗑️  Dropped index '{index}'")
+
+
+def cleanup(alias=index_name, keep=0):
+    """Drop versioned indices the alias doesn't point at, keeping the newest `keep` for rollback"""
+    live = set(alias_targets(alias))
+    idle = [index for index in versioned_indices(alias) if index not in live]
+    drop_indices(idle[:max(0, len(idle) - keep)])
+
+
+def rebuild(paths=None, alias=index_name, reindex=False, keep_old=False, replace_index=False,
+            allow_failures=False, allow_yellow=False, **ingest_options):
+    """
+    Build a new versioned index with the managed mapping (from source files,
+    or reindexed from the live alias), warm it once green and swap the alias
+    over. The new index is dropped and the alias left untouched if the load
+    reports failures. allow_yellow=True swaps without replicas allocated.
+    """
+    if is_concrete_index(alias) and not replace_index:
+        raise RuntimeError(f"'{alias}' is a concrete index - pass replace_index=True to replace it with the alias")
+
+    new_index = create_index(alias, body=index_body())
+    try:
+        if reindex:
+            reindex_into(new_index, source=alias)
+        else:
+            report = ingest(paths, index=new_index, tune_settings=True, **ingest_options)
+            summary = report.as_dict()
+            print(f"📦 Loaded {summary['indexed']} documents ({summary['failed']} failed) "
+                  f"at {summary['docs_per_sec']} docs/sec")
+            if (report.failed or report.invalid) and not allow_failures:
+                raise RuntimeError(f"{report.failed} failed / {report.invalid} invalid documents")
+        warm_index(new_index, status="yellow" if allow_yellow else "green")
+        old = swap_alias(new_index, alias, replace_index=replace_index)
+    except BaseException as e:
+        print(f"❌ Rebuild aborted, '{alias}' unchanged: {e}")
+        drop_indices([new_index])
+        raise
+
+    if not keep_old:
+        drop_indices(old)
+    return new_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Blue/green index management for '{index_name}'")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="show the alias and its versioned indices")
+
+    rebuild_parser = commands.add_parser("rebuild", help="build a new index, warm it and swap the alias")
+    rebuild_parser.add_argument("paths", nargs="*", help="source files/directories (see ingest_docs)")
+    rebuild_parser.add_argument("--reindex", action="store_true", help="copy the live index instead of loading files")
+    rebuild_parser.add_argument("--workers", type=int, default=4, help="parallel bulk requests when loading files")
+    rebuild_parser.add_argument("--keep-old", action="store_true", help="keep the previous index for rollback")
+    rebuild_parser.add_argument("--replace-index", action="store_true", help="replace a concrete index named like the alias")
+    rebuild_parser.add_argument("--allow-failures", action="store_true", help="swap even if some documents failed")
+    rebuild_parser.add_argument("--allow-yellow", action="store_true",
+                                help="swap before replicas are allocated (single-node clusters)")
+
+    swap_parser = commands.add_parser("swap", help="point the alias at an existing index (e.g. rollback)")
+    swap_parser.add_argument("index")
+    swap_parser.add_argument("--replace-index", action="store_true", help="replace a concrete index named like the alias")
+
+    cleanup_parser = commands.add_parser("cleanup", help="drop versioned indices the alias doesn't use")
+    cleanup_parser.add_argument("--keep", type=int, default=0, help="newest unused indices to keep")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        info = status()
+        print(f"Alias '{info['alias']}' -> {', '.join(info['targets']) or '(none)'}"
+              + (" [concrete index, not an alias]" if info["concrete_index"] else ""))
+        for row in info["indices"]:
+            marker = "*" if row["index"] in info["targets"] else " "
+            print(f" {marker} {row['index']:<50} {row['health']:<7} {row['docs.count']:>10} docs  {row['store.size']}")
+
+    elif args.command == "rebuild":
+        if not args.paths and not args.reindex:
+            parser.error("rebuild needs source paths or --reindex")
+        try:
+            new_index = rebuild(
+                args.paths, reindex=args.reindex, keep_old=args.keep_old,
+                replace_index=args.replace_index, allow_failures=args.allow_failures,
+                allow_yellow=args.allow_yellow,
+                **({} if args.reindex else {"workers": max(1, args.workers)})
+            )
+        except Exception as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ '{index_name}' now serves '{new_index}'")
+
+    elif args.command == "swap":
+        swap_alias(args.index, replace_index=args.replace_index)
+
+    elif args.command == "cleanup":
+        cleanup(keep=args.keep)
+
+
+if __name__ == "__main__":
+    main()
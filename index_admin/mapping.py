@@ -0,0 +1,218 @@
+# index_admin/mapping.py
+"""
+Managed mapping and analyzers for the case index.
+
+    python -m index_admin.mapping put       # install/update the index template
+    python -m index_admin.mapping show      # print the index body
+    python -m index_admin.mapping check     # compare the live index with the managed mapping
+
+Indices created by ingest_docs and index_admin.aliases use this body
+directly; the template covers anything else created under the same names.
+clear_data recreates an index from the live definition, so it keeps whatever
+mapping that index had. A mapping change reaches existing data through a
+blue/green rebuild: python -m index_admin.aliases rebuild --reindex
+(the person query only uses people.name.edge once the live index has it).
+"""
+import argparse
+import json
+
+from opensearchpy import exceptions
+from config import get_client, index_name
+
+# Created lazily - no connection round trip until a command runs
+client = get_client()
+
+TEMPLATE_NAME = f"{index_name}_template"
+TEMPLATE_PRIORITY = 100
+
+# _source is kept whole: every stored field is rendered by fetch_file/topics,
+# read back by the people index or sync (content_hash), or needed to _reindex
+# into the next blue/green index. Fields listed here are unrecoverable by --reindex.
+SOURCE_EXCLUDES = []
+
+ANALYSIS = {
+    "char_filter": {
+        # "J.M. Chimembe" / "J. M. Chimembe" / "J.M Chimembe" -> "J M Chimembe"
+        "initial_dots": {"type": "pattern_replace", "pattern": "\\.", "replacement": " "}
+    },
+    "filter": {
+        "name_edge_ngram": {"type": "edge_ngram", "min_gram": 1, "max_gram": 15}
+    },
+    "normalizer": {
+        "folded": {"type": "custom", "filter": ["lowercase", "asciifolding"]}
+    },
+    "analyzer": {
+        "person_name": {
+            "type": "custom",
+            "char_filter": ["initial_dots"],
+            "tokenizer": "standard",
+            "filter": ["lowercase", "asciifolding"]
+        },
+        # Index-time only: every prefix of every name part, so partial names
+        # match with a plain term lookup instead of a phrase_prefix expansion
+        "person_name_edge": {
+            "type": "custom",
+            "char_filter": ["initial_dots"],
+            "tokenizer": "standard",
+            "filter": ["lowercase", "asciifolding", "name_edge_ngram"]
+        },
+        "folded_text": {
+            "type": "custom",
+            "tokenizer": "standard",
+            "filter": ["lowercase", "asciifolding"]
+        }
+    }
+}
+
+# Text that is searched and shown (title, keywords...)
+SEARCH_TEXT = {"type": "text", "analyzer": "folded_text"}
+# Short values that are both matched as text and aggregated/filtered exactly:
+# no frequencies or length norms needed for one- or two-word values
+FACET_TEXT = {
+    "type": "text",
+    "analyzer": "folded_text",
+    "index_options": "docs",
+    "norms": False,
+    "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}
+}
+# Returned in results but never queried: stored in _source only
+DISPLAY_TEXT = {"type": "text", "index": False}
+DISPLAY_KEYWORD = {"type": "keyword", "index": False, "doc_values": False}
+DISPLAY_BOOLEAN = {"type": "boolean", "index": False, "doc_values": False}
+
+MAPPINGS = {
+    "dynamic_templates": [
+        # Unknown string fields get one exact keyword, not text + .keyword
+        {"strings_as_keywords": {"match_mapping_type": "string", "mapping": {"type": "keyword", "ignore_above": 256}}}
+    ],
+    "properties": {
+        "title": SEARCH_TEXT,
+        "keywords": SEARCH_TEXT,
+        "subject": SEARCH_TEXT,
+        "entities": SEARCH_TEXT,
+        # Highlighted on every topic search - offsets skip re-analysis
+        "points_simple": {**SEARCH_TEXT, "index_options": "offsets"},
+        # Fallback match tier and highlight only, never phrase-queried: no positions
+        "full_text": {**SEARCH_TEXT, "index_options": "freqs"},
+
+        "document_type": FACET_TEXT,
+        "court_type": FACET_TEXT,
+        "case_category": FACET_TEXT,
+
+        "people": {
+            "type": "nested",
+            "properties": {
+                "name": {
+                    "type": "text",
+                    "analyzer": "person_name",
+                    "fields": {
+                        "edge": {"type": "text", "analyzer": "person_name_edge", "search_analyzer": "person_name"},
+                        "keyword": {"type": "keyword", "normalizer": "folded", "ignore_above": 256}
+                    }
+                },
+                "role": {"type": "keyword"},
+                "identity_type": {"type": "keyword"}
+            }
+        },
+
+        "date": {"type": "date", "format": "strict_date_optional_time||yyyy-MM-dd||epoch_millis", "ignore_malformed": True},
+
+        "case_type": DISPLAY_KEYWORD,
+        "case_status": DISPLAY_KEYWORD,
+        "result": DISPLAY_KEYWORD,
+        "source_url": DISPLAY_KEYWORD,
+        "content_hash": DISPLAY_KEYWORD,
+        "plaintiff_wins": DISPLAY_BOOLEAN,
+        "defendant_wins": DISPLAY_BOOLEAN,
+        "case_outcome": DISPLAY_TEXT,
+        "outcome_reason": DISPLAY_TEXT,
+        "outcome_summary": DISPLAY_TEXT,
+        "evidence_by_plaintiff": DISPLAY_TEXT,
+        "evidence_by_defendant": DISPLAY_TEXT
+    }
+}
+
+INDEX_SETTINGS = {
+    # full_text dominates _source; stored fields compress much better with DEFLATE
+    "codec": "best_compression",
+    "analysis": ANALYSIS
+}
+
+
+def index_body():
+    """Settings + mappings for a new case index"""
+    mappings = dict(MAPPINGS)
+    if SOURCE_EXCLUDES:
+        mappings["_source"] = {"excludes": SOURCE_EXCLUDES}
+    return {"settings": {"index": INDEX_SETTINGS}, "mappings": mappings}
+
+
+def template_body(alias=index_name):
+    """Index template for the alias name and its versioned indices"""
+    return {
+        "index_patterns": [alias, f"{alias}_v*"],
+        "priority": TEMPLATE_PRIORITY,
+        "template": index_body()
+    }
+
+
+def put_template(alias=index_name):
+    client.indices.put_index_template(name=TEMPLATE_NAME, body=template_body(alias))
+    print(f"✅ Index template '{TEMPLATE_NAME}' installed for {alias}, {alias}_v*")
+
+
+def _field_types(properties, prefix=""):
+    """{"people.name": "text", ...} flattened from a mapping's properties"""
+    types = {}
+    for name, field in properties.items():
+        path = prefix + name
+        if "properties" in field:
+            types[path] = field.get("type", "object")
+            types.update(_field_types(field["properties"], path + "."))
+        else:
+            types[path] = field.get("type")
+    return types
+
+
+def check(index=index_name):
+    """
+    Fields whose live type differs from the managed mapping, and managed
+    fields the live index doesn't have: {"index", "mismatched", "missing"}
+    """
+    live = next(iter(client.indices.get_mapping(index=index).values()), {}).get("mappings", {})
+    expected = _field_types(MAPPINGS["properties"])
+    actual = _field_types(live.get("properties", {}))
+    return {
+        "index": index,
+        "mismatched": {f: {"expected": t, "actual": actual[f]} for f, t in expected.items() if f in actual and actual[f] != t},
+        "missing": sorted(f for f in expected if f not in actual)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Managed mapping for '{index_name}'")
+    parser.add_argument("command", choices=["put", "show", "check"])
+    args = parser.parse_args()
+
+    if args.command == "put":
+        put_template()
+    elif args.command == "show":
+        print(json.dumps(index_body(), indent=2))
+    else:
+        try:
+            result = check()
+        except exceptions.NotFoundError:
+            print(f"⚠️ Index '{index_name}' does not exist")
+            return
+        if not result["mismatched"] and not result["missing"]:
+            print(f"✅ '{index_name}' matches the managed mapping")
+            return
+        for field, types in result["mismatched"].items():
+            print(f"  ≠ {field}: {types['actual']} (managed: {types['expected']})")
+        for field in result["missing"]:
+            print(f"  + {field}: not mapped yet")
+        print("Rebuild to apply: python -m index_admin.aliases rebuild --reindex")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# index_admin/tasks.py
+import time
+from config import get_client
+
+# Created lazily - no connection round trip until a task is polled
+client = get_client()
+
+TASK_POLL_INTERVAL = 5  # seconds
+
+
+def task_progress(status):
+    """'12000/50000 (24%) - 11800 created, 200 deleted' from a task status"""
+    total = status.get("total", 0)
+    done = sum(status.get(k, 0) for k in ("created", "updated", "deleted", "noops"))
+    percent = f" ({done * 100 // total}%)" if total else ""
+    counts = ", ".join(f"{status[k]} {k}" for k in ("created", "updated", "deleted") if status.get(k))
+    return f"{done}/{total}{percent}" + (f" - {counts}" if counts else "")
+
+
+def wait_for_task(task_id, poll_interval=TASK_POLL_INTERVAL, label="Task"):
+    """
+    Poll the tasks API until task_id completes, printing progress.
+    Returns the final tasks.get() response ("response" holds the totals and failures).
+    """
+    started = time.monotonic()
+    while True:
+        result = client.tasks.get(task_id=task_id)
+        status = result.get("task", {}).get("status", {})
+        if result.get("completed"):
+            print(f"✅ {label} finished in {time.monotonic() - started:.1f}s: "
+                  f"{task_progress(result.get('response', status))}")
+            return result
+        print(f"  … {label}: {task_progress(status)}")
+        time.sleep(poll_interval)
@@ -0,0 +1,539 @@
+# ingest_docs/ingest_docs.py
+"""
+Bulk-load case documents into the index.
+
+    python -m ingest_docs.ingest_docs cases.jsonl
+    python -m ingest_docs.ingest_docs data/ --workers 8 --batch-mb 10 --report ingest_report.json
+    python -m ingest_docs.ingest_docs data/ --sync
+    python -m ingest_docs.ingest_docs data/ --sync --dry-run      # what would be written and deleted
+
+Sources are JSON Lines files (one case per line), .json files holding one case
+or a list of cases, or directories of either. Records are streamed into _bulk
+requests capped by size, sent by parallel workers; items rejected with 429/5xx
+are retried with exponential backoff. Refreshes are paused and replicas dropped
+for the duration of the load, then restored. Records need an _id, id or
+source_url: every document is written under an explicit id, so retries and
+re-runs never duplicate it.
+
+Every document is stored with a content_hash of its source. --sync compares
+against the hashes already in the index: unchanged documents are skipped,
+new and changed ones are upserted, and documents no longer in the sources
+are deleted - only the delta is written and the index stays fully searchable.
+A sync that would delete more than MAX_SYNC_DELETES documents or
+MAX_SYNC_DELETE_FRACTION of the index (e.g. run over part of the sources)
+keeps them unless --force is given.
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from opensearchpy import exceptions
+from config import get_client, index_name
+from functions.index_state import mark_index_changed
+from fetch_docs.export_docs import iter_documents
+from index_admin.mapping import index_body
+
+# Created lazily - no connection round trip until the load starts
+client = get_client()
+
+BULK_MAX_BYTES = 5 * 1024 * 1024
+BULK_MAX_DOCS = 1000
+DEFAULT_WORKERS = 4
+MAX_RETRIES = 5
+INITIAL_BACKOFF = 1.0   # seconds, doubled per retry
+MAX_BACKOFF = 60.0
+BULK_REQUEST_TIMEOUT = 120
+PROGRESS_EVERY = 20     # batches
+
+# Settings while loading; the originals are put back afterwards
+LOAD_REFRESH_INTERVAL = "-1"
+LOAD_REPLICAS = 0
+
+# Bulk queue full / node unavailable are transient; anything else (mapping errors...) is final
+RETRY_STATUSES = {429, 502, 503, 504}
+SOURCE_EXTENSIONS = (".jsonl", ".ndjson", ".json")
+HASH_FIELD = "content_hash"
+MAX_REPORTED_FAILURES = 50
+MAX_REPORTED_DELETES = 50
+
+# Safety cap for --sync: deleting more than this many documents, or this share
+# of the index, needs force=True (--force)
+MAX_SYNC_DELETES = int(os.getenv("MAX_SYNC_DELETES", 1000))
+MAX_SYNC_DELETE_FRACTION = float(os.getenv("MAX_SYNC_DELETE_FRACTION", 0.1))
+
+# Only what send_batch reads back - keeps large bulk responses small
+BULK_FILTER_PATH = "errors,items.*._id,items.*.status,items.*.result,items.*.error"
+
+
+# ---------- Run report ----------
+class IngestReport:
+    """Counters shared by the workers, plus the first few failures"""
+
+    def __init__(self, mode="load", index=index_name, dry_run=False):
+        self._lock = threading.Lock()
+        self.mode = mode
+        self.index = index
+        self.dry_run = dry_run
+        self.existing = 0
+        self.to_write = 0
+        self.to_delete = 0
+        self.delete_sample = []
+        self.deletes_blocked = False
+        self.sources = 0
+        self.read = 0
+        self.invalid = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.bytes = 0
+        self.failures = []
+        self.started = time.monotonic()
+        self.seconds = None
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def fail(self, doc_id, status, error):
+        with self._lock:
+            self.failed += 1
+            if len(self.failures) < MAX_REPORTED_FAILURES:
+                self.failures.append({"id": doc_id, "status": status, "error": error})
+
+    @property
+    def indexed(self):
+        return self.created + self.updated
+
+    def elapsed(self):
+        return self.seconds if self.seconds is not None else time.monotonic() - self.started
+
+    def docs_per_sec(self):
+        elapsed = self.elapsed()
+        return round(self.indexed / elapsed, 1) if elapsed else None
+
+    def finish(self):
+        self.seconds = time.monotonic() - self.started
+
+    def as_dict(self):
+        elapsed = self.elapsed()
+        return {
+            "index": self.index,
+            "mode": self.mode,
+            "dry_run": self.dry_run,
+            "existing": self.existing,
+            "to_write": self.to_write,
+            "to_delete": self.to_delete,
+            "delete_sample": self.delete_sample,
+            "deletes_blocked": self.deletes_blocked,
+            "sources": self.sources,
+            "documents_read": self.read,
+            "invalid": self.invalid,
+            "indexed": self.indexed,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "bytes": self.bytes,
+            "seconds": round(elapsed, 2),
+            "docs_per_sec": self.docs_per_sec(),
+            "mb_per_sec": round(self.bytes / elapsed / 1024 / 1024, 2) if elapsed else None,
+            "failures": self.failures
+        }
+
+
+# ---------- Sources ----------
+def iter_source_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(SOURCE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def iter_records(paths, report):
+    """Case dicts from every source, JSON Lines files read one line at a time"""
+    for path in iter_source_files(paths):
+        report.add(sources=1)
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".json"):
+                try:
+                    data = json.load(f)
+                except ValueError as e:
+                    # Same as a bad JSON Lines line: counted, and sync won't prune after it
+                    report.add(invalid=1)
+                    print(f"⚠️  {path}: invalid JSON ({e})")
+                    continue
+                for number, record in enumerate(data if isinstance(data, list) else [data], 1):
+                    if not isinstance(record, dict):
+                        report.add(invalid=1)
+                        print(f"⚠️  {path}: record {number} is not a JSON object")
+                        continue
+                    report.add(read=1)
+                    yield record
+                continue
+
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    report.add(invalid=1)
+                    print(f"⚠️  {path}:{line_number}: invalid JSON ({e})")
+                    continue
+                if not isinstance(record, dict):
+                    report.add(invalid=1)
+                    print(f"⚠️  {path}:{line_number}: not a JSON object")
+                    continue
+                report.add(read=1)
+                yield record
+
+
+def document_id(record):
+    """
+    _id or id from the record; otherwise a hash of source_url, so re-running
+    a load (or resending a batch after a timeout) overwrites documents instead
+    of duplicating them. None when the record has none of these.
+    """
+    for key in ("_id", "id"):
+        if record.get(key):
+            return str(record[key])
+    if record.get("source_url"):
+        return hashlib.sha1(record["source_url"].encode("utf-8")).hexdigest()
+    return None
+
+
+def content_hash(source):
+    """SHA-256 of the source (full_text and all metadata) in canonical JSON form"""
+    canonical = json.dumps(
+        {k: v for k, v in source.items() if k != HASH_FIELD},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def prepare_document(record):
+    """(doc_id, source stamped with its content_hash)"""
+    source = {k: v for k, v in record.items() if k != "_id"}
+    source[HASH_FIELD] = content_hash(source)
+    return document_id(record), source
+
+
+def index_item(doc_id, source):
+    """(doc_id, NDJSON action + source lines as bytes)"""
+    action = {"index": {"_id": doc_id}}
+    return doc_id, (json.dumps(action) + "\n" + json.dumps(source, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def delete_item(doc_id):
+    return doc_id, (json.dumps({"delete": {"_id": doc_id}}) + "\n").encode("utf-8")
+
+
+def load_content_hashes(index=index_name):
+    """{doc_id: content_hash} for the whole index (None for documents stored before hashing)"""
+    hashes = {}
+    for batch in iter_documents(fields=[HASH_FIELD], index=index):
+        for hit in batch:
+            hashes[hit["_id"]] = hit.get("_source", {}).get(HASH_FIELD)
+    return hashes
+
+
+def exceeds_delete_cap(count, total, max_deletes=MAX_SYNC_DELETES, max_fraction=MAX_SYNC_DELETE_FRACTION):
+    """True when a sync would delete too much of the index to do it unasked"""
+    return count > max_deletes or (total > 0 and count / total > max_fraction)
+
+
+def iter_bulk_items(records, report, existing=None, delete_missing=True, force=False):
+    """
+    Bulk items for a full load, or - given the index's existing hashes -
+    for a sync: changed/new documents, then deletes for ids not in the sources.
+    Deletes above the safety cap are only yielded with force=True.
+    """
+    for record in records:
+        doc_id, source = prepare_document(record)
+        # Auto-ids would duplicate on every resend and every re-run
+        if doc_id is None:
+            report.fail(None, None, "no _id, id or source_url - can't be indexed idempotently")
+            continue
+        if existing is not None:
+            if existing.pop(doc_id, None) == source[HASH_FIELD]:
+                report.add(unchanged=1)
+                continue
+        report.add(to_write=1)
+        yield index_item(doc_id, source)
+
+    if existing is None or not delete_missing or not existing:
+        return
+    # Never prune on a partial read - a bad line could be hiding a live document
+    if report.invalid or not report.read:
+        print(f"⚠️  Not deleting {len(existing)} missing documents: the sources were not read cleanly")
+        return
+
+    report.to_delete = len(existing)
+    report.delete_sample = list(existing)[:MAX_REPORTED_DELETES]
+    if exceeds_delete_cap(len(existing), report.existing) and not force:
+        report.deletes_blocked = True
+        print(f"⚠️  Not deleting {len(existing)} of {report.existing} documents: above the safety cap "
+              f"({MAX_SYNC_DELETES} documents / {MAX_SYNC_DELETE_FRACTION:.0%} of the index) - "
+              f"check the sources are complete and pass --force")
+        return
+    if report.dry_run:
+        return
+    print(f"🗑️  Deleting {len(existing)} documents no longer in the sources")
+    for doc_id in existing:
+        yield delete_item(doc_id)
+
+
+def iter_batches(items, max_bytes=BULK_MAX_BYTES, max_docs=BULK_MAX_DOCS):
+    """Group bulk items into requests of at most max_bytes / max_docs"""
+    batch, size = [], 0
+    for item in items:
+        if batch and (size + len(item[1]) > max_bytes or len(batch) >= max_docs):
+            yield batch
+            batch, size = [], 0
+        batch.append(item)
+        size += len(item[1])
+    if batch:
+        yield batch
+
+
+# ---------- Indexing ----------
+def _status(error):
+    """HTTP status of a failed request; None for connection errors/timeouts"""
+    return error.status_code if isinstance(error.status_code, int) else None
+
+
+def send_batch(batch, report, max_retries=MAX_RETRIES, index=index_name):
+    """
+    Send one _bulk request. Items rejected with a transient status are resent
+    on their own, with exponential backoff; other item errors are final.
+    Every item carries an explicit _id, so resending a whole batch after a
+    timeout (which may have been applied) overwrites rather than duplicates.
+    The transport doesn't retry _bulk itself - this loop is the only retry.
+    """
+    report.add(batches=1, bytes=sum(len(line) for _, line in batch))
+    pending = batch
+
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(min(INITIAL_BACKOFF * 2 ** (attempt - 1), MAX_BACKOFF))
+            report.add(retries=len(pending))
+
+        try:
+            response = client.bulk(
+                index=index,
+                body=b"".join(line for _, line in pending),
+                filter_path=BULK_FILTER_PATH,
+                request_timeout=BULK_REQUEST_TIMEOUT
+            )
+        except exceptions.TransportError as e:
+            status = _status(e)
+            if status is None or status in RETRY_STATUSES:
+                continue  # whole request rejected - resend all of it
+            for doc_id, _ in pending:
+                report.fail(doc_id, status, str(e.info or e.error))
+            return
+
+        retry = []
+        created = updated = deleted = 0
+        for (doc_id, line), item in zip(pending, response.get("items", [])):
+            action, result = next(iter(item.items()))
+            status = result.get("status", 500)
+            if action == "delete" and status in (200, 404):
+                deleted += 1  # 404: already gone
+            elif status < 300:
+                if result.get("result") == "created":
+                    created += 1
+                else:
+                    updated += 1
+            elif status in RETRY_STATUSES:
+                retry.append((doc_id, line))
+            else:
+                report.fail(doc_id or result.get("_id"), status, result.get("error"))
+        report.add(created=created, updated=updated, deleted=deleted)
+
+        pending = retry
+        if not pending:
+            return
+
+    for doc_id, _ in pending:
+        report.fail(doc_id, None, f"gave up after {max_retries} retries")
+
+
+def ensure_index(index=index_name):
+    """Create the index with the managed mapping if it's missing"""
+    if not client.indices.exists(index=index):
+        client.indices.create(index=index, body=index_body())
+        print(f"🆕 Created index '{index}'")
+
+
+@contextmanager
+def bulk_load_settings(refresh_interval=LOAD_REFRESH_INTERVAL, replicas=LOAD_REPLICAS, index=index_name):
+    """Pause refreshes and drop replicas while loading; restore them and refresh afterwards"""
+    response = client.indices.get_settings(index=index, name="index.refresh_interval,index.number_of_replicas")
+    current = next(iter(response.values()), {}).get("settings", {}).get("index", {})
+    # A missing refresh_interval means the default; None resets it to that
+    original = {
+        "refresh_interval": current.get("refresh_interval"),
+        "number_of_replicas": current.get("number_of_replicas")
+    }
+
+    client.indices.put_settings(
+        index=index,
+        body={"index": {"refresh_interval": refresh_interval, "number_of_replicas": replicas}}
+    )
+    print(f"⚙️  Load settings: refresh_interval={refresh_interval}, replicas={replicas}")
+    try:
+        yield original
+    finally:
+        client.indices.put_settings(index=index, body={"index": original})
+        client.indices.refresh(index=index)
+        print(f"⚙️  Restored settings: {original}")
+
+
+def ingest(paths, workers=DEFAULT_WORKERS, max_bytes=BULK_MAX_BYTES, max_docs=BULK_MAX_DOCS,
+           max_retries=MAX_RETRIES, tune_settings=None, sync=False, delete_missing=True, index=index_name,
+           force=False, dry_run=False):
+    """
+    Load every record under paths. Batches are built on this thread and
+    handed to the workers through a bounded queue, so reading never runs
+    more than a couple of batches ahead of indexing. Returns an IngestReport.
+
+    sync=True writes only the delta against the index's content hashes.
+    Load settings are left alone by default when syncing - the index is live.
+    index targets a specific (e.g. not yet aliased) index instead of index_name.
+    force=True lifts the sync delete cap; dry_run=True only counts what
+    would be written (to_write) and deleted (to_delete, delete_sample).
+    """
+    report = IngestReport("sync" if sync else "load", index, dry_run)
+    if not dry_run:
+        ensure_index(index)
+    if tune_settings is None:
+        tune_settings = not sync
+
+    existing = None
+    if sync:
+        existing = load_content_hashes(index)
+        report.existing = len(existing)
+        print(f"🔎 {len(existing)} documents in '{index}'")
+
+    if dry_run:
+        for _ in iter_bulk_items(iter_records(paths, report), report, existing, delete_missing, force):
+            pass
+        report.finish()
+        return report
+
+    batches = queue.Queue(maxsize=workers * 2)
+
+    def work():
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            try:
+                send_batch(batch, report, max_retries, index)
+            except Exception as e:
+                for doc_id, _ in batch:
+                    report.fail(doc_id, None, str(e))
+
+    with bulk_load_settings(index=index) if tune_settings else nullcontext():
+        threads = [threading.Thread(target=work, name=f"ingest-{i}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            items = iter_bulk_items(iter_records(paths, report), report, existing, delete_missing, force)
+            for number, batch in enumerate(iter_batches(items, max_bytes, max_docs), 1):
+                batches.put(batch)
+                if number % PROGRESS_EVERY == 0:
+                    print(f"  … {report.indexed}/{report.read} documents, {report.docs_per_sec()} docs/sec")
+        finally:
+            for _ in threads:
+                batches.put(None)
+            for thread in threads:
+                thread.join()
+            # Caches and the people index in this process re-check the index right away
+            mark_index_changed()
+
+    report.finish()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Bulk-load case documents into '{index_name}'")
+    parser.add_argument("paths", nargs="+", help=".jsonl/.ndjson/.json files or directories")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel bulk requests (default %(default)s)")
+    parser.add_argument("--batch-mb", type=float, default=BULK_MAX_BYTES / 1024 / 1024, help="max bulk request size in MB (default %(default)s)")
+    parser.add_argument("--batch-docs", type=int, default=BULK_MAX_DOCS, help="max documents per bulk request (default %(default)s)")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES, help="retries per rejected item (default %(default)s)")
+    parser.add_argument("--sync", action="store_true", help="write only new/changed documents and delete removed ones")
+    parser.add_argument("--no-delete", action="store_true", help="with --sync, keep documents missing from the sources")
+    parser.add_argument("--force", action="store_true",
+                        help=f"with --sync, delete even above the safety cap ({MAX_SYNC_DELETES} documents / {MAX_SYNC_DELETE_FRACTION * 100:g}%% of the index)")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be written and deleted")
+    parser.add_argument("--keep-settings", action="store_true", help="don't touch refresh_interval / replicas during the load")
+    parser.add_argument("--index", default=index_name, help="target index or alias (default %(default)s)")
+    parser.add_argument("--report", help="also write the run report to this JSON file")
+    args = parser.parse_args()
+
+    report = ingest(
+        args.paths,
+        workers=max(1, args.workers),
+        max_bytes=int(args.batch_mb * 1024 * 1024),
+        max_docs=args.batch_docs,
+        max_retries=args.max_retries,
+        tune_settings=False if args.keep_settings else None,
+        sync=args.sync,
+        delete_missing=not args.no_delete,
+        index=args.index,
+        force=args.force,
+        dry_run=args.dry_run
+    )
+    summary = report.as_dict()
+
+    if args.dry_run:
+        print(f"🔎 Dry run: {summary['to_write']} to write, {summary['unchanged']} unchanged, "
+              f"{summary['to_delete']} to delete{' (blocked by the safety cap)' if report.deletes_blocked else ''}, "
+              f"{summary['failed']} failed, {summary['invalid']} invalid")
+        for doc_id in report.delete_sample[:10]:
+            print(f"   🗑️  {doc_id}")
+        if report.to_delete > 10:
+            print(f"   … and {report.to_delete - 10} more")
+    else:
+        print(f"{'✅' if not report.failed else '⚠️ '} Indexed {summary['indexed']}/{summary['documents_read']} documents "
+              f"({summary['created']} created, {summary['updated']} updated, {summary['unchanged']} unchanged, "
+              f"{summary['deleted']} deleted, {summary['failed']} failed, "
+              f"{summary['retries']} retries) in {summary['seconds']}s - "
+              f"{summary['docs_per_sec']} docs/sec, {summary['mb_per_sec']} MB/sec")
+    for failure in report.failures[:10]:
+        print(f"   ❌ {failure['id']}: {failure['status']} {failure['error']}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"📝 Report written to {args.report}")
+
+    if report.failed or report.invalid or (report.deletes_blocked and not args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
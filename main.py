@@ -1,19 +1,44 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 
-from main_py import handle_query
+from config import readiness
+from main_py import handle_query, handle_query_structured, iter_query_events
+from functions.query_cache import query_cache_stats
+from functions.facet_store import facet_store
+from functions.document_cache import document_cache
+from functions.fetch_file import MAX_BATCH_DOCUMENTS, fetch_files
+from text_cleaner.clean_text import cleaner_stats
+from functions.failed_queries import ADMIN_TOKEN, is_admin_request, top_failed_queries
+from functions.people import MAX_PERSON_PAGE_SIZE, search_person_server_results
 
 may_legal_assistant = Flask(__name__)
 CORS(may_legal_assistant)
 
 
+def wants_stream(data):
+    return bool(data.get("stream")) or "text/event-stream" in request.headers.get("Accept", "")
+
+
 @may_legal_assistant.route("/api/query", methods=["POST"])
 def query_api():
     data = request.get_json()
 
-    if not data or "message" not in data:
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str):
         return jsonify({"error": "No message provided"}), 400
 
+    # Structured mode: {"format": "json"} - typed results instead of a rendered message
+    if data.get("format") == "json":
+        cleaned, result = handle_query_structured(data["message"])
+        return jsonify({"cleaned_input": cleaned, "result": result})
+
+    # Streaming mode: {"stream": true} or Accept: text/event-stream
+    if wants_stream(data):
+        return Response(
+            stream_with_context(iter_query_events(data["message"])),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
     cleaned, response = handle_query(data["message"])
 
     return jsonify({
@@ -22,9 +47,70 @@ def query_api():
     })
 
 
+@may_legal_assistant.route("/api/documents", methods=["POST"])
+def documents_api():
+    # Several get_file: lookups in one _mget: {"ids": [...], "full_text": true}
+    data = request.get_json()
+    ids = data.get("ids") if isinstance(data, dict) else None
+
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) and i.strip() for i in ids):
+        return jsonify({"error": "Provide a non-empty list of document ids"}), 400
+    if len(ids) > MAX_BATCH_DOCUMENTS:
+        return jsonify({"error": f"At most {MAX_BATCH_DOCUMENTS} documents per request"}), 400
+
+    documents = fetch_files([i.strip() for i in ids], full_text=bool(data.get("full_text", True)))
+    return jsonify({"documents": documents})
+
+
+@may_legal_assistant.route("/api/people", methods=["POST"])
+def people_api():
+    # Server-side person search, one page at a time: {"name": ..., "page_size": 10}, then
+    # {"name": ..., "cursor": <cursor from the previous page>} until the cursor is null
+    data = request.get_json()
+    name = data.get("name") if isinstance(data, dict) else None
+    if not isinstance(name, str) or not name.strip():
+        return jsonify({"error": "No name provided"}), 400
+
+    cursor = data.get("cursor")
+    page_size = data.get("page_size", 10)
+    if cursor is not None and not isinstance(cursor, str):
+        return jsonify({"error": "cursor must be a string"}), 400
+    if not isinstance(page_size, int) or not 1 <= page_size <= MAX_PERSON_PAGE_SIZE:
+        return jsonify({"error": f"page_size must be between 1 and {MAX_PERSON_PAGE_SIZE}"}), 400
+
+    return jsonify(search_person_server_results(name.strip(), page_size, cursor))
+
+
 @may_legal_assistant.route("/api/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "opensearch": readiness()})
+
+
+@may_legal_assistant.route("/api/ready", methods=["GET"])
+def ready():
+    state = readiness()
+    return jsonify(state), 200 if state["ready"] else 503
+
+
+@may_legal_assistant.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({**query_cache_stats(), "facets": facet_store.stats(), "documents": document_cache.stats()})
+
+
+@may_legal_assistant.route("/api/cleaner/stats", methods=["GET"])
+def cleaner_stats_api():
+    return jsonify(cleaner_stats())
+
+
+@may_legal_assistant.route("/api/failed_queries", methods=["GET"])
+def failed_queries_api():
+    # Raw user queries: admin token only (python -m functions.failed_queries works locally)
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    if not is_admin_request(request.headers.get("Authorization")):
+        return jsonify({"error": "Unauthorized"}), 401
+    limit = request.args.get("limit", 20, type=int)
+    return jsonify(top_failed_queries(limit, since=request.args.get("since")))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+import asyncio
+
+from quart import Quart, Response, request, jsonify
+from quart_cors import cors
+
+from config import readiness
+from main_py import handle_query_async, handle_query_structured, iter_query_events_async
+from functions.query_cache import query_cache_stats
+from functions.facet_store import facet_store
+from functions.document_cache import document_cache
+from functions.fetch_file import MAX_BATCH_DOCUMENTS, fetch_files_async
+from text_cleaner.clean_text import cleaner_stats
+from functions.failed_queries import ADMIN_TOKEN, is_admin_request, top_failed_queries
+from functions.people import MAX_PERSON_PAGE_SIZE, search_person_server_results
+
+# ASGI version of main.py - run with: uvicorn main_asgi:may_legal_assistant --workers 2
+may_legal_assistant = cors(Quart(__name__))
+
+
+def wants_stream(data):
+    return bool(data.get("stream")) or "text/event-stream" in request.headers.get("Accept", "")
+
+
+@may_legal_assistant.route("/api/query", methods=["POST"])
+async def query_api():
+    data = await request.get_json()
+
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+        return jsonify({"error": "No message provided"}), 400
+
+    # Structured mode: {"format": "json"} - typed results instead of a rendered message
+    if data.get("format") == "json":
+        cleaned, result = await asyncio.to_thread(handle_query_structured, data["message"])
+        return jsonify({"cleaned_input": cleaned, "result": result})
+
+    # Streaming mode: {"stream": true} or Accept: text/event-stream
+    if wants_stream(data):
+        response = Response(
+            iter_query_events_async(data["message"]),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        response.timeout = None  # long documents may take a while to send
+        return response
+
+    cleaned, response = await handle_query_async(data["message"])
+
+    return jsonify({
+        "cleaned_input": cleaned,
+        "response": response
+    })
+
+
+@may_legal_assistant.route("/api/documents", methods=["POST"])
+async def documents_api():
+    # Several get_file: lookups in one _mget: {"ids": [...], "full_text": true}
+    data = await request.get_json()
+    ids = data.get("ids") if isinstance(data, dict) else None
+
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) and i.strip() for i in ids):
+        return jsonify({"error": "Provide a non-empty list of document ids"}), 400
+    if len(ids) > MAX_BATCH_DOCUMENTS:
+        return jsonify({"error": f"At most {MAX_BATCH_DOCUMENTS} documents per request"}), 400
+
+    documents = await fetch_files_async([i.strip() for i in ids], full_text=bool(data.get("full_text", True)))
+    return jsonify({"documents": documents})
+
+
+@may_legal_assistant.route("/api/people", methods=["POST"])
+async def people_api():
+    # Server-side person search, one page at a time: {"name": ..., "page_size": 10}, then
+    # {"name": ..., "cursor": <cursor from the previous page>} until the cursor is null
+    data = await request.get_json()
+    name = data.get("name") if isinstance(data, dict) else None
+    if not isinstance(name, str) or not name.strip():
+        return jsonify({"error": "No name provided"}), 400
+
+    cursor = data.get("cursor")
+    page_size = data.get("page_size", 10)
+    if cursor is not None and not isinstance(cursor, str):
+        return jsonify({"error": "cursor must be a string"}), 400
+    if not isinstance(page_size, int) or not 1 <= page_size <= MAX_PERSON_PAGE_SIZE:
+        return jsonify({"error": f"page_size must be between 1 and {MAX_PERSON_PAGE_SIZE}"}), 400
+
+    return jsonify(await asyncio.to_thread(search_person_server_results, name.strip(), page_size, cursor))
+
+
+@may_legal_assistant.route("/api/health", methods=["GET"])
+async def health():
+    return jsonify({"status": "ok", "opensearch": readiness()})
+
+
+@may_legal_assistant.route("/api/ready", methods=["GET"])
+async def ready():
+    state = readiness()
+    return jsonify(state), 200 if state["ready"] else 503
+
+
+@may_legal_assistant.route("/api/cache/stats", methods=["GET"])
+async def cache_stats():
+    return jsonify({**query_cache_stats(), "facets": facet_store.stats(), "documents": document_cache.stats()})
+
+
+@may_legal_assistant.route("/api/cleaner/stats", methods=["GET"])
+async def cleaner_stats_api():
+    return jsonify(cleaner_stats())
+
+
+@may_legal_assistant.route("/api/failed_queries", methods=["GET"])
+async def failed_queries_api():
+    # Raw user queries: admin token only (python -m functions.failed_queries works locally)
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    if not is_admin_request(request.headers.get("Authorization")):
+        return jsonify({"error": "Unauthorized"}), 401
+    limit = request.args.get("limit", 20, type=int)
+    return jsonify(await asyncio.to_thread(top_failed_queries, limit, since=request.args.get("since")))
+
+
+if __name__ == "__main__":
+    may_legal_assistant.run(debug=True)
@@ -1,13 +1,31 @@
-import random
+import asyncio
 import json
-from datetime import datetime
+import random
 
-from statements.who import who_query
-from statements.may import may_query        # <-- add this
+from statements.who import who_query, who_query_result, is_who_query
+from statements.may import may_query, may_query_async, is_may_query        # <-- add this
 # from statements.what import what_query
-from statements.topics import topics_query
-from text_cleaner.clean_text import clean_user_text
-from functions.fetch_file import fetch_file
+from statements.topics import (
+    topics_query,
+    topics_query_async,
+    topics_query_stream,
+    topics_query_stream_async,
+    topics_query_result,
+    is_topics_query,
+)
+from text_cleaner.clean_text import clean_user_text, clean_user_text_async
+from functions.fetch_file import fetch_file, fetch_file_async, iter_fetch_file, iter_fetch_file_async, fetch_file_result
+from functions.failed_queries import failed_query_log
+from functions.facet_store import facet_store
+from functions.query_cache import (
+    raw_query_cache,
+    command_cache,
+    normalize_query_key,
+    invalidate_if_index_changed,
+    is_cacheable,
+    is_cacheable_result,
+    join_message,
+)
 
 APOLOGY_RESPONSES = [
     "Sorry about that — I’m still adding some features. I’ll be able to help more soon.",
@@ -20,66 +38,319 @@ APOLOGY_RESPONSES = [
     "That’s a bit outside what I can do right now. More capabilities are on the way."
 ]
 
-FAILED_LOG_JSON = "failed_queries.json"
-
 
 def log_failed_query_json(query: str):
-    """Append failed queries to a JSON file"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = {"timestamp": timestamp, "query": query}
+    """Append a failed query to the JSON Lines failure log (written in the background)"""
+    failed_query_log.log(query)
 
-    try:
-        # Load existing data if file exists
-        try:
-            with open(FAILED_LOG_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            data = []
-
-        # Append new entry
-        data.append(entry)
-
-        # Save back to file
-        with open(FAILED_LOG_JSON, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error logging failed query: {e}")
 
+def fallback_reply(cleaned_input: str):
+    """No statement answers the query: log it and apologise"""
+    log_failed_query_json(cleaned_input)
+    return random.choice(APOLOGY_RESPONSES)
 
-def handle_query(raw_input_text: str):
-    if not raw_input_text:
-        return None, "Please enter a query."
 
-    # ---------- GET FILE (FAKE RESPONSE ONLY) ----------
+# ---------- ROUTING (shared by every output mode) ----------
+class Route:
+    """
+    Where a query goes: `name` is "file", "who", "may" or "topics" (None when
+    nothing matches), or "cached" with the cached `answer`. Answers are cached
+    under raw_key and command_key; get_file answers use the document cache instead.
+    """
+    __slots__ = ("cleaned_input", "name", "raw_key", "command_key", "answer")
+
+    def __init__(self, cleaned_input, name, raw_key=None, command_key=None, answer=None):
+        self.cleaned_input = cleaned_input
+        self.name = name
+        self.raw_key = raw_key
+        self.command_key = command_key
+        self.answer = answer
+
+    def remember(self, answer):
+        if self.command_key is None:
+            return
+        command_cache.set(self.command_key, answer)
+        raw_query_cache.set(self.raw_key, (self.cleaned_input, answer))
+
+
+def match_statement(cleaned_input: str):
+    """The statement that answers a cleaned command, in priority order"""
+    if is_who_query(cleaned_input):
+        return "who"
+    if is_may_query(cleaned_input):
+        return "may"
+    if is_topics_query(cleaned_input):
+        return "topics"
+    return None
+
+
+def _cached_route(raw_key: str):
+    """A "cached" route on a raw-input cache hit, else None"""
+    found, cached = raw_query_cache.get(raw_key)
+    if not found:
+        return None
+    cleaned_input, answer = cached
+    return Route(cleaned_input, "cached", answer=answer)
+
+
+def _command_route(cleaned_input: str, raw_key: str, key_prefix: str):
+    """Cleaned-command cache, then the statement that will answer it"""
+    command_key = key_prefix + normalize_query_key(cleaned_input)
+    found, answer = command_cache.get(command_key)
+    if found:
+        raw_query_cache.set(raw_key, (cleaned_input, answer))
+        return Route(cleaned_input, "cached", answer=answer)
+    return Route(cleaned_input, match_statement(cleaned_input), raw_key, command_key)
+
+
+def resolve_route(raw_input_text: str, key_prefix: str = ""):
+    """
+    Cache lookups, input cleaning and statement matching for one query.
+    key_prefix keeps output modes with different answer types apart in the caches.
+    """
     if "get_file:" in raw_input_text.lower():
-        response = fetch_file(raw_input_text)
-        return raw_input_text, response
+        return Route(raw_input_text, "file")
+
+    invalidate_if_index_changed()
+    facet_store.refresh_if_changed()
+    raw_key = key_prefix + normalize_query_key(raw_input_text)
+    route = _cached_route(raw_key)
+    if route:
+        return route
 
-    # ---------- CLEAN INPUT ----------
     try:
         cleaned_input = clean_user_text(raw_input_text)
     except Exception:
         cleaned_input = raw_input_text
+    return _command_route(cleaned_input, raw_key, key_prefix)
+
+
+async def resolve_route_async(raw_input_text: str, key_prefix: str = ""):
+    """resolve_route for the async serving mode"""
+    if "get_file:" in raw_input_text.lower():
+        return Route(raw_input_text, "file")
+
+    await asyncio.to_thread(invalidate_if_index_changed)
+    await asyncio.to_thread(facet_store.refresh_if_changed)
+    raw_key = key_prefix + normalize_query_key(raw_input_text)
+    route = _cached_route(raw_key)
+    if route:
+        return route
+
+    try:
+        cleaned_input = await clean_user_text_async(raw_input_text)
+    except Exception:
+        cleaned_input = raw_input_text
+    return _command_route(cleaned_input, raw_key, key_prefix)
+
+
+# ---------- MESSAGE MODE ----------
+MESSAGE_HANDLERS = {"file": fetch_file, "who": who_query, "may": may_query, "topics": topics_query}
+
+
+async def _who_query_async(cleaned_input):
+    # Answered from the in-memory people index; a refresh may scan OpenSearch, so keep it off the loop
+    return await asyncio.to_thread(who_query, cleaned_input)
+
+
+ASYNC_MESSAGE_HANDLERS = {"file": fetch_file_async, "who": _who_query_async, "may": may_query_async, "topics": topics_query_async}
+
+
+def _answer_message(route, message):
+    if not message:
+        return route.cleaned_input, fallback_reply(route.cleaned_input)
+    if is_cacheable(message):
+        route.remember(message)
+    return route.cleaned_input, message
+
+
+def handle_query(raw_input_text: str):
+    if not raw_input_text:
+        return None, "Please enter a query."
+
+    route = resolve_route(raw_input_text)
+    if route.name == "cached":
+        return route.cleaned_input, route.answer
+    if route.name is None:
+        return route.cleaned_input, fallback_reply(route.cleaned_input)
+    return _answer_message(route, MESSAGE_HANDLERS[route.name](route.cleaned_input))
+
+
+async def handle_query_async(raw_input_text: str):
+    """
+    handle_query for the async serving mode: same routing and caching,
+    with OpenAI and OpenSearch calls awaited instead of blocking a worker.
+    """
+    if not raw_input_text:
+        return None, "Please enter a query."
+
+    route = await resolve_route_async(raw_input_text)
+    if route.name == "cached":
+        return route.cleaned_input, route.answer
+    if route.name is None:
+        return route.cleaned_input, fallback_reply(route.cleaned_input)
+    return _answer_message(route, await ASYNC_MESSAGE_HANDLERS[route.name](route.cleaned_input))
 
-    # ---------- WHO ----------
-    message = who_query(cleaned_input)
-    if message:
-        return cleaned_input, message
 
-    # ---------- MAY ----------
+# ---------- STRUCTURED (JSON) MODE ----------
+def message_result(message):
+    return {"type": "message", "text": message}
+
+
+def _may_query_result(cleaned_input):
     message = may_query(cleaned_input)
-    if message:
-        return cleaned_input, message
+    return message_result(message) if message else None
 
-    # ---------- TOPICS ----------
-    message = topics_query(cleaned_input)
-    if message:
-        return cleaned_input, message
 
-    # ---------- FALLBACK ----------
-    log_failed_query_json(cleaned_input)
-    return cleaned_input, random.choice(APOLOGY_RESPONSES)
+RESULT_HANDLERS = {"file": fetch_file_result, "who": who_query_result, "may": _may_query_result, "topics": topics_query_result}
+
+
+def handle_query_structured(raw_input_text: str):
+    """
+    handle_query for format=json: same routing, but returns (cleaned_input, result)
+    where result is a typed dict (topics, person, document, document_page,
+    message or error) for the client to render. Cached separately from messages.
+    """
+    if not raw_input_text:
+        return None, message_result("Please enter a query.")
+
+    route = resolve_route(raw_input_text, key_prefix="json\0")
+    if route.name == "cached":
+        return route.cleaned_input, route.answer
+
+    result = RESULT_HANDLERS[route.name](route.cleaned_input) if route.name else None
+    if not result:
+        return route.cleaned_input, message_result(fallback_reply(route.cleaned_input))
+    if is_cacheable_result(result):
+        route.remember(result)
+    return route.cleaned_input, result
+
+
+# ---------- STREAMING MODE ----------
+def _cache_when_complete(chunks, route):
+    """Pass chunks through, caching the joined message once the stream finishes"""
+    if route.command_key is None:
+        # get_file: cached by the document cache, and too big to buffer here
+        yield from chunks
+        return
+
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+
+    message = join_message(parts)
+    if is_cacheable(message):
+        route.remember(message)
+
+
+async def _cache_when_complete_async(chunks, route):
+    if route.command_key is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    parts = []
+    async for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+
+    message = join_message(parts)
+    if is_cacheable(message):
+        route.remember(message)
+
+
+async def _iter_async(chunks):
+    for chunk in chunks:
+        yield chunk
+
 
+def _single_chunk(handler):
+    return lambda cleaned_input: iter([handler(cleaned_input)])
+
+
+def _single_chunk_async(handler):
+    async def chunks(cleaned_input):
+        yield await handler(cleaned_input)
+    return chunks
+
+
+STREAM_HANDLERS = {
+    "file": iter_fetch_file,
+    "who": _single_chunk(who_query),
+    "may": _single_chunk(may_query),
+    "topics": topics_query_stream
+}
+ASYNC_STREAM_HANDLERS = {
+    "file": iter_fetch_file_async,
+    "who": _single_chunk_async(_who_query_async),
+    "may": _single_chunk_async(may_query_async),
+    "topics": topics_query_stream_async
+}
+
+
+def handle_query_stream(raw_input_text: str):
+    """
+    handle_query for the streaming mode. Returns (cleaned_input, chunks):
+    topic results and documents come out piece by piece, everything else
+    as a single chunk. Caching matches handle_query.
+    """
+    if not raw_input_text:
+        return None, iter(["Please enter a query."])
+
+    route = resolve_route(raw_input_text)
+    if route.name == "cached":
+        return route.cleaned_input, iter([route.answer])
+    if route.name is None:
+        return route.cleaned_input, iter([fallback_reply(route.cleaned_input)])
+    return route.cleaned_input, _cache_when_complete(STREAM_HANDLERS[route.name](route.cleaned_input), route)
+
+
+async def handle_query_stream_async(raw_input_text: str):
+    """handle_query_stream for the async serving mode; chunks is an async iterator"""
+    if not raw_input_text:
+        return None, _iter_async(["Please enter a query."])
+
+    route = await resolve_route_async(raw_input_text)
+    if route.name == "cached":
+        return route.cleaned_input, _iter_async([route.answer])
+    if route.name is None:
+        return route.cleaned_input, _iter_async([fallback_reply(route.cleaned_input)])
+    return route.cleaned_input, _cache_when_complete_async(ASYNC_STREAM_HANDLERS[route.name](route.cleaned_input), route)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """One Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def iter_query_events(raw_input_text: str):
+    """
+    SSE stream for /api/query: a comment right away (first byte before the
+    LLM cleaner runs), then meta (cleaned_input), chunk events and done.
+    """
+    yield ": processing\n\n"
+    try:
+        cleaned, chunks = handle_query_stream(raw_input_text)
+        yield sse_event("meta", {"cleaned_input": cleaned})
+        for chunk in chunks:
+            yield sse_event("chunk", {"text": chunk})
+    except Exception as e:
+        yield sse_event("error", {"error": str(e)})
+    yield sse_event("done", {})
+
+
+async def iter_query_events_async(raw_input_text: str):
+    """iter_query_events for the async serving mode"""
+    yield ": processing\n\n"
+    try:
+        cleaned, chunks = await handle_query_stream_async(raw_input_text)
+        yield sse_event("meta", {"cleaned_input": cleaned})
+        async for chunk in chunks:
+            yield sse_event("chunk", {"text": chunk})
+    except Exception as e:
+        yield sse_event("error", {"error": str(e)})
+    yield sse_event("done", {})
 
 
 def main():
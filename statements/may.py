@@ -1,9 +1,10 @@
-from functions.may_function import search_may  # <-- your function that processes the query
+from functions.may_function import search_may, search_may_async  # <-- your function that processes the query
 
-def may_query(user_input):
+
+def route_may(user_input):
     """
-    Process 'may_search:' queries.
-    Extract the text after 'may_search:' and pass it to search_may to get the message.
+    Parse 'may_search:' queries.
+    Returns (query, None), (None, reply) or (None, None) if the input doesn't match.
     """
 
     input_lower = user_input.lower().strip()
@@ -13,10 +14,34 @@ def may_query(user_input):
         query = user_input[len("may_search:"):].strip()
 
         if not query:
-            return "Please specify what you want me to search for."
+            return None, "Please specify what you want me to search for."
+
+        return query, None
+
+    # If input doesn't match
+    return None, None
+
+
+def is_may_query(user_input):
+    """True when may_query answers this input"""
+    return route_may(user_input) != (None, None)
 
+
+def may_query(user_input):
+    """
+    Process 'may_search:' queries.
+    Extract the text after 'may_search:' and pass it to search_may to get the message.
+    """
+    query, reply = route_may(user_input)
+    if query:
         # Pass the extracted query to your function which returns the message
         return search_may(query)
+    return reply
 
-    # If input doesn't match
-    return None
+
+async def may_query_async(user_input):
+    """may_query for the async serving mode"""
+    query, reply = route_may(user_input)
+    if query:
+        return await search_may_async(query)
+    return reply
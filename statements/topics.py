@@ -1,7 +1,13 @@
 # functions/topics_functions.py
 import random
 import re
-from functions.topics_function import search_topics  # your actual topic search logic
+from functions.topics_function import (  # your actual topic search logic
+    search_topics,
+    search_topics_async,
+    iter_search_topics,
+    iter_search_topics_async,
+    search_topics_results,
+)
 
 # words to ignore (CODE-LEVEL, NOT AI)
 IGNORE_WORDS = {"cases", "letters", "appeals"}
@@ -27,9 +33,10 @@ def clean_topics(text: str) -> str:
     return ", ".join(cleaned_parts).strip()
 
 
-def topics_query(user_input):
+def route_topics(user_input):
     """
-    Process 'search:' and 'do not search:' queries.
+    Parse 'search:' and 'do not search:' queries.
+    Returns (topics_to_search, None), (None, reply) or (None, None) if the input doesn't match.
     """
     input_lower = user_input.lower().strip()
 
@@ -39,9 +46,9 @@ def topics_query(user_input):
         topics = clean_topics(topics)   # 🔥 FULL removal happens here
 
         if not topics:
-            return "Please specify the topics to search. For example: 'search: mining, energy'"
+            return None, "Please specify the topics to search. For example: 'search: mining, energy'"
 
-        return search_topics(topics)
+        return topics, None
 
     # Handle "do not search:" queries
     elif input_lower.startswith("do not search:"):
@@ -49,7 +56,7 @@ def topics_query(user_input):
         topics = clean_topics(topics)   # 🔥 FULL removal happens here
 
         if not topics:
-            return "Please specify the topics you don't want me to search."
+            return None, "Please specify the topics you don't want me to search."
 
         responses = [
             f"Sure, I won't search for {topics}.",
@@ -57,10 +64,74 @@ def topics_query(user_input):
             f"No problem, I won't provide any results for {topics}.",
             f"Understood, I won't search anything related to {topics}."
         ]
-        return random.choice(responses)
+        return None, random.choice(responses)
+
+    return None, None
+
+
+def is_topics_query(user_input):
+    """True when topics_query answers this input"""
+    input_lower = user_input.lower().strip()
+    return input_lower.startswith("search:") or input_lower.startswith("do not search:")
+
+
+def topics_query(user_input):
+    """
+    Process 'search:' and 'do not search:' queries.
+    """
+    topics, reply = route_topics(user_input)
+    if topics:
+        return search_topics(topics)
+    return reply
+
 
+async def topics_query_async(user_input):
+    """topics_query for the async serving mode"""
+    topics, reply = route_topics(user_input)
+    if topics:
+        return await search_topics_async(topics)
+    return reply
+
+
+def topics_query_result(user_input):
+    """
+    topics_query for the structured (JSON) mode: a topics_result dict,
+    {"type": "message", "text"} for replies, or None.
+    """
+    topics, reply = route_topics(user_input)
+    if topics:
+        return search_topics_results(topics)
+    if reply:
+        return {"type": "message", "text": reply}
+    return None
+
+
+def topics_query_stream(user_input):
+    """
+    topics_query for the streaming mode: an iterator of message pieces,
+    or None if the input isn't a topics query.
+    """
+    topics, reply = route_topics(user_input)
+    if topics:
+        return iter_search_topics(topics)
+    if reply:
+        return iter([reply])
     return None
 
 
+def topics_query_stream_async(user_input):
+    """topics_query_stream for the async serving mode (an async iterator or None)"""
+    topics, reply = route_topics(user_input)
+    if topics:
+        return iter_search_topics_async(topics)
+    if reply:
+        return _single_chunk_async(reply)
+    return None
+
+
+async def _single_chunk_async(message):
+    yield message
+
+
 def topics_query_handler(user_input):
     return topics_query(user_input)
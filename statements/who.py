@@ -1,28 +1,69 @@
+import os
 import random
-from functions.who_function import search_person
+import re
+from functions.who_function import search_person, search_person_results
+from functions.people import search_person_server, search_person_server_results
+from functions.people_resolver import search_people
+
+# "index": match names against the resident people index (default)
+# "server": match names in OpenSearch with a nested query, fetching only people/case summary fields
+PERSON_SEARCH_MODE = os.getenv("PERSON_SEARCH_MODE", "index").lower()
+
+def person_name(input_lower):
+    """The name in a 'who is' query, without filler words"""
+    name = input_lower[7:].strip()  # Remove "who is "
+
+    # Remove common filler words
+    filler_words = ["the", "a", "an", "mr", "mrs", "ms", "dr", "professor", "prof"]
+    name_parts = name.split()
+    if name_parts and name_parts[0].lower() in filler_words:
+        name = " ".join(name_parts[1:])
+    return name
+
+
+def who_are_names(input_lower):
+    """The names in a 'who are' query: "who are J.M. Chimembe, B. Mulunda and Stuart Sikazwe" -> [...]"""
+    names = [n.strip(" ?.") for n in re.split(r",|\band\b|;", input_lower[8:])]
+    return [n for n in names if n]
+
+
+def is_who_query(user_input):
+    """True when who_query answers this input"""
+    input_lower = user_input.lower().strip()
+    if input_lower.startswith("who are "):
+        return len(who_are_names(input_lower)) >= 2
+    return input_lower.startswith(("who is ", "don't tell me about ", "dont tell me about "))
+
 
 def who_query(user_input):
     """
-    Process 'who is' and 'don't tell me about' queries.
-    Returns search_person results for 'who is' or a polite refusal for 'don't tell me about'.
+    Process 'who is', 'who are' and 'don't tell me about' queries.
+    Returns search_person results for 'who is', search_people results for several names
+    after 'who are', or a polite refusal for 'don't tell me about'.
     """
     input_lower = user_input.lower().strip()
 
     # Handle "who is" queries
     if input_lower.startswith("who is "):
-        name = input_lower[7:].strip()  # Remove "who is "
-
-        if not name:
+        if not input_lower[7:].strip():
             return "Please specify a person's name. For example: 'who is Albert Einstein?'"
 
-        # Remove common filler words
-        filler_words = ["the", "a", "an", "mr", "mrs", "ms", "dr", "professor", "prof"]
-        name_parts = name.split()
-        if name_parts[0].lower() in filler_words:
-            name = " ".join(name_parts[1:])
+        name = person_name(input_lower)
 
+        if PERSON_SEARCH_MODE == "server":
+            return search_person_server(name)
         return search_person(name)
 
+    # Handle "who are" queries with several names: "who are J.M. Chimembe, B. Mulunda and Stuart Sikazwe"
+    elif input_lower.startswith("who are "):
+        names = who_are_names(input_lower)
+
+        # A single name ("who are you") is not a people lookup
+        if len(names) < 2:
+            return None
+
+        return search_people(names)
+
     # Handle "don't tell me about" or "dont tell me about" queries
     elif input_lower.startswith("don't tell me about ") or input_lower.startswith("dont tell me about "):
         # Extract the name after the phrase
@@ -46,6 +87,24 @@ def who_query(user_input):
     # If input doesn't match any recognized pattern
     return None
 
+def who_query_result(user_input):
+    """
+    who_query for the structured (JSON) mode: a find_person result for
+    'who is' in index mode, a people_page result (with its next-page cursor)
+    in server mode, {"type": "message", "text"} for the other replies, or
+    None if the input isn't a people query.
+    """
+    input_lower = user_input.lower().strip()
+
+    if input_lower.startswith("who is ") and input_lower[7:].strip():
+        if PERSON_SEARCH_MODE == "server":
+            return search_person_server_results(person_name(input_lower))
+        return search_person_results(person_name(input_lower))
+
+    message = who_query(user_input)
+    return {"type": "message", "text": message} if message else None
+
+
 # Example handler that uses only who_query
 def person_query_handler(user_input):
     return who_query(user_input)
@@ -0,0 +1,24 @@
+# tests/test_highlighter.py
+import re
+
+from functions.highlighter import DEFAULT_LEGAL_TERMS, TermHighlighter, default_replacement
+
+
+def legacy_highlight(text):
+    """The per-term re.sub formatter TermHighlighter replaced"""
+    for term in DEFAULT_LEGAL_TERMS:
+        text = re.sub(rf"\b{term}\b", default_replacement(term), text, flags=re.IGNORECASE)
+    return text
+
+
+def test_matches_legacy_formatter():
+    highlighter = TermHighlighter(DEFAULT_LEGAL_TERMS)
+    text = "The Court heard the WITNESS; the judge's verdict on appeal. Courtroom regulations."
+    assert highlighter.highlight(text) == legacy_highlight(text)
+
+
+def test_non_ascii_case_folding():
+    highlighter = TermHighlighter(DEFAULT_LEGAL_TERMS)
+    for text in ["WİTNESS for the defence", "under the ſtatute", "KOURT", "ſentence: 5 years"]:
+        assert highlighter.highlight(text) == legacy_highlight(text)
+    assert highlighter.highlight("WİTNESS") == "*Witness*:"
@@ -0,0 +1,121 @@
+# tests/test_ingest_sync.py
+import json
+
+import ingest_docs.ingest_docs as ingest_docs
+from ingest_docs.ingest_docs import (
+    IngestReport,
+    exceeds_delete_cap,
+    iter_bulk_items,
+    iter_records,
+    prepare_document,
+)
+
+
+def case(doc_id, title="Case"):
+    return {"_id": doc_id, "title": title, "full_text": f"{title} text"}
+
+
+def stored_hashes(*records):
+    """{doc_id: content_hash} as load_content_hashes would read them back"""
+    return {doc_id: source["content_hash"] for doc_id, source in map(prepare_document, records)}
+
+
+def written_and_deleted(items):
+    written, deleted = [], []
+    for doc_id, body in items:
+        (deleted if body.startswith(b'{"delete"') else written).append(doc_id)
+    return written, deleted
+
+
+def write_jsonl(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_sync_writes_only_changed_and_new_documents():
+    existing = stored_hashes(case("same"), case("changed", "Old title"))
+    report = IngestReport("sync")
+    records = [case("same"), case("changed", "New title"), case("new")]
+    report.add(read=len(records))
+
+    written, deleted = written_and_deleted(iter_bulk_items(records, report, existing))
+
+    assert written == ["changed", "new"]
+    assert deleted == []
+    assert (report.unchanged, report.to_write) == (1, 2)
+
+
+def test_sync_deletes_missing_documents():
+    existing = stored_hashes(*[case(f"c{i}") for i in range(20)])
+    report = IngestReport("sync")
+    report.existing = len(existing)
+    records = [case(f"c{i}") for i in range(19)]
+    report.add(read=len(records))
+
+    written, deleted = written_and_deleted(iter_bulk_items(records, report, existing))
+
+    assert (written, deleted) == ([], ["c19"])
+    assert report.to_delete == 1 and not report.deletes_blocked
+
+
+def test_no_deletes_after_an_invalid_line(tmp_path):
+    source = write_jsonl(tmp_path / "cases.jsonl", [json.dumps(case("kept")), "{not json"])
+    existing = stored_hashes(case("kept"), case("maybe-in-the-bad-line"))
+    report = IngestReport("sync")
+
+    written, deleted = written_and_deleted(iter_bulk_items(iter_records([source], report), report, existing))
+
+    assert (written, deleted) == ([], [])
+    assert (report.read, report.invalid, report.to_delete) == (1, 1, 0)
+
+
+def test_malformed_json_source_is_counted_as_invalid(tmp_path):
+    (tmp_path / "a.json").write_text("[{\"_id\": \"x\"", encoding="utf-8")
+    (tmp_path / "b.json").write_text(json.dumps([case("y"), "not an object"]), encoding="utf-8")
+    report = IngestReport()
+
+    records = list(iter_records([str(tmp_path)], report))
+
+    assert [r["_id"] for r in records] == ["y"]
+    assert (report.sources, report.read, report.invalid) == (2, 1, 2)
+
+
+def test_delete_cap():
+    assert not exceeds_delete_cap(1, 20)
+    assert exceeds_delete_cap(3, 20)                 # 15% of the index
+    assert exceeds_delete_cap(1001, 1_000_000)      # over MAX_SYNC_DELETES
+    assert not exceeds_delete_cap(0, 0)
+
+
+def test_deletes_above_the_cap_need_force():
+    existing = stored_hashes(*[case(f"c{i}") for i in range(20)])
+    records = [case(f"c{i}") for i in range(10)]
+
+    report = IngestReport("sync")
+    report.existing = len(existing)
+    report.add(read=len(records))
+    _, deleted = written_and_deleted(iter_bulk_items(records, report, dict(existing)))
+    assert deleted == [] and report.deletes_blocked and report.to_delete == 10
+
+    report = IngestReport("sync")
+    report.existing = len(existing)
+    report.add(read=len(records))
+    _, deleted = written_and_deleted(iter_bulk_items(records, report, dict(existing), force=True))
+    assert sorted(deleted) == sorted(f"c{i}" for i in range(10, 20))
+
+
+def test_dry_run_counts_without_writing(tmp_path, monkeypatch):
+    existing = stored_hashes(case("same"), case("changed", "Old title"), case("gone"))
+    existing.update({f"c{i}": None for i in range(20)})  # stored before hashing: rewritten
+    monkeypatch.setattr(ingest_docs, "load_content_hashes", lambda index: dict(existing))
+    monkeypatch.setattr(ingest_docs, "send_batch", lambda *a, **kw: (_ for _ in ()).throw(AssertionError("sent")))
+    lines = [json.dumps(r) for r in [case("same"), case("changed", "New title"), case("new")]]
+    lines += [json.dumps(case(f"c{i}")) for i in range(20)]
+    source = write_jsonl(tmp_path / "cases.jsonl", lines)
+
+    report = ingest_docs.ingest([source], sync=True, dry_run=True)
+
+    assert report.dry_run and report.existing == 23
+    assert (report.to_write, report.unchanged) == (22, 1)
+    assert (report.to_delete, report.delete_sample, report.deletes_blocked) == (1, ["gone"], False)
+    assert (report.indexed, report.deleted) == (0, 0)
@@ -0,0 +1,34 @@
+# tests/test_intent_parser.py
+from text_cleaner.intent_parser import parse_intent
+
+
+def test_initialled_names_bypass_the_llm():
+    assert parse_intent("Tell me about J.M. Chimembe") == "who is J.M. Chimembe"
+    assert parse_intent("who was B. Mulunda?") == "who is B. Mulunda"
+    assert parse_intent("information on J. M. Mwale-Banda") == "who is J. M. Mwale-Banda"
+
+
+def test_capitalized_phrases_go_to_the_llm():
+    for text in [
+        "Tell me about Zambia Revenue Authority",
+        "Tell me about Contract Law",
+        "who was Stuart Sikazwe",
+        "tell me about J.M. Revenue Authority",
+        "what do you know about Z. Law",
+    ]:
+        assert parse_intent(text) is None, text
+
+
+def test_known_names_bypass_the_llm():
+    known = {"Stuart Sikazwe"}.__contains__
+    assert parse_intent("who was Stuart Sikazwe", is_known_name=known) == "who is Stuart Sikazwe"
+    assert parse_intent("Tell me about Contract Law", is_known_name=known) is None
+
+
+def test_commands_topics_and_small_talk():
+    assert parse_intent("who is J.M. Chimembe?") == "who is J.M. Chimembe"
+    assert parse_intent("Hello!") == "may_search: Hello!"
+    assert parse_intent("who are you") == "may_search: who are you"
+    assert parse_intent("show me cases about mining and energy") == "search: mining, energy"
+    assert parse_intent("cases involving John Banda") is None
+    assert parse_intent("   ") is None
@@ -0,0 +1,57 @@
+# tests/test_name_candidates.py
+import functions.name_candidates as name_candidates
+from functions.name_candidates import NameCandidateIndex, blocking_keys
+
+
+def index_of(*names):
+    index = NameCandidateIndex()
+    for name in names:
+        index.add(name)
+    return index
+
+
+def test_blocking_keys():
+    assert blocking_keys("j m chimembe") == {"s:chimembe", "f:j chimembe", "i:jm chimembe"}
+    assert blocking_keys("chimembe") == {"s:chimembe"}
+    assert blocking_keys("") == set()
+
+
+def test_substring_lookups_match_a_linear_scan():
+    names = ["j m chimembe", "john chimembe", "b mulunda", "stuart sikazwe", "mwale banda"]
+    index = index_of(*names)
+
+    for parts in (["chim"], ["chimembe", "john"], ["mu"], ["a"], ["zz"], ["b", "banda"]):
+        expected = [n for n in names if all(p in n for p in parts)]
+        assert index.match_all_parts(parts, 10) == expected, parts
+
+    assert index.match_any_part(["sikazwe", "mulunda"], 10) == ["b mulunda", "stuart sikazwe"]
+    assert index.match_all_parts(["chimembe"], 0) == ["j m chimembe"]  # limit + 1 tells "too many"
+
+
+def test_remove_keeps_postings_consistent():
+    index = index_of("j m chimembe", "john chimembe")
+    index.add("j m chimembe")
+    assert len(index) == 2
+
+    index.remove("j m chimembe")
+    index.remove("never added")
+    assert len(index) == 1
+    assert index.containing("chimembe") == {"john chimembe"}
+    assert all("j m chimembe" not in bucket for bucket in index.grams.values())
+    assert "i:jm chimembe" not in index.blocks and index.blocks["f:j chimembe"] == {"john chimembe"}
+
+    index.remove("john chimembe")
+    assert index.grams == {} and index.blocks == {}
+
+
+def test_fuzzy_candidates_narrow_large_tables(monkeypatch):
+    monkeypatch.setattr(name_candidates, "FULL_SCAN_LIMIT", 3)
+    monkeypatch.setattr(name_candidates, "MAX_FUZZY_CANDIDATES", 2)
+    index = index_of("j m chimembe", "b mulunda", "stuart sikazwe", "mwale banda", "john mwila chimembe")
+
+    candidates = index.fuzzy_candidates("j chimembe")
+    assert candidates[0] == "j m chimembe" and "john mwila chimembe" in candidates
+    assert "stuart sikazwe" not in candidates
+
+    monkeypatch.setattr(name_candidates, "FULL_SCAN_LIMIT", 5000)
+    assert index.fuzzy_candidates("anything") == list(index.order)
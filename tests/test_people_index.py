@@ -0,0 +1,77 @@
+# tests/test_people_index.py
+import functions.people_index as people_index_module
+from functions.people_index import PeopleIndex, normalize_name
+
+
+def case(title, *people):
+    return {"title": title, "court_type": "High Court", "case_type": "Civil",
+            "people": [{"name": name, "role": role} for name, role in people]}
+
+
+def test_add_and_replace_case():
+    index = PeopleIndex()
+    index._add_case("c1", case("A v B", ("J.M. Chimembe", "plaintiff"), ("B. Mulunda", "defendant")), ("i", 1, 1))
+    index._add_case("c2", case("C v D", ("J.M. Chimembe", "witness")), ("i", 2, 1))
+
+    assert [p.case_id for p in index.lookup("j m chimembe")] == ["c1", "c2"]
+    assert index.lookup("b mulunda")[0].role == "defendant"
+
+    # Re-adding a case replaces its people, postings and candidates
+    index._add_case("c1", case("A v B", ("Stuart Sikazwe", "plaintiff")), ("i", 3, 1))
+    assert [p.case_id for p in index.lookup("j m chimembe")] == ["c2"]
+    assert index.lookup("b mulunda") == []
+    assert index.names() == ["j m chimembe", "stuart sikazwe"]
+    assert index.names_with_all_parts(["mulunda"], 10) == []
+    assert index.case_seq["c1"] == ("i", 3, 1)
+
+
+def test_remove_case():
+    index = PeopleIndex()
+    index._add_case("c1", case("A v B", ("J.M. Chimembe", "plaintiff"), ("B. Mulunda", "defendant")), ("i", 1, 1))
+    index._add_case("c2", case("C v D", ("J.M. Chimembe", "witness")), ("i", 2, 1))
+
+    index._remove_case("c1")
+    assert [p.case_id for p in index.lookup("j m chimembe")] == ["c2"]
+    assert index.lookup("b mulunda") == [] and "b mulunda" not in index.candidates.order
+    assert "c1" not in index.case_names and "c1" not in index.case_seq
+
+    index._remove_case("c2")
+    index._remove_case("missing")
+    assert index.name_count() == 0 and len(index.candidates) == 0
+
+
+def test_refresh_applies_changes(monkeypatch):
+    stored = {
+        "c1": (case("A v B", ("J.M. Chimembe", "plaintiff")), 1),
+        "c2": (case("C v D", ("B. Mulunda", "defendant")), 1),
+    }
+
+    class FakeClient:
+        def mget(self, index, body, _source_includes):
+            return {"docs": [{"_id": i, "found": i in stored, "_source": stored.get(i, ({}, 0))[0]} for i in body["ids"]]}
+
+    def scan(client, index, query, size, preserve_order):
+        for doc_id, (source, seq) in list(stored.items()):
+            hit = {"_id": doc_id, "_index": "cases_v1", "_seq_no": seq, "_primary_term": 1}
+            if query["_source"] is not False:
+                hit["_source"] = source
+            yield hit
+
+    version = [1]
+    monkeypatch.setattr(people_index_module, "client", FakeClient())
+    monkeypatch.setattr(people_index_module.helpers, "scan", scan)
+    monkeypatch.setattr(people_index_module, "get_index_version", lambda: version[0])
+
+    index = PeopleIndex().ensure_fresh()
+    assert index.built and index.names() == ["j m chimembe", "b mulunda"]
+
+    del stored["c1"]
+    stored["c2"] = (case("C v D", ("Stuart Sikazwe", "defendant")), 2)
+    stored["c3"] = (case("E v F", ("B. Mulunda", "appellant")), 1)
+    version[0] = 2
+    index.ensure_fresh()
+
+    assert index.version == 2
+    assert index.lookup("j m chimembe") == []
+    assert [p.case_id for p in index.lookup("b mulunda")] == ["c3"]
+    assert index.lookup(normalize_name("Stuart Sikazwe"))[0].case_id == "c2"
@@ -0,0 +1,65 @@
+# tests/test_query_cache.py
+import functions.query_cache as query_cache
+from functions.query_cache import (
+    ErrorMessage,
+    PagedMessage,
+    TTLCache,
+    is_cacheable,
+    is_cacheable_result,
+    join_message,
+)
+
+
+def test_ttl_cache_lru_and_stats():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == (True, 1)   # "a" is now the most recent
+    cache.set("c", 3)                    # evicts "b"
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1, 1)
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+    cache.clear()
+    assert cache.get("a") == (False, None)
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", "answer")
+
+    now[0] += 4.9
+    assert cache.get("a") == (True, "answer")
+    now[0] += 0.2
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["size"] == 0
+
+
+def test_only_successful_answers_are_cacheable():
+    assert is_cacheable("Found 3 cases")
+    assert not is_cacheable("")
+    assert not is_cacheable(None)
+    assert not is_cacheable(ErrorMessage("ERROR: Connection lost during search."))
+    assert not is_cacheable(PagedMessage("Showing 10 of 40 cases."))
+
+
+def test_join_message_keeps_the_flags():
+    assert type(join_message(["a", "b"])) is str
+    assert isinstance(join_message(["Found ", ErrorMessage("ERROR")]), ErrorMessage)
+    assert isinstance(join_message([PagedMessage("page"), "\n"]), PagedMessage)
+    assert join_message(["a", ErrorMessage("b")]) == "ab"
+
+
+def test_is_cacheable_result():
+    assert is_cacheable_result({"type": "topics", "partial": False, "cases": []})
+    assert is_cacheable_result({"type": "message", "text": "Hello"})
+    assert not is_cacheable_result({"type": "error", "message": "down"})
+    assert not is_cacheable_result({"type": "topics", "partial": True})
+    assert not is_cacheable_result({"type": "message", "text": ErrorMessage("ERROR")})
+    assert not is_cacheable_result({"type": "people_page", "people": [], "cursor": "abc"})
+    assert is_cacheable_result({"type": "people_page", "people": [], "cursor": None})
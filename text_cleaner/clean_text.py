@@ -1,7 +1,12 @@
 # utils/openai_cleaner.py
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from text_cleaner.intent_parser import parse_intent
+from text_cleaner.rewrite_cache import rewrite_cache, make_key
+from functions.people_index import people_index, normalize_name
 
 # Load environment variables from .env file in parent directory
 load_dotenv()  # This will automatically load .env from parent folder
@@ -14,6 +19,9 @@ if not os.getenv("OPENAI_API_KEY"):
     print("⚠️  Warning: OPENAI_API_KEY not found in .env file")
     client = None
 
+# Async client for the ASGI serving mode
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) if client else None
+
 SYSTEM_PROMPT = """
 You are MAY, a text cleaning assistant.
 
@@ -25,6 +33,7 @@ TASK:
     - may_search: <user question>
 - Determine if the user strictly wants to know about a person:
     - If yes, start the cleaned text with "who is".
+    - If the user asks about several people, start with "who are" followed by the names separated by commas.
     - if the user does not strictly want to know about a person, start the cleaned text with "don't tell me about".
 - Determine if the user wants to know about a topic:
     - Extract only the key points (main nouns or keywords).
@@ -39,26 +48,111 @@ TASK:
 
 
 
-def clean_user_text(user_text: str) -> str:
-    """Clean user input using OpenAI"""
+# How often the local intent parser answered vs. the LLM
+_stats_lock = threading.Lock()
+_stats = {"local": 0, "cached": 0, "llm": 0, "fallback": 0}
+
+
+def _count(kind: str):
+    with _stats_lock:
+        _stats[kind] += 1
+
+
+def cleaner_stats() -> dict:
+    """Counts of locally parsed, cached, LLM-cleaned and fallback inputs, plus the LLM bypass rate"""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats["bypass_rate"] = round((stats["local"] + stats["cached"]) / total, 4) if total else 0.0
+    stats["rewrite_cache"] = rewrite_cache.stats()
+    return stats
+
+
+CLEANER_MODEL = "gpt-4o-mini"
+
+
+def _known_person(name: str) -> bool:
+    """An exact name in the people index - only if it's already built, the parser never waits on a scan"""
+    return people_index.built and bool(people_index.lookup(normalize_name(name)))
+
+
+def _clean_without_llm(user_text: str):
+    """
+    Everything that can answer before the network: local intent parser,
+    missing-client fallback and the persistent rewrite cache.
+    Returns (cleaned_text or None, rewrite cache key).
+    """
+    local = parse_intent(user_text, is_known_name=_known_person)
+    if local is not None:
+        _count("local")
+        return local, None
+
     if client is None:
+        _count("fallback")
         # Fallback: simple cleaning if OpenAI is not configured
-        return user_text.strip().lower()
+        return user_text.strip().lower(), None
+
+    # Reuse an earlier rewrite of the same input (shared across workers and restarts)
+    cache_key = make_key(user_text, CLEANER_MODEL, SYSTEM_PROMPT)
+    cached = rewrite_cache.get(cache_key)
+    if cached is not None:
+        _count("cached")
+        return cached, cache_key
+
+    return None, cache_key
+
+
+def _cleaner_messages(user_text: str):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_text}
+    ]
+
+
+def clean_user_text(user_text: str) -> str:
+    """Clean user input, using OpenAI only when the local intent parser can't decide"""
+    cleaned, cache_key = _clean_without_llm(user_text)
+    if cleaned is not None:
+        return cleaned
 
     try:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_text}
-            ],
+            model=CLEANER_MODEL,
+            messages=_cleaner_messages(user_text),
             temperature=1.0,
             max_tokens=300
         )
-        return response.choices[0].message.content.strip()
+        _count("llm")
+        cleaned = response.choices[0].message.content.strip()
+        rewrite_cache.set(cache_key, CLEANER_MODEL, cleaned)
+        return cleaned
     except Exception as e:
         print(f"⚠️  OpenAI error: {e}")
+        _count("fallback")
         # Fallback to original text
         return user_text.strip()
 
 
+async def clean_user_text_async(user_text: str) -> str:
+    """clean_user_text for the async serving mode (non-blocking OpenAI call)"""
+    # The local parser and the SQLite cache lookup block - run them off the loop
+    cleaned, cache_key = await asyncio.to_thread(_clean_without_llm, user_text)
+    if cleaned is not None:
+        return cleaned
+
+    try:
+        response = await async_client.chat.completions.create(
+            model=CLEANER_MODEL,
+            messages=_cleaner_messages(user_text),
+            temperature=1.0,
+            max_tokens=300
+        )
+        _count("llm")
+        cleaned = response.choices[0].message.content.strip()
+        await rewrite_cache.set_async(cache_key, CLEANER_MODEL, cleaned)
+        return cleaned
+    except Exception as e:
+        print(f"⚠️  OpenAI error: {e}")
+        _count("fallback")
+        # Fallback to original text
+        return user_text.strip()
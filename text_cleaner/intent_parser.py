@@ -0,0 +1,124 @@
+# text_cleaner/intent_parser.py
+import re
+
+# Inputs that are already commands statements/* understand - passed through untouched
+COMMAND_PREFIXES = (
+    "who is ",
+    "who are ",
+    "search:",
+    "do not search:",
+    "may_search:",
+    "don't tell me about ",
+    "dont tell me about ",
+)
+
+# Small talk and questions about MAY itself
+MAY_PHRASES = {
+    "hi", "hello", "hey", "hi there", "hello there", "good morning", "good afternoon",
+    "good evening", "how are you", "who are you", "what are you", "what is may",
+    "what can you do", "what do you do", "help", "thanks", "thank you",
+}
+
+# Words that mark a request as being about cases/topics rather than a person
+CASE_WORDS = r"(?:cases?|judg(?:e)?ments?|rulings?|decisions?|matters?|disputes?|appeals?|letters?)"
+
+# "cases about mining", "show me judgments related to land and energy"
+TOPIC_PATTERN = re.compile(
+    rf"^(?:(?:please\s+)?(?:find|show|list|search|get|give)(?:\s+me)?\s+)?(?:all\s+|any\s+|the\s+)?"
+    rf"{CASE_WORDS}\s+(?:about|on|related\s+to|relating\s+to|regarding|concerning|dealing\s+with|for|in|involving)\s+(?P<topics>.+)$",
+    re.IGNORECASE
+)
+
+# "tell me about J.M. Chimembe", "who was Stuart Sikazwe"
+PERSON_PATTERN = re.compile(
+    r"^(?:who\s+was|who's|whos|tell\s+me\s+about|what\s+do\s+you\s+know\s+about|information\s+(?:on|about))\s+(?P<name>.+)$",
+    re.IGNORECASE
+)
+
+# A capitalized word or an initial ("J.", "J.M.", "O'Brien", "Mwale-Banda")
+NAME_TOKEN = re.compile(r"^(?:[A-Z]\.)+$|^[A-Z][A-Za-z'\-]*\.?$")
+
+# Initials: "J.", "J.M." or a bare "J"
+INITIAL_TOKEN = re.compile(r"^(?:[A-Z]\.)+$|^[A-Z]$")
+
+# Words that make a capitalized phrase an organisation or a subject, not a person
+NON_PERSON_WORDS = {
+    "act", "agency", "authority", "bank", "board", "commission", "company", "corporation",
+    "council", "court", "government", "law", "limited", "ltd", "ministry", "plc",
+    "republic", "state", "tribunal", "union",
+}
+
+TRAILING_PUNCTUATION = " ?!."
+
+
+def _looks_like_person(text: str) -> bool:
+    """1-5 capitalized words or initials and nothing that reads like a case/topic"""
+    tokens = text.split()
+    if not 1 <= len(tokens) <= 5:
+        return False
+    if re.search(rf"\b{CASE_WORDS}\b", text, re.IGNORECASE):
+        return False
+    return all(NAME_TOKEN.match(t) for t in tokens)
+
+
+def _is_initialled_name(text: str) -> bool:
+    """Initials then a surname of one or two words: "J.M. Chimembe", "B. Mulunda", "J. M. Mwale Banda" """
+    tokens = text.split()
+    initials = 0
+    while initials < len(tokens) and INITIAL_TOKEN.match(tokens[initials]):
+        initials += 1
+    surname = tokens[initials:]
+    if not initials or not 1 <= len(surname) <= 2:
+        return False
+    if any(t.lower().strip(".") in NON_PERSON_WORDS for t in surname):
+        return False
+    return all(NAME_TOKEN.match(t) and len(t.rstrip(".")) > 1 for t in surname)
+
+
+def _split_topics(text: str) -> str:
+    """'mining and energy' -> 'mining, energy'"""
+    parts = re.split(r",|\band\b|&|/", text)
+    return ", ".join(p.strip() for p in parts if p.strip())
+
+
+def parse_intent(user_text: str, is_known_name=None):
+    """
+    Rule-based pre-classifier for user input.
+    Returns the cleaned command when the intent is unambiguous,
+    or None when the input should go to the LLM cleaner.
+    "tell me about <Name>" only becomes a people lookup for initialled names
+    or names is_known_name(name) confirms (e.g. against the people index) -
+    "Tell me about Contract Law" is left to the LLM.
+    """
+    text = " ".join(user_text.split())
+    if not text:
+        return None
+
+    lower = text.lower()
+
+    # Small talk / questions about MAY ("who are you" must not become a people lookup)
+    if lower.rstrip(TRAILING_PUNCTUATION) in MAY_PHRASES:
+        return f"may_search: {text}"
+
+    # Already a command
+    if lower.startswith(COMMAND_PREFIXES):
+        return text.rstrip(TRAILING_PUNCTUATION) if lower.startswith(("who is ", "who are ")) else text
+
+    stripped = text.rstrip(TRAILING_PUNCTUATION)
+
+    # Topic searches: "cases about X"
+    match = TOPIC_PATTERN.match(stripped)
+    if match:
+        topics = match.group("topics").strip()
+        if _looks_like_person(topics):
+            return None  # "cases involving John Banda" - let the LLM decide
+        return f"search: {_split_topics(topics.lower())}"
+
+    # Person lookups: "tell me about <Name>"
+    match = PERSON_PATTERN.match(stripped)
+    if match:
+        name = match.group("name").strip()
+        if _looks_like_person(name) and (_is_initialled_name(name) or (is_known_name and is_known_name(name))):
+            return f"who is {name}"
+
+    return None
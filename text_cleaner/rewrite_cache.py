@@ -0,0 +1,139 @@
+# text_cleaner/rewrite_cache.py
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+REWRITE_CACHE_PATH = os.getenv("REWRITE_CACHE_PATH", "rewrite_cache.sqlite3")
+REWRITE_CACHE_MAX_ENTRIES = int(os.getenv("REWRITE_CACHE_MAX_ENTRIES", 50000))
+
+# Eviction runs once every this many writes, not on every write
+EVICT_EVERY = 100
+# A hit only writes last_used back (with the hits counted since) once the stored
+# value is this old, so reads don't take the write lock; LRU order is this coarse
+REWRITE_CACHE_TOUCH_INTERVAL = float(os.getenv("REWRITE_CACHE_TOUCH_INTERVAL", 3600))
+
+
+def canonical_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of an input"""
+    return " ".join(text.lower().split())
+
+
+def make_key(text: str, model: str, prompt: str) -> str:
+    """Key on canonical input + model + a hash of the system prompt"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    raw = "\0".join([model, prompt_hash, canonical_text(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RewriteCache:
+    """
+    On-disk memo of LLM outputs, shared by every worker process on the host.
+    SQLite in WAL mode; least-recently-used rows are evicted past max_entries.
+    """
+
+    def __init__(self, path=REWRITE_CACHE_PATH, max_entries=REWRITE_CACHE_MAX_ENTRIES,
+                 touch_interval=REWRITE_CACHE_TOUCH_INTERVAL):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._pending_hits = {}  # key -> hits not yet written back (lost on exit)
+
+    def _connection(self):
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rewrites ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " output TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rewrites_last_used ON rewrites (last_used)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Cached output for key, or None"""
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT output, last_used FROM rewrites WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            now = time.time()
+            with self._writes_lock:
+                hits = self._pending_hits.pop(key, 0) + 1
+                if now - row[1] < self.touch_interval:
+                    self._pending_hits[key] = hits
+                    return row[0]
+            conn.execute("UPDATE rewrites SET last_used = ?, hits = hits + ? WHERE key = ?", (now, hits, key))
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"⚠️  Rewrite cache read error: {e}")
+            return None
+
+    def set(self, key: str, model: str, output: str):
+        try:
+            now = time.time()
+            self._connection().execute(
+                "INSERT OR REPLACE INTO rewrites (key, model, output, created_at, last_used, hits)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, model, output, now, now)
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️  Rewrite cache write error: {e}")
+            return
+
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    # SQLite calls block (and may wait on the write lock) - keep them off the event loop
+    async def get_async(self, key: str):
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, model: str, output: str):
+        await asyncio.to_thread(self.set, key, model, output)
+
+    def evict(self):
+        """Trim the table back to max_entries, dropping least-recently-used rows"""
+        try:
+            conn = self._connection()
+            (count,) = conn.execute("SELECT COUNT(*) FROM rewrites").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM rewrites WHERE key IN"
+                    " (SELECT key FROM rewrites ORDER BY last_used ASC LIMIT ?)",
+                    (excess,)
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️  Rewrite cache eviction error: {e}")
+
+    def stats(self) -> dict:
+        try:
+            row = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM rewrites"
+            ).fetchone()
+            with self._writes_lock:
+                pending = sum(self._pending_hits.values())
+            return {"entries": row[0], "hits": row[1] + pending, "max_entries": self.max_entries}
+        except sqlite3.Error:
+            return {"entries": 0, "hits": 0, "max_entries": self.max_entries}
+
+
+rewrite_cache = RewriteCache()